@@ -1,13 +1,17 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models.user import User
 import os
+import time
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 
 # JWTの設定
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
@@ -15,8 +19,76 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24時間
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+# ログインしていなくても利用できるエンドポイント用（トークンが無ければ None）
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 logger = logging.getLogger(__name__)
 
+# 認証ユーザーのキャッシュ設定（環境変数で調整可能、TTL=0 で無効）
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+
+class UserSnapshotCache:
+    """トークンの subject → ユーザー情報（カラム値のスナップショット）の TTL 付き LRU キャッシュ"""
+
+    def __init__(self, max_entries: int = AUTH_USER_CACHE_SIZE, ttl: float = AUTH_USER_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # subject -> (期限, スナップショット)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> Optional[User]:
+        """キャッシュされたユーザーを返す（無い・期限切れの場合は None）"""
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[subject]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            snapshot = entry[1]
+        # リクエスト間で同じオブジェクトを共有しないよう、毎回セッション外の User を作り直す
+        return User(**snapshot)
+
+    def put(self, subject: str, user: User) -> None:
+        if self.ttl <= 0:
+            return
+        snapshot = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+        with self._lock:
+            self._entries[subject] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user: User) -> None:
+        """ユーザー情報の更新時に、そのユーザーのエントリ（email / username）を削除"""
+        with self._lock:
+            for subject in (user.email, user.username):
+                self._entries.pop(subject, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+            }
+
+user_cache = UserSnapshotCache()
+
+def invalidate_cached_user(user: User) -> None:
+    """ユーザー情報を更新したら（ログイン時のパスワードハッシュ再計算など）呼び出し、古いユーザー情報が返らないようにする"""
+    user_cache.invalidate(user)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -27,7 +99,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="認証情報が無効です",
@@ -71,12 +143,28 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         logger.error(f"JWTデコードエラー: {str(e)}")
         raise credentials_exception
     
+    # キャッシュ済みならDBを参照しない
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+    
     # ユーザーの検索（emailまたはusernameで検索）
-    user = db.query(User).filter(
-        (User.email == username) | (User.username == username)
-    ).first()
+    result = await db.execute(
+        select(User).where((User.email == username) | (User.username == username)).limit(1)
+    )
+    user = result.scalars().first()
     if user is None:
         logger.error(f"ユーザー {username} がデータベースに見つかりません")
         raise user_not_found_exception
     
-    return user 
\ No newline at end of file
+    user_cache.put(username, user)
+    return user
+
+async def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Optional[User]:
+    """トークンがあればログインユーザーを返し、無い・無効な場合は None を返す"""
+    if not token:
+        return None
+    try:
+        return await get_current_user(token, db)
+    except HTTPException:
+        return None 
\ No newline at end of file
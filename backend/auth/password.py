@@ -1,9 +1,48 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt のコスト（2^rounds 回のストレッチ）。既存ハッシュは元のコストのまま検証できる
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# テスト環境以外ではこれより下げられない（ログイン時の再ハッシュで保存済みハッシュが弱くならないように）
+BCRYPT_MIN_ROUNDS = 12
+if os.getenv("ENV") != "test":
+    BCRYPT_ROUNDS = max(BCRYPT_ROUNDS, BCRYPT_MIN_ROUNDS)
+# ハッシュ計算用スレッド数（bcrypt は計算中に GIL を解放するため CPU コア数まで並列化できる）
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+
+# min_rounds を現在のコストにそろえ、弱いハッシュだけを再計算する（強いハッシュはそのまま）
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS
+)
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password) 
\ No newline at end of file
+    return pwd_context.hash(password)
+
+async def _run_in_hash_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, func, *args)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    イベントループを塞がずにパスワードを検証
+    
+    検証に成功し、ハッシュのコストが現在の設定より低い場合は
+    再計算したハッシュを2番目の値で返す（それ以外は None）。
+    """
+    return await _run_in_hash_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """イベントループを塞がずにパスワードをハッシュ化"""
+    return await _run_in_hash_pool(pwd_context.hash, password)
@@ -0,0 +1,5 @@
+"""
+ベンチマーク
+
+backend ディレクトリから `python -m benchmarks.<モジュール名>` で実行する。
+"""
@@ -0,0 +1,125 @@
+"""
+会話保存のベンチマーク
+
+10 / 100 / 1000 往復のセッションについて、従来の1ペアずつの ORM 追加と
+`build_conversation_rows` + バルクINSERT の保存時間を比較する。
+
+既定ではローカルの SQLite ファイルを使う。ネットワーク越しの MySQL では
+往復回数の差がそのまま効くため、BENCH_DATABASE_URL で実DBを指定して計測するとよい。
+実DBでは計測用のユーザーを新しく作り、このベンチマークが追加した会話とユーザーだけを
+最後に削除する（既存のテーブル・データには触れない）。
+
+    python -m benchmarks.bench_conversation_save
+    BENCH_DATABASE_URL=mysql+pymysql://... python -m benchmarks.bench_conversation_save
+"""
+import os
+import sys
+import time
+import uuid
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, delete
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+from models.user import User
+from models.conversation import Conversation
+from routers.counselor import build_conversation_rows
+
+TURN_COUNTS = [10, 100, 1000]
+REPEATS = int(os.getenv("BENCH_REPEATS", "5"))
+
+
+def make_messages(turns: int):
+    """指定した往復数の会話メッセージを作成"""
+    started = datetime(2025, 1, 1, 10, 0, 0)
+    messages = [{"role": "ai", "content": "こんにちは。今日はどのようなご相談ですか？"}]
+    for i in range(turns):
+        timestamp = (started + timedelta(seconds=i * 30)).isoformat() + "Z"
+        messages.append({"role": "user", "content": f"相談内容その{i}です。" * 5, "timestamp": timestamp})
+        messages.append({"role": "ai", "content": f"アドバイスその{i}です。" * 10, "timestamp": timestamp})
+    return messages
+
+
+def save_per_row(db, messages, user_id, conversation_id):
+    """従来方式: ペアごとに ORM オブジェクトを作成して追加"""
+    rows = build_conversation_rows(messages, user_id, "counselor", conversation_id, "ベンチマーク")
+    for row in rows:
+        db.add(Conversation(**row))
+    db.commit()
+
+
+def save_bulk(db, messages, user_id, conversation_id):
+    """新方式: 1回のバルクINSERT"""
+    rows = build_conversation_rows(messages, user_id, "counselor", conversation_id, "ベンチマーク")
+    db.execute(insert(Conversation), rows)
+    db.commit()
+
+
+def measure(session_factory, save, messages, user_id, run_id):
+    """保存処理を REPEATS 回実行し、所要時間の中央値（ミリ秒）を返す"""
+    timings = []
+    for n in range(REPEATS):
+        conversation_id = f"bench_{run_id}_{save.__name__}_{len(messages)}_{n}"
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            save(db, messages, user_id, conversation_id)
+            timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            # 今回追加した会話だけを削除する
+            db.rollback()
+            db.execute(delete(Conversation).where(Conversation.conversation_id == conversation_id))
+            db.commit()
+            db.close()
+    return statistics.median(timings)
+
+
+def main():
+    database_url = os.getenv("BENCH_DATABASE_URL")
+    if not database_url:
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        database_url = f"sqlite:///{path}"
+
+    engine = create_engine(database_url)
+    if engine.dialect.name == "sqlite":
+        # 実DBのスキーマはマイグレーションで管理しているため、テーブル作成は SQLite のみ
+        Base.metadata.create_all(bind=engine)
+    SessionFactory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    # 既存ユーザーと衝突しない計測用ユーザーを作成（ID は DB の採番に任せる）
+    run_id = uuid.uuid4().hex[:12]
+    db = SessionFactory()
+    user = User(
+        username=f"bench_{run_id}",
+        email=f"bench_{run_id}@example.com",
+        password_hash="bench_hash",
+        full_name="Bench User",
+        birth_date=datetime(1990, 1, 1).date()
+    )
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    try:
+        print(f"DB: {engine.url.render_as_string(hide_password=True)} / 繰り返し: {REPEATS}")
+        print(f"{'往復数':>8} {'1件ずつ(ms)':>14} {'バルク(ms)':>12} {'倍率':>8}")
+        for turns in TURN_COUNTS:
+            messages = make_messages(turns)
+            per_row_ms = measure(SessionFactory, save_per_row, messages, user_id, run_id)
+            bulk_ms = measure(SessionFactory, save_bulk, messages, user_id, run_id)
+            print(f"{turns:>8} {per_row_ms:>14.2f} {bulk_ms:>12.2f} {per_row_ms / bulk_ms:>7.1f}x")
+    finally:
+        db = SessionFactory()
+        db.execute(delete(Conversation).where(Conversation.user_id == user_id))
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+パスワード検証（ログイン）のベンチマーク
+
+1ワーカー（1イベントループ）で同時に届いたログインを処理したときの
+1秒あたりのログイン数と、その間のイベントループの最大停止時間を比較する。
+
+- 同期: async ハンドラー内で verify_password を直接呼ぶ（従来）
+- スレッドプール: verify_password_async でワーカースレッドに任せる
+
+    python -m benchmarks.bench_password_hashing
+    BCRYPT_ROUNDS=14 PASSWORD_HASH_WORKERS=4 python -m benchmarks.bench_password_hashing
+    ENV=test BCRYPT_ROUNDS=10 python -m benchmarks.bench_password_hashing  # 12 未満は ENV=test のときだけ
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth.password import (
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_WORKERS,
+    get_password_hash,
+    verify_password,
+    verify_password_async,
+)
+
+CONCURRENT_LOGINS = int(os.getenv("BENCH_CONCURRENT_LOGINS", "32"))
+PASSWORD = "benchmark-password"
+
+
+async def measure_loop_stall(stop: asyncio.Event) -> float:
+    """イベントループが応答できなかった最大時間（秒）を計測"""
+    interval = 0.005
+    max_stall = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_stall = max(max_stall, time.perf_counter() - started - interval)
+    return max_stall
+
+
+async def login_sync(hashed: str) -> None:
+    assert verify_password(PASSWORD, hashed)
+
+
+async def login_offloaded(hashed: str) -> None:
+    verified, _ = await verify_password_async(PASSWORD, hashed)
+    assert verified
+
+
+async def run(login, hashed: str):
+    """同時ログインを処理し、(ログイン/秒, 最大停止ミリ秒) を返す"""
+    stop = asyncio.Event()
+    stall_task = asyncio.create_task(measure_loop_stall(stop))
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[login(hashed) for _ in range(CONCURRENT_LOGINS)])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    max_stall = await stall_task
+    return CONCURRENT_LOGINS / elapsed, max_stall * 1000
+
+
+def main():
+    hashed = get_password_hash(PASSWORD)
+    # スレッドプールを起動しておく
+    asyncio.run(login_offloaded(hashed))
+
+    print(f"bcrypt rounds: {BCRYPT_ROUNDS} / スレッド数: {PASSWORD_HASH_WORKERS} / 同時ログイン数: {CONCURRENT_LOGINS}")
+    print(f"{'方式':<12} {'ログイン/秒':>12} {'ループ最大停止(ms)':>20}")
+    for label, login in [("同期", login_sync), ("スレッドプール", login_offloaded)]:
+        per_second, stall_ms = asyncio.run(run(login, hashed))
+        print(f"{label:<12} {per_second:>12.1f} {stall_ms:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
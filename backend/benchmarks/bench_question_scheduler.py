@@ -0,0 +1,154 @@
+"""
+出題スケジューラーのベンチマーク
+
+BENCH_USERS 人 × BENCH_QUESTIONS 問の環境で、各ユーザーが BENCH_ANSWERED 問に回答済み
+（うち約半数が期限切れ）の進捗を作成し、`next_question_batch` で次の10問を選ぶ時間を計測する。
+(user_id, due_at)・(user_id, question_id) インデックスがある場合と、削除した場合（全件走査）を比較する。
+
+既定は 100,000 人 × 1,000 問（進捗 3,000,000 行）。データ作成に数十秒かかる。
+
+    python -m benchmarks.bench_question_scheduler
+    BENCH_USERS=10000 BENCH_SAMPLES=500 python -m benchmarks.bench_question_scheduler
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+from models.user import User
+from models.deep_question import DeepQuestion, DeepQuestionProgress
+from services.question_catalog import QuestionCatalog
+from services.question_scheduler import next_question_batch
+
+USERS = int(os.getenv("BENCH_USERS", "100000"))
+QUESTIONS = int(os.getenv("BENCH_QUESTIONS", "1000"))
+ANSWERED = int(os.getenv("BENCH_ANSWERED", "30"))
+SAMPLES = int(os.getenv("BENCH_SAMPLES", "200"))
+BATCH_SIZE = 10
+CATEGORIES = ["趣味について", "仕事について", "家族について", "休日の過ごし方", "将来について"]
+NOW = datetime(2025, 7, 1, 12, 0, 0)
+CHUNK = 50000
+
+
+def seed(sync_url: str) -> QuestionCatalog:
+    """ユーザー・問題・進捗を作成し、ベンチマーク用のカタログを返す"""
+    engine = create_engine(sync_url)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+
+    questions = [
+        {
+            "id": n,
+            "category": CATEGORIES[n % len(CATEGORIES)],
+            "level": n % 3 + 1,
+            "situation_text": "状況",
+            "partner_info": {"name": "みゆきさん"},
+            "statement": "最近ヨガを始めたんです",
+            "options": [],
+            "correct_answer": "A",
+            "is_active": True
+        }
+        for n in range(1, QUESTIONS + 1)
+    ]
+
+    with engine.begin() as conn:
+        conn.execute(insert(DeepQuestion), questions)
+        for start in range(1, USERS + 1, CHUNK):
+            conn.execute(insert(User), [
+                {
+                    "id": user_id,
+                    "username": f"bench_{user_id}",
+                    "email": f"bench_{user_id}@example.com",
+                    "password_hash": "bench_hash",
+                    "full_name": "Bench User",
+                    "birth_date": datetime(1990, 1, 1).date()
+                }
+                for user_id in range(start, min(start + CHUNK, USERS + 1))
+            ])
+
+        rows = []
+        for user_id in range(1, USERS + 1):
+            for question_id in rng.sample(range(1, QUESTIONS + 1), ANSWERED):
+                # 半数は期限切れ、残りは期限前
+                offset = timedelta(hours=rng.randint(-720, 720))
+                rows.append({
+                    "user_id": user_id,
+                    "question_id": question_id,
+                    "selected_answer": "A",
+                    "is_correct": True,
+                    "attempts": 1,
+                    "completed_at": NOW - timedelta(days=1),
+                    "streak": 1,
+                    "due_at": NOW + offset
+                })
+            if len(rows) >= CHUNK:
+                conn.execute(insert(DeepQuestionProgress), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(DeepQuestionProgress), rows)
+        conn.execute(text("ANALYZE"))
+    engine.dispose()
+
+    catalog_rows = [
+        {key: question[key] for key in ("id", "category", "level", "statement", "correct_answer")}
+        for question in questions
+    ]
+    return QuestionCatalog("bench", catalog_rows)
+
+
+async def measure(session_factory, catalog, user_ids):
+    """ユーザーごとに次の出題を選び、所要時間（ミリ秒）の一覧を返す"""
+    timings = []
+    async with session_factory() as db:
+        for user_id in user_ids:
+            started = time.perf_counter()
+            batch = await next_question_batch(db, catalog, user_id, BATCH_SIZE, now=NOW)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert len(batch) == BATCH_SIZE
+    return timings
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return statistics.median(timings), p99
+
+
+async def run():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    started = time.perf_counter()
+    catalog = seed(f"sqlite:///{path}")
+    print(f"データ作成: {USERS:,} 人 × {QUESTIONS:,} 問 / 進捗 {USERS * ANSWERED:,} 行 "
+          f"({time.perf_counter() - started:.1f} 秒)")
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user_ids = random.Random(7).sample(range(1, USERS + 1), min(SAMPLES, USERS))
+
+    await measure(session_factory, catalog, user_ids[:10])  # ウォームアップ
+    indexed = summarize(await measure(session_factory, catalog, user_ids))
+
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP INDEX ix_deep_question_progress_user_due"))
+        await conn.execute(text("DROP INDEX ix_deep_question_progress_user_question"))
+    scanned = summarize(await measure(session_factory, catalog, user_ids))
+    await engine.dispose()
+
+    print(f"{'':>12} {'中央値(ms)':>12} {'p99(ms)':>10}")
+    print(f"{'インデックス':>12} {indexed[0]:>12.3f} {indexed[1]:>10.3f}")
+    print(f"{'全件走査':>12} {scanned[0]:>12.3f} {scanned[1]:>10.3f}")
+    print(f"中央値の倍率: {scanned[0] / indexed[0]:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
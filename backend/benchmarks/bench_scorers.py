@@ -0,0 +1,144 @@
+"""
+性格診断・Marriage MBTI+ の採点・分析関数のベンチマーク（pytest-benchmark）
+
+ランダムな回答に対して各関数を 1 / 1,000 / 100,000 回呼び出す時間を計測する。
+回答は一様な乱数ではなく、回答者ごとの傾向（性格軸の強さ・MBTI の各指標の好み・
+結婚観の平均的な答え方）のまわりにばらつかせて作る。1回の呼び出しで確保される
+メモリ（tracemalloc のピーク）は各ベンチマークの extra_info["alloc_bytes"] に記録する。
+
+通常のテスト（tests/）とは別に、ファイルを指定して実行する。
+
+    python -m pytest benchmarks/bench_scorers.py
+    python -m pytest benchmarks/bench_scorers.py -k personality --benchmark-columns=min,mean,ops
+
+回帰の検出は pytest-benchmark の保存・比較で行う（make bench-baseline / make bench）。
+平均時間は --benchmark-compare-fail で、確保メモリは benchmarks/compare_alloc.py で
+ベースラインと比較する。ベースラインは計測したマシン・Python ごとに .benchmarks/ に
+保存されるため、リポジトリには含めず、比較するマシン（CI のランナーなど）で作成する。
+
+    python -m pytest benchmarks/bench_scorers.py --benchmark-save=baseline
+    python -m pytest benchmarks/bench_scorers.py --benchmark-compare --benchmark-compare-fail=mean:20% \
+        --benchmark-json=.benchmarks/latest.json
+    python -m benchmarks.compare_alloc .benchmarks/latest.json --threshold 20%
+"""
+import os
+import sys
+import random
+import statistics
+import tracemalloc
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schemas.marriage_mbti import MBTIAnswer, MarriageAnswer
+from services.personality_logic import (
+    PERSONALITY_QUESTIONS,
+    PersonalityDimension,
+    calculate_personality_scores,
+    determine_personality_type
+)
+from services.marriage_mbti_logic import (
+    MBTI_QUESTION_MAPPINGS,
+    MARRIAGE_QUESTION_CATEGORIES,
+    analyze_marriage_mbti,
+    calculate_mbti,
+    calculate_marriage_scores,
+    generate_personalized_advice
+)
+
+SHEETS = 1000
+# 呼び出し回数ごとの計測回数（合計時間が長くなりすぎないように減らす）
+ROUNDS = {1: 2000, 1000: 20, 100000: 3}
+# 確保メモリを計測する呼び出し回数（中央値を記録する）
+ALLOC_SAMPLES = 200
+
+_rng = random.Random(42)
+
+# 質問ごとの スコア -> 選択肢インデックス
+_PERSONALITY_OPTION_BY_SCORE = {
+    q["id"]: {option["score"]: i for i, option in enumerate(q["options"])}
+    for q in PERSONALITY_QUESTIONS
+}
+
+
+def _clamp(value: float, low: int, high: int) -> int:
+    return min(high, max(low, round(value)))
+
+
+def personality_sheet(rng: random.Random) -> dict:
+    """性格診断の回答 {質問ID: 選択肢インデックス}（軸ごとの傾向 ± ばらつき、1-4点）"""
+    traits = {dimension: rng.gauss(0.0, 1.0) for dimension in PersonalityDimension}
+    return {
+        q["id"]: _PERSONALITY_OPTION_BY_SCORE[q["id"]][
+            _clamp(2.5 + 0.9 * traits[q["dimension"]] + rng.gauss(0.0, 0.7), 1, 4)
+        ]
+        for q in PERSONALITY_QUESTIONS
+    }
+
+
+def mbti_sheet(rng: random.Random) -> list:
+    """MBTI の回答（指標ごとに A を選ぶ確率を Beta(2, 2) で決める）"""
+    preferences = {m["dimension"]: rng.betavariate(2.0, 2.0) for m in MBTI_QUESTION_MAPPINGS}
+    return [
+        MBTIAnswer(questionId=i, answer="A" if rng.random() < preferences[m["dimension"]] else "B")
+        for i, m in enumerate(MBTI_QUESTION_MAPPINGS)
+    ]
+
+
+def marriage_sheet(rng: random.Random) -> list:
+    """結婚観の回答（回答者ごとの平均 ± ばらつき、1-5段階でやや肯定側に寄る）"""
+    center = rng.gauss(3.4, 0.6)
+    return [
+        MarriageAnswer(questionId=i, answer=_clamp(center + rng.gauss(0.0, 0.8), 1, 5))
+        for i in range(len(MARRIAGE_QUESTION_CATEGORIES))
+    ]
+
+
+PERSONALITY_SHEETS = [personality_sheet(_rng) for _ in range(SHEETS)]
+PERSONALITY_SCORES = [calculate_personality_scores(sheet) for sheet in PERSONALITY_SHEETS]
+MBTI_SHEETS = [mbti_sheet(_rng) for _ in range(SHEETS)]
+MARRIAGE_SHEETS = [marriage_sheet(_rng) for _ in range(SHEETS)]
+
+# 名前 -> (関数, 呼び出しごとの引数)
+SCORERS = {
+    "personality_scores": (calculate_personality_scores, [(sheet,) for sheet in PERSONALITY_SHEETS]),
+    "personality_type": (determine_personality_type, [(scores,) for scores in PERSONALITY_SCORES]),
+    "mbti": (calculate_mbti, [(sheet,) for sheet in MBTI_SHEETS]),
+    "marriage_scores": (calculate_marriage_scores, [(sheet,) for sheet in MARRIAGE_SHEETS]),
+    "personalized_advice": (generate_personalized_advice, [(sheet,) for sheet in MARRIAGE_SHEETS]),
+    "marriage_mbti_analysis": (analyze_marriage_mbti, list(zip(MBTI_SHEETS, MARRIAGE_SHEETS))),
+}
+
+
+def run_calls(scorer, calls: list, count: int) -> None:
+    for i in range(count):
+        scorer(*calls[i % SHEETS])
+
+
+def alloc_bytes(scorer, calls: list) -> int:
+    """1回の呼び出しで確保されるメモリのピーク（バイト、ALLOC_SAMPLES 回の中央値）"""
+    for args in calls[:ALLOC_SAMPLES]:
+        scorer(*args)  # 初回だけの確保（遅延初期化など）を除く
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for args in calls[:ALLOC_SAMPLES]:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            scorer(*args)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return int(statistics.median(peaks))
+
+
+@pytest.mark.parametrize("count", list(ROUNDS), ids=lambda count: f"{count}calls")
+@pytest.mark.parametrize("name", list(SCORERS))
+def test_scorer(benchmark, name, count):
+    scorer, calls = SCORERS[name]
+    benchmark.group = name
+    benchmark.extra_info["calls"] = count
+    benchmark.extra_info["alloc_bytes"] = alloc_bytes(scorer, calls)
+    benchmark.pedantic(run_calls, args=(scorer, calls, count), rounds=ROUNDS[count], iterations=1)
@@ -0,0 +1,83 @@
+"""
+採点ベンチマークの確保メモリを、保存したベースラインと比較する
+
+pytest-benchmark の --benchmark-compare-fail は時間（統計値）しか比較しないため、
+bench_scorers.py が extra_info["alloc_bytes"] に記録した1回あたりの確保メモリは
+このスクリプトで比較する。ベースラインは --benchmark-save=baseline で保存した
+最新の .benchmarks/*/*_baseline.json を使う（make bench-baseline）。
+
+    python -m pytest benchmarks/bench_scorers.py --benchmark-json=.benchmarks/latest.json
+    python -m benchmarks.compare_alloc .benchmarks/latest.json --threshold 20%
+"""
+import os
+import sys
+import json
+import glob
+import argparse
+from typing import Dict, List, Optional
+
+# 閾値とは別に許容する差（数十バイトの揺れで失敗させない）
+ALLOC_SLACK_BYTES = 256
+
+
+def load_alloc_bytes(path: str) -> Dict[str, int]:
+    """pytest-benchmark の JSON からベンチマークごとの確保メモリを読み込む"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        bench["fullname"]: bench["extra_info"]["alloc_bytes"]
+        for bench in data["benchmarks"]
+        if "alloc_bytes" in bench.get("extra_info", {})
+    }
+
+
+def find_baseline(storage: str) -> Optional[str]:
+    """保存済みのベースラインのうち最新のもの（無ければ None）"""
+    paths = glob.glob(os.path.join(storage, "*", "*_baseline.json"))
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def compare(results: Dict[str, int], baseline: Dict[str, int], threshold: float) -> List[str]:
+    """
+    ベースラインより threshold（割合）を超えて確保メモリが増えたベンチマークを返す
+
+    ベースラインに無いベンチマークは比較しない。
+    """
+    regressions = []
+    for name, alloc in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = base * (1 + threshold) + ALLOC_SLACK_BYTES
+        if alloc > limit:
+            regressions.append(f"{name}: {alloc:,} B > {limit:,.0f} B（ベースライン {base:,} B）")
+    return regressions
+
+
+def parse_threshold(value: str) -> float:
+    """"20%" または "0.2" を割合にする"""
+    return float(value[:-1]) / 100 if value.endswith("%") else float(value)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("results", help="--benchmark-json で書き出した今回の結果")
+    parser.add_argument("--threshold", type=parse_threshold, default=0.2, help="許容する増加率（既定 20%%）")
+    parser.add_argument("--storage", default=".benchmarks", help="--benchmark-save の保存先")
+    args = parser.parse_args()
+
+    baseline_path = find_baseline(args.storage)
+    if baseline_path is None:
+        sys.exit(f"ベースラインがありません。先に make bench-baseline を実行してください（{args.storage}）")
+
+    regressions = compare(load_alloc_bytes(args.results), load_alloc_bytes(baseline_path), args.threshold)
+    if regressions:
+        print(f"確保メモリが増えたベンチマーク（ベースライン: {baseline_path}）:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"確保メモリはベースラインの範囲内です（ベースライン: {baseline_path}）")
+
+
+if __name__ == "__main__":
+    main()
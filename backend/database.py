@@ -1,10 +1,17 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 import os
+import ssl
 import sys
+import time
 import tempfile
+import threading
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -44,16 +51,120 @@ else:
     # SSL証明書がない場合はSSLを無効化
     connect_args["ssl_disabled"] = True
 
+# コネクションプール設定（環境変数で調整可能）
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# サーバー側のアイドル切断より短い間隔で接続を作り直す（秒）
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# 貸し出し前に接続の生存確認を行う（切断済みの接続で最初のクエリが失敗するのを防ぐ）
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+class _PoolMetricsMixin:
+    """接続の取得回数・待ち時間・タイムアウトを計測する"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._metrics_lock:
+                self.checkouts += 1
+                self.total_wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def metrics(self) -> dict:
+        """現在のプール状態と累計の計測値"""
+        with self._metrics_lock:
+            checkouts = self.checkouts
+            return {
+                "pool_size": self.size(),
+                "checked_in": self.checkedin(),
+                "checked_out": self.checkedout(),
+                "overflow": max(self.overflow(), 0),
+                "max_overflow": self._max_overflow,
+                "checkouts": checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait_seconds / checkouts * 1000, 3) if checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+
+class InstrumentedQueuePool(_PoolMetricsMixin, QueuePool):
+    """計測付きの QueuePool（同期エンジン用）"""
+
+class InstrumentedAsyncAdaptedQueuePool(_PoolMetricsMixin, AsyncAdaptedQueuePool):
+    """計測付きの AsyncAdaptedQueuePool（非同期エンジン用）"""
+
 # エンジン作成とセッションの設定
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args=connect_args
+    connect_args=connect_args,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # モデル定義用のベースクラス
 Base = declarative_base()
 
+# 非同期エンジン（async def のルートハンドラー用）
+def _async_database_url(url: str) -> str:
+    """同期用の接続URLを非同期ドライバー（aiomysql / aiosqlite）用に変換"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "mysql":
+        return parsed.set(drivername="mysql+aiomysql").render_as_string(hide_password=False)
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_database_url(SQLALCHEMY_DATABASE_URL))
+
+# aiomysql は SSL 設定を SSLContext で受け取る
+async_connect_args = {"charset": "utf8mb4"}
+if ssl_cert_path:
+    async_connect_args["ssl"] = ssl.create_default_context(cafile=ssl_cert_path)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args=async_connect_args,
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+def get_pool_metrics() -> dict:
+    """同期・非同期エンジンのコネクションプールの計測値を取得"""
+    return {
+        "sync": engine.pool.metrics(),
+        "async": async_engine.pool.metrics(),
+    }
+
 # データベースセッションの依存関係
 def get_db():
     db = SessionLocal()
@@ -61,3 +172,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# 非同期データベースセッションの依存関係
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
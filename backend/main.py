@@ -1,20 +1,39 @@
 from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 import shutil
 import os
 import logging
 from dotenv import load_dotenv
-from database import SessionLocal, engine, Base, get_db
+from database import engine, async_engine, AsyncSessionLocal, Base, get_async_db
 from models.user import User
 from models.conversation_partner import ConversationPartner
 from models import schemas
-from auth.password import get_password_hash, verify_password
-from auth.jwt import create_access_token, get_current_user
-from routers import conversation_partners, personality, marriage_mbti, counselor
+from auth.password import get_password_hash_async, verify_password_async
+from auth.jwt import create_access_token, get_current_user, invalidate_cached_user
+from routers import conversation_partners, personality, marriage_mbti, counselor, deep_questions, ops
 from fastapi.responses import JSONResponse
+from services.openai_client import openai_registry
+from services.llm_gateway import LLMGateway, get_llm_gateway, SPEECH_MEDIA_TYPES
+from services.question_catalog import catalog_store
+from services.marriage_similarity import similarity_store
+from services.score_distribution import distribution_store
+from services.tts_cache import (
+    AudioFileCache,
+    get_tts_cache,
+    get_audio_store,
+    iter_audio_file,
+    tts_cache_key,
+    tts_cache_url,
+    TTS_CACHE_MAX_AGE
+)
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 import random
+import asyncio
 from urllib.parse import urlparse
 
 # データベースのテーブルを作成
@@ -68,10 +87,42 @@ if ENV == "production":
     ]
     origins.extend(production_origins)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """起動時に共有クライアントの生成と質問カタログ・類似検索索引の読み込み・スコア分布の同期開始を行い、終了時に分布を同期してコネクションプールを閉じる"""
+    openai_registry.get()
+    try:
+        async with AsyncSessionLocal() as db:
+            await catalog_store.get(db)
+    except Exception as e:
+        # DBに接続できなくても起動は続け、初回リクエスト時に読み込む
+        logger.warning(f"深堀り質問カタログの事前読み込みに失敗しました: {type(e).__name__}: {str(e)}")
+    try:
+        async with AsyncSessionLocal() as db:
+            await similarity_store.get(db)
+    except Exception as e:
+        logger.warning(f"結婚観の類似検索索引の事前読み込みに失敗しました: {type(e).__name__}: {str(e)}")
+    # 診断スコアの分布は起動時に読み込み、以降は定期的に他のワーカーの分と合算する
+    distribution_sync = asyncio.create_task(distribution_store.run_periodic_sync(AsyncSessionLocal))
+    yield
+    distribution_sync.cancel()
+    try:
+        await distribution_sync
+    except asyncio.CancelledError:
+        pass
+    try:
+        async with AsyncSessionLocal() as db:
+            await distribution_store.sync(db)
+    except Exception as e:
+        logger.warning(f"スコア分布の最終同期に失敗しました: {type(e).__name__}: {str(e)}")
+    await openai_registry.aclose()
+    await async_engine.dispose()
+
 app = FastAPI(
     title="Miraim - 婚活男性向け総合サポートAPI",
     version="2.0.0",
-    description="Marriage MBTI+、会話練習、AIカウンセラー機能を統合した婚活支援API"
+    description="Marriage MBTI+、会話練習、AIカウンセラー機能を統合した婚活支援API",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -80,6 +131,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # 履歴のページング用カーソル
 )
 
 # ルーター追加（順序重要）
@@ -87,28 +139,25 @@ app.include_router(conversation_partners.router)
 app.include_router(personality.router, prefix="/api/personality", tags=["personality"])
 app.include_router(marriage_mbti.router, prefix="/api/marriage-mbti", tags=["marriage-mbti"])
 app.include_router(counselor.router)
+app.include_router(deep_questions.router)
+app.include_router(ops.router)
 
 # OpenAI接続テスト用エンドポイント（認証なし）
 @app.get("/test-openai")
-async def test_openai():
+async def test_openai(gateway: LLMGateway = Depends(get_llm_gateway)):
     """OpenAI API接続テスト（デバッグ用）"""
     try:
-        from openai import OpenAI
-        import os
-        
         api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        if not api_key or not gateway.available:
             return {"status": "error", "message": "OPENAI_API_KEY not set", "key_length": 0}
         
         # APIキーの最初と最後の数文字のみ表示（セキュリティ）
         masked_key = f"{api_key[:8]}...{api_key[-8:]}" if len(api_key) > 16 else "short_key"
         
-        client = OpenAI(api_key=api_key)
-        
         # シンプルなテストリクエスト
-        response = client.chat.completions.create(
+        response = await gateway.chat_completion(
+            [{"role": "user", "content": "Hello, please respond with 'OpenAI connection successful'"}],
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": "Hello, please respond with 'OpenAI connection successful'"}],
             max_tokens=50
         )
         
@@ -161,10 +210,11 @@ async def health():
 
 # ユーザー認証エンドポイント
 @app.post("/register")
-async def register(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """ユーザー登録エンドポイント"""
     # ユーザーが既に存在するかチェック
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User.id).where(User.email == user_data.email).limit(1))
+    existing_user = result.first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -172,7 +222,7 @@ async def register(user_data: schemas.UserCreate, db: Session = Depends(get_db))
         )
     
     # パスワードをハッシュ化してユーザーを作成
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     user = User(
         username=user_data.username,
         email=user_data.email,
@@ -185,25 +235,39 @@ async def register(user_data: schemas.UserCreate, db: Session = Depends(get_db))
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     
     return {"message": "ユーザー登録が完了しました"}
 
 @app.post("/login")
-async def login(user_data: schemas.UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
     """ユーザーログインエンドポイント"""
     # ユーザー名またはメールアドレスでログイン可能
-    user = db.query(User).filter(
-        (User.username == user_data.username) | (User.email == user_data.username)
-    ).first()
+    result = await db.execute(
+        select(User).where((User.username == user_data.username) | (User.email == user_data.username)).limit(1)
+    )
+    user = result.scalars().first()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="ユーザー名・メールアドレスまたはパスワードが間違っています",
+        )
     
-    if not user or not verify_password(user_data.password, user.password_hash):
+    # bcrypt の計算はスレッドプールで行う
+    verified, new_hash = await verify_password_async(user_data.password, user.password_hash)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="ユーザー名・メールアドレスまたはパスワードが間違っています",
         )
     
+    # コスト設定が変わっている場合はハッシュを更新
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+        invalidate_cached_user(user)
+    
     # トークンを生成
     access_token = create_access_token(data={"sub": user.email})
     
@@ -213,10 +277,22 @@ async def login(user_data: schemas.UserLogin, db: Session = Depends(get_db)):
         "user": {"email": user.email, "name": user.full_name}
     }
 
+@app.get("/me", response_model=schemas.UserResponse)
+async def read_users_me(current_user: User = Depends(get_current_user)):
+    """
+    現在ログイン中のユーザー情報を取得するエンドポイント
+    
+    - **認証**: Bearer トークン認証が必要
+    - **戻り値**: 現在認証されているユーザーの情報
+    - **エラー**: 認証エラー (401)
+    """
+    return current_user
+
 @app.post("/conversation-feedback")
 async def generate_conversation_feedback(
     data: dict,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    gateway: LLMGateway = Depends(get_llm_gateway)
 ):
     """
     会話履歴に基づいてフィードバックを生成するエンドポイント
@@ -250,34 +326,15 @@ async def generate_conversation_feedback(
     }
     
     try:
-        import openai
-        import os
         import json
-        from dotenv import load_dotenv
-        from openai import OpenAI
-        
-        # .envファイルから環境変数を読み込む（コンテナ内の環境変数が優先される）
-        load_dotenv()
-        
-        # OpenAI APIキーを設定
-        api_key = os.environ.get("OPENAI_API_KEY")
         
-        if not api_key:
+        # LLMゲートウェイの確認
+        if not gateway.available:
             logger.error("OpenAI APIキーが設定されていません")
             raise HTTPException(
                 status_code=500,
                 detail="サーバー設定エラー: OpenAI APIキーが設定されていません。サーバー管理者に連絡してください。"
             )
-            
-        # OpenAIクライアントを初期化
-        try:
-            client = OpenAI(api_key=api_key)
-        except Exception as e:
-            logger.error(f"OpenAIクライアント初期化エラー: {type(e).__name__}: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"OpenAIクライアント初期化エラー: {str(e)}"
-            )
         
         # 会話履歴からユーザーとパートナーの会話を抽出
         conversation_text = ""
@@ -352,9 +409,9 @@ async def generate_conversation_feedback(
             # API呼び出しを実行
             start_time = __import__('time').time()
             
-            response = client.chat.completions.create(
+            response = await gateway.chat_completion(
+                [{"role": "system", "content": feedback_prompt}],
                 model="gpt-4o",
-                messages=[{"role": "system", "content": feedback_prompt}],
                 temperature=0.7,
                 max_tokens=500,
                 timeout=timeout_seconds
@@ -404,7 +461,8 @@ async def generate_conversation_feedback(
 @app.post("/speech-to-text")
 async def speech_to_text(
     audio: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    gateway: LLMGateway = Depends(get_llm_gateway)
 ):
     """
     音声ファイルをテキストに変換するエンドポイント
@@ -420,10 +478,6 @@ async def speech_to_text(
         - 400: 不正なファイル形式
         - 500: 変換エラー
     """
-    import tempfile
-    import aiofiles
-    import httpx
-    
     # 対応音声形式のチェック
     allowed_extensions = ['wav', 'mp3', 'm4a', 'webm']
     file_extension = audio.filename.split('.')[-1].lower()
@@ -445,47 +499,31 @@ async def speech_to_text(
             detail="ファイルサイズが大きすぎます。最大25MBまでです。"
         )
     
-    # ファイルポインタをリセット
-    await audio.seek(0)
-    
     try:
-        # 一時ファイルに保存
-        with tempfile.NamedTemporaryFile(suffix=f".{file_extension}", delete=False) as tmp_file:
-            async with aiofiles.open(tmp_file.name, 'wb') as f:
-                content = await audio.read()
-                await f.write(content)
-            
-            tmp_file_path = tmp_file.name
-        
         # OpenAI Whisper APIを使用してテキストに変換
         try:
-            from openai import OpenAI
-            
-            api_key = os.environ.get("OPENAI_API_KEY")
-            if not api_key:
+            if not gateway.available:
                 logger.error("OpenAI APIキーが設定されていません")
                 raise HTTPException(
                     status_code=500,
                     detail="サーバー設定エラー: 音声認識APIキーが設定されていません。"
                 )
             
-            client = OpenAI(api_key=api_key)
-            
-            # 音声ファイルを開いてWhisper APIに送信
-            with open(tmp_file_path, "rb") as audio_file:
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="ja"  # 日本語に固定
-                )
+            # 読み込み済みの音声データをそのままWhisper APIに送信
+            text = await gateway.transcribe(
+                audio.filename,
+                contents,
+                model="whisper-1",
+                language="ja"  # 日本語に固定
+            )
             
             # 音声の長さを取得（簡易的に推定）
             duration = file_size / (16000 * 2)  # 16kHz, 16bit mono を仮定
             
-            logger.info(f"音声認識成功: {len(transcript.text)}文字")
+            logger.info(f"音声認識成功: {len(text)}文字")
             
             return {
-                "text": transcript.text,
+                "text": text,
                 "duration": round(duration, 2)
             }
             
@@ -504,20 +542,30 @@ async def speech_to_text(
             status_code=500,
             detail="音声認識処理中にエラーが発生しました。"
         )
-    finally:
-        # 一時ファイルのクリーンアップ
-        try:
-            if 'tmp_file_path' in locals():
-                os.unlink(tmp_file_path)
-        except Exception as e:
-            logger.warning(f"一時ファイル削除エラー: {str(e)}")
 
 @app.post("/api/text-to-speech")
-async def text_to_speech(request: Request):
-    """Text-to-Speech API エンドポイント"""
+async def text_to_speech(
+    request: Request,
+    gateway: LLMGateway = Depends(get_llm_gateway),
+    tts_cache: AudioFileCache = Depends(get_tts_cache)
+):
+    """
+    Text-to-Speech API エンドポイント
+    
+    生成された音声を上流から届いたチャンク単位でそのまま返す（チャンク転送）。
+    同じパラメータの音声はディスクキャッシュから返す。POST のレスポンスはブラウザや
+    プロキシにキャッシュされないため、`Content-Location` でキャッシュ済み音声の GET 用URL
+    （`/api/text-to-speech/audio/{キー}.{形式}`、ETag / 304 対応）を知らせる。
+    
+    - **入力データ**:
+        - text (str): 読み上げるテキスト
+        - voice (str): 音声の種類（デフォルト: alloy）
+        - model (str): TTSモデル（デフォルト: tts-1）
+        - speed (float): 再生速度（デフォルト: 1.0）
+        - response_format (str): 出力形式 mp3 / opus / aac / flac（デフォルト: mp3）
+    """
     try:
-        from openai import OpenAI
-        from fastapi.responses import Response
+        from fastapi.responses import StreamingResponse
         import json
         
         # リクエストボディを取得
@@ -528,34 +576,90 @@ async def text_to_speech(request: Request):
         voice = data.get('voice', 'alloy')
         model = data.get('model', 'tts-1')
         speed = data.get('speed', 1.0)
+        response_format = data.get('response_format', 'mp3')
         
         if not text:
             raise HTTPException(status_code=400, detail="テキストが提供されていません")
         
-        # OpenAI API キーの確認
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
+        if response_format not in SPEECH_MEDIA_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"サポートされていない出力形式です。対応形式: {', '.join(SPEECH_MEDIA_TYPES)}"
+            )
         
-        # OpenAI クライアントの初期化
-        client = OpenAI(api_key=api_key)
+        # パラメータから決まるコンテンツアドレス（GET 用URLのファイル名にもなる）
+        cache_key = tts_cache_key(text, voice, model, speed, response_format)
+        response_headers = {
+            "Content-Disposition": f"attachment; filename=speech.{response_format}",
+            "Content-Location": tts_cache_url(cache_key, response_format)
+        }
         
-        # TTS API を呼び出し
-        response = client.audio.speech.create(
-            model=model,
-            voice=voice,
-            input=text,
-            speed=speed
-        )
+        # キャッシュヒットの場合はファイルから返す（削除とぶつからないよう開いてから返す）
+        cached_file = tts_cache.open(cache_key, response_format)
+        if cached_file is not None:
+            return StreamingResponse(
+                iter_audio_file(cached_file),
+                media_type=SPEECH_MEDIA_TYPES[response_format],
+                headers={**response_headers, "Content-Length": str(os.fstat(cached_file.fileno()).st_size)}
+            )
         
-        # 音声データを返す
-        return Response(
-            content=response.content,
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": "attachment; filename=speech.mp3"
-            }
+        # LLMゲートウェイの確認
+        if not gateway.available:
+            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
+        
+        # TTS API をストリーミングで呼び出し、最初のチャンクまで待つ
+        # （上流のエラーはレスポンス開始前に500として返す）
+        audio_stream = gateway.stream_speech(
+            text,
+            voice=voice,
+            model=model,
+            speed=speed,
+            response_format=response_format
         )
+        try:
+            try:
+                first_chunk = await audio_stream.__anext__()
+            except StopAsyncIteration:
+                first_chunk = b""
+            
+            async def audio_chunks():
+                # クライアントへ送りながらキャッシュにも書き込む
+                # （ファイル書き込みはイベントループを止めないようスレッドで行う）
+                cache_writer = await run_in_threadpool(tts_cache.open_writer, cache_key, response_format)
+                completed = False
+                try:
+                    await run_in_threadpool(cache_writer.write, first_chunk)
+                    yield first_chunk
+                    async for chunk in audio_stream:
+                        await run_in_threadpool(cache_writer.write, chunk)
+                        yield chunk
+                    completed = True
+                finally:
+                    await audio_stream.aclose()
+                    # 最後まで受信できた音声だけをキャッシュに登録する
+                    if completed:
+                        await run_in_threadpool(cache_writer.commit)
+                    else:
+                        await run_in_threadpool(cache_writer.discard)
+            
+            body = audio_chunks()
+            
+            async def close_streams():
+                # クライアントが送信開始前・途中で切断した場合も、書き込み中のキャッシュと上流のストリームを閉じる
+                await body.aclose()
+                await audio_stream.aclose()
+            
+            # 音声データをチャンク単位で返す
+            return StreamingResponse(
+                body,
+                media_type=SPEECH_MEDIA_TYPES[response_format],
+                headers=response_headers,
+                background=BackgroundTask(close_streams)
+            )
+        except BaseException:
+            # レスポンスを返す前に失敗・キャンセルされた場合は上流のストリーム（同時実行枠）を解放する
+            await audio_stream.aclose()
+            raise
         
     except HTTPException:
         raise
@@ -566,6 +670,51 @@ async def text_to_speech(request: Request):
             detail=f"音声生成中にエラーが発生しました: {str(e)}"
         )
 
+def _serve_cached_audio(filename: str, request: Request, cache: AudioFileCache):
+    """
+    コンテンツアドレス（{SHA-256}.{形式}）の音声ファイルを GET で配信する
+
+    内容はキーで決まり変わらないため、ETag / If-None-Match（304）と長期キャッシュに対応する。
+    """
+    from fastapi.responses import Response, StreamingResponse
+    
+    key, _, ext = filename.partition(".")
+    if ext not in SPEECH_MEDIA_TYPES or len(key) != 64 or not all(c in "0123456789abcdef" for c in key):
+        raise HTTPException(status_code=404, detail="音声ファイルが見つかりません")
+    
+    headers = {
+        "ETag": f'"{key}"',
+        "Cache-Control": f"public, max-age={TTS_CACHE_MAX_AGE}, immutable"
+    }
+    if headers["ETag"] in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    # 削除とぶつからないよう、存在確認と同時にファイルを開いておく
+    file = cache.open(key, ext)
+    if file is None:
+        raise HTTPException(status_code=404, detail="音声ファイルが見つかりません")
+    
+    headers["Content-Length"] = str(os.fstat(file.fileno()).st_size)
+    return StreamingResponse(iter_audio_file(file), media_type=SPEECH_MEDIA_TYPES[ext], headers=headers)
+
+@app.get("/api/audio/{filename}")
+async def get_prerendered_audio(
+    filename: str,
+    request: Request,
+    audio_store: AudioFileCache = Depends(get_audio_store)
+):
+    """事前生成した音声ファイルを配信（コンテンツアドレスのため長期キャッシュ可能）"""
+    return _serve_cached_audio(filename, request, audio_store)
+
+@app.get("/api/text-to-speech/audio/{filename}")
+async def get_cached_speech(
+    filename: str,
+    request: Request,
+    tts_cache: AudioFileCache = Depends(get_tts_cache)
+):
+    """TTSキャッシュ済みの音声を配信（POST /api/text-to-speech の Content-Location）"""
+    return _serve_cached_audio(filename, request, tts_cache)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,35 @@
+"""結婚観診断結果に検索掲載の同意列追加
+
+Revision ID: a1c5e9d3f7b2
+Revises: f3b8d6a2c7e4
+Create Date: 2025-08-06 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c5e9d3f7b2'
+down_revision: Union[str, None] = 'f3b8d6a2c7e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # 既存の結果は同意を得ていないため、掲載しない（false）
+    columns = {column['name'] for column in inspector.get_columns('marriage_mbti_results')}
+    if 'discoverable' not in columns:
+        with op.batch_alter_table('marriage_mbti_results') as batch_op:
+            batch_op.add_column(sa.Column('discoverable', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('marriage_mbti_results') as batch_op:
+        batch_op.drop_column('discoverable')
@@ -0,0 +1,48 @@
+"""結婚観診断結果テーブル追加
+
+Revision ID: a6d2f8c4b1e3
+Revises: e8c3f5a1d672
+Create Date: 2025-07-22 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d2f8c4b1e3'
+down_revision: Union[str, None] = 'e8c3f5a1d672'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table('marriage_mbti_results'):
+        return
+
+    op.create_table(
+        'marriage_mbti_results',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('mbti_type', sa.String(length=4), nullable=False),
+        sa.Column('communication', sa.Float(), nullable=False),
+        sa.Column('lifestyle', sa.Float(), nullable=False),
+        sa.Column('values', sa.Float(), nullable=False),
+        sa.Column('future', sa.Float(), nullable=False),
+        sa.Column('intimacy', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_marriage_mbti_results_id'), 'marriage_mbti_results', ['id'], unique=False)
+    op.create_index('ix_marriage_mbti_results_user_id', 'marriage_mbti_results', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_marriage_mbti_results_user_id', table_name='marriage_mbti_results')
+    op.drop_index(op.f('ix_marriage_mbti_results_id'), table_name='marriage_mbti_results')
+    op.drop_table('marriage_mbti_results')
@@ -0,0 +1,81 @@
+"""会話セッションテーブルと複合インデックス追加
+
+Revision ID: b7e2c41f9a3d
+Revises: 63b3a915d2ff
+Create Date: 2025-07-01 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c41f9a3d'
+down_revision: Union[str, None] = '63b3a915d2ff'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # アプリ起動時の create_all で作成済みの場合があるため存在を確認する
+    if not inspector.has_table('conversation_sessions'):
+        op.create_table(
+            'conversation_sessions',
+            sa.Column('id', sa.String(length=100), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('type', sa.String(length=50), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('last_updated', sa.DateTime(), nullable=False),
+            sa.Column('exchange_count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(
+            'ix_conversation_sessions_user_last_updated',
+            'conversation_sessions',
+            ['user_id', 'last_updated', 'id']
+        )
+
+    conversation_indexes = {index['name'] for index in inspector.get_indexes('conversations')}
+    if 'ix_conversations_user_conversation_created' not in conversation_indexes:
+        op.create_index(
+            'ix_conversations_user_conversation_created',
+            'conversations',
+            ['user_id', 'conversation_id', 'created_at']
+        )
+
+    # 既存の会話からセッションを作成（タイトルは最初のレコードにのみ保存されている）
+    # 種類は最初のレコードの role を使い、created_at が NULL だけの会話は移行時刻にする
+    op.execute("""
+        INSERT INTO conversation_sessions (id, user_id, type, title, created_at, last_updated, exchange_count)
+        SELECT
+            c.conversation_id,
+            MIN(c.user_id),
+            (
+                SELECT f.role FROM conversations f
+                WHERE f.conversation_id = c.conversation_id
+                ORDER BY f.id
+                LIMIT 1
+            ),
+            MAX(c.conversation_title),
+            COALESCE(MIN(c.created_at), CURRENT_TIMESTAMP),
+            COALESCE(MAX(c.created_at), CURRENT_TIMESTAMP),
+            COUNT(*)
+        FROM conversations c
+        WHERE c.conversation_id IS NOT NULL
+          AND c.conversation_id NOT IN (SELECT s.id FROM conversation_sessions s)
+        GROUP BY c.conversation_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_conversations_user_conversation_created', table_name='conversations')
+    op.drop_index('ix_conversation_sessions_user_last_updated', table_name='conversation_sessions')
+    op.drop_table('conversation_sessions')
@@ -0,0 +1,61 @@
+"""性格診断結果とスコア分布テーブル追加
+
+Revision ID: c9e4a7b2d5f1
+Revises: a6d2f8c4b1e3
+Create Date: 2025-07-29 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e4a7b2d5f1'
+down_revision: Union[str, None] = 'a6d2f8c4b1e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('personality_results'):
+        op.create_table(
+            'personality_results',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('personality_type', sa.String(length=50), nullable=False),
+            sa.Column('extroversion', sa.Float(), nullable=False),
+            sa.Column('communication', sa.Float(), nullable=False),
+            sa.Column('emotional_stability', sa.Float(), nullable=False),
+            sa.Column('decision_making', sa.Float(), nullable=False),
+            sa.Column('empathy', sa.Float(), nullable=False),
+            sa.Column('commitment', sa.Float(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_personality_results_id'), 'personality_results', ['id'], unique=False)
+        op.create_index('ix_personality_results_user_id', 'personality_results', ['user_id', 'id'], unique=False)
+
+    # 分布は空から始まり、以降の診断ごとに各ワーカーが件数を足し込む
+    if not inspector.has_table('score_distributions'):
+        op.create_table(
+            'score_distributions',
+            sa.Column('metric', sa.String(length=64), nullable=False),
+            sa.Column('counts', sa.JSON(), nullable=False),
+            sa.Column('total', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('metric')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('score_distributions')
+    op.drop_index('ix_personality_results_user_id', table_name='personality_results')
+    op.drop_index(op.f('ix_personality_results_id'), table_name='personality_results')
+    op.drop_table('personality_results')
@@ -0,0 +1,48 @@
+"""深堀り質問のユーザー別集計テーブル追加
+
+Revision ID: d41a7c2e8b90
+Revises: b7e2c41f9a3d
+Create Date: 2025-07-08 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7c2e8b90'
+down_revision: Union[str, None] = 'b7e2c41f9a3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 既存ユーザーの集計行は初回アクセス時に記録から作成される
+    if sa.inspect(op.get_bind()).has_table('user_question_stats'):
+        return
+
+    op.create_table(
+        'user_question_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('attempted_questions', sa.Integer(), nullable=False),
+        sa.Column('correct_answers', sa.Integer(), nullable=False),
+        sa.Column('category_progress', sa.JSON(), nullable=False),
+        sa.Column('shadowing_sessions', sa.Integer(), nullable=False),
+        sa.Column('duration_total', sa.Integer(), nullable=False),
+        sa.Column('duration_count', sa.Integer(), nullable=False),
+        sa.Column('tone_score_total', sa.Integer(), nullable=False),
+        sa.Column('tone_score_count', sa.Integer(), nullable=False),
+        sa.Column('speed_score_total', sa.Integer(), nullable=False),
+        sa.Column('speed_score_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_question_stats')
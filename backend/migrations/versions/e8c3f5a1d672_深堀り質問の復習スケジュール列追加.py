@@ -0,0 +1,72 @@
+"""深堀り質問の復習スケジュール列追加
+
+Revision ID: e8c3f5a1d672
+Revises: d41a7c2e8b90
+Create Date: 2025-07-15 10:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c3f5a1d672'
+down_revision: Union[str, None] = 'd41a7c2e8b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    columns = {column['name'] for column in inspector.get_columns('deep_question_progress')}
+    with op.batch_alter_table('deep_question_progress') as batch_op:
+        if 'streak' not in columns:
+            batch_op.add_column(sa.Column('streak', sa.Integer(), nullable=False, server_default='0'))
+        if 'due_at' not in columns:
+            batch_op.add_column(sa.Column('due_at', sa.DateTime(), nullable=True))
+
+    indexes = {index['name'] for index in inspector.get_indexes('deep_question_progress')}
+    if 'ix_deep_question_progress_user_due' not in indexes:
+        op.create_index('ix_deep_question_progress_user_due', 'deep_question_progress', ['user_id', 'due_at'])
+
+    # 既存の進捗: 正解済みは最後の回答の1日後、不正解は最後の回答時点から復習対象にする
+    bind = op.get_bind()
+    progress = sa.table(
+        'deep_question_progress',
+        sa.column('id', sa.Integer()),
+        sa.column('is_correct', sa.Boolean()),
+        sa.column('completed_at', sa.DateTime()),
+        sa.column('streak', sa.Integer()),
+        sa.column('due_at', sa.DateTime())
+    )
+    rows = bind.execute(
+        sa.select(progress.c.id, progress.c.is_correct, progress.c.completed_at).where(progress.c.due_at.is_(None))
+    ).all()
+    updates = [
+        {
+            'progress_id': row.id,
+            'streak': 1 if row.is_correct else 0,
+            'due_at': (row.completed_at or datetime.utcnow()) + (timedelta(days=1) if row.is_correct else timedelta())
+        }
+        for row in rows
+    ]
+    if updates:
+        bind.execute(
+            progress.update()
+            .where(progress.c.id == sa.bindparam('progress_id'))
+            .values(streak=sa.bindparam('streak'), due_at=sa.bindparam('due_at')),
+            updates
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_deep_question_progress_user_due', table_name='deep_question_progress')
+    with op.batch_alter_table('deep_question_progress') as batch_op:
+        batch_op.drop_column('due_at')
+        batch_op.drop_column('streak')
@@ -0,0 +1,36 @@
+"""深堀り質問の回答済み確認用インデックス追加
+
+Revision ID: f3b8d6a2c7e4
+Revises: c9e4a7b2d5f1
+Create Date: 2025-08-05 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d6a2c7e4'
+down_revision: Union[str, None] = 'c9e4a7b2d5f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    indexes = {index['name'] for index in inspector.get_indexes('deep_question_progress')}
+    if 'ix_deep_question_progress_user_question' not in indexes:
+        op.create_index(
+            'ix_deep_question_progress_user_question',
+            'deep_question_progress',
+            ['user_id', 'question_id']
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_deep_question_progress_user_question', table_name='deep_question_progress')
@@ -1,5 +1,9 @@
 from models.user import User
+from models.conversation import Conversation, ConversationSession
 from models.conversation_partner import ConversationPartner
-from models.deep_question import DeepQuestion, DeepQuestionProgress, ShadowingSession
+from models.deep_question import DeepQuestion, DeepQuestionProgress, ShadowingSession, UserQuestionStats
+from models.marriage_mbti import MarriageMBTIRecord
+from models.personality import PersonalityResult
+from models.score_distribution import ScoreDistribution
 
 # models init file 
\ No newline at end of file
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        # ユーザー・会話IDで絞り込み、日時順に読む問い合わせ用
+        Index("ix_conversations_user_conversation_created", "user_id", "conversation_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -16,4 +20,20 @@ class Conversation(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # リレーション
-    user = relationship("User", back_populates="conversations")
\ No newline at end of file
+    user = relationship("User", back_populates="conversations")
+
+class ConversationSession(Base):
+    """会話セッション（履歴一覧用に1セッション1行で集計値を保持）"""
+    __tablename__ = "conversation_sessions"
+    __table_args__ = (
+        # 履歴一覧（最終更新日時の新しい順）のキーセットページング用
+        Index("ix_conversation_sessions_user_last_updated", "user_id", "last_updated", "id"),
+    )
+    
+    id = Column(String(100), primary_key=True)  # conversations.conversation_id と同じ値
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    type = Column(String(50), nullable=False)  # 'counselor', 'profile', 'practice' など
+    title = Column(String(200), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    last_updated = Column(DateTime, nullable=False)
+    exchange_count = Column(Integer, nullable=False, default=0)
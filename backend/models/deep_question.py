@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -23,6 +23,12 @@ class DeepQuestion(Base):
 
 class DeepQuestionProgress(Base):
     __tablename__ = "deep_question_progress"
+    __table_args__ = (
+        # 復習期限の近い順に次の出題を選ぶ問い合わせ用
+        Index("ix_deep_question_progress_user_due", "user_id", "due_at"),
+        # 回答済みの確認（再挑戦の検索・未回答問題の NOT EXISTS）用
+        Index("ix_deep_question_progress_user_question", "user_id", "question_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -30,7 +36,9 @@ class DeepQuestionProgress(Base):
     selected_answer = Column(String(1), nullable=False)  # ユーザーが選択した答え
     is_correct = Column(Boolean, nullable=False)
     attempts = Column(Integer, default=1)  # 挑戦回数
-    completed_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, default=datetime.utcnow)  # 最後に回答した日時
+    streak = Column(Integer, nullable=False, default=0)  # 連続正解回数（不正解で0に戻る）
+    due_at = Column(DateTime, nullable=True)  # 次に復習する日時
     
     # リレーション
     user = relationship("User", back_populates="deep_question_progress")
@@ -51,4 +59,22 @@ class ShadowingSession(Base):
     
     # リレーション
     user = relationship("User")
-    question = relationship("DeepQuestion")
\ No newline at end of file
+    question = relationship("DeepQuestion")
+
+class UserQuestionStats(Base):
+    """ユーザーごとの深堀り質問の集計（回答・シャドウィング記録時に更新）"""
+    __tablename__ = "user_question_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    attempted_questions = Column(Integer, nullable=False, default=0)  # 挑戦済み問題数
+    correct_answers = Column(Integer, nullable=False, default=0)      # 正解数（最新の回答が正解の問題数）
+    category_progress = Column(JSON, nullable=False, default=dict)    # {"趣味について": {"attempted": 3, "correct": 2}}
+    shadowing_sessions = Column(Integer, nullable=False, default=0)
+    # 平均値の計算用（AVG と同様に NULL は件数に含めない）
+    duration_total = Column(Integer, nullable=False, default=0)
+    duration_count = Column(Integer, nullable=False, default=0)
+    tone_score_total = Column(Integer, nullable=False, default=0)
+    tone_score_count = Column(Integer, nullable=False, default=0)
+    speed_score_total = Column(Integer, nullable=False, default=0)
+    speed_score_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,24 @@
+from sqlalchemy import Boolean, Column, Integer, String, Float, DateTime, ForeignKey, Index, false
+from datetime import datetime
+from database import Base
+
+class MarriageMBTIRecord(Base):
+    """Marriage MBTI+ の診断結果（結婚観カテゴリ別スコアは類似ユーザー検索に使う）"""
+    __tablename__ = "marriage_mbti_results"
+    __table_args__ = (
+        # ユーザーの最新の診断結果を読む問い合わせ用
+        Index("ix_marriage_mbti_results_user_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    mbti_type = Column(String(4), nullable=False)
+    # 結婚観カテゴリ別スコア（1.0-5.0）
+    communication = Column(Float, nullable=False)
+    lifestyle = Column(Float, nullable=False)
+    values = Column(Float, nullable=False)
+    future = Column(Float, nullable=False)
+    intimacy = Column(Float, nullable=False)
+    # 類似ユーザー検索への掲載に同意したか（同意した最新の結果だけが検索対象になる）
+    discoverable = Column(Boolean, nullable=False, default=False, server_default=false())
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from datetime import datetime
+from database import Base
+
+class PersonalityResult(Base):
+    """性格診断の結果"""
+    __tablename__ = "personality_results"
+    __table_args__ = (
+        # ユーザーの最新の診断結果を読む問い合わせ用
+        Index("ix_personality_results_user_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    personality_type = Column(String(50), nullable=False)
+    # 性格軸別スコア（0-100、列名は PersonalityDimension の名前の小文字）
+    extroversion = Column(Float, nullable=False)
+    communication = Column(Float, nullable=False)
+    emotional_stability = Column(Float, nullable=False)
+    decision_making = Column(Float, nullable=False)
+    empathy = Column(Float, nullable=False)
+    commitment = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
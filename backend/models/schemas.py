@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
 
 class UserBase(BaseModel):
     username: str
@@ -30,4 +30,56 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
-    username: Optional[str] = None 
\ No newline at end of file
+    username: Optional[str] = None 
+
+class DeepQuestionResponse(BaseModel):
+    id: int
+    category: str
+    level: int
+    situation_text: str
+    partner_info: Dict[str, Any]
+    statement: str
+    options: List[Dict[str, Any]]
+    correct_answer: str
+    audio_url: Optional[str] = None
+    key_points: Optional[List[str]] = None
+
+    class Config:
+        from_attributes = True
+
+class DeepQuestionProgressCreate(BaseModel):
+    question_id: int
+    selected_answer: str
+
+class DeepQuestionProgressResponse(BaseModel):
+    id: int
+    question_id: int
+    selected_answer: str
+    is_correct: bool
+    attempts: int
+    completed_at: datetime
+    streak: int = 0
+    due_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ShadowingSessionCreate(BaseModel):
+    question_id: int
+    duration_seconds: Optional[int] = None
+    tone_score: Optional[int] = None
+    speed_score: Optional[int] = None
+
+class ShadowingSessionResponse(BaseModel):
+    id: int
+    question_id: int
+    model_audio_url: Optional[str] = None
+    user_audio_url: Optional[str] = None
+    duration_seconds: Optional[int] = None
+    tone_score: Optional[int] = None
+    speed_score: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+        protected_namespaces = ()
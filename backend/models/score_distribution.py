@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from datetime import datetime
+from database import Base
+
+class ScoreDistribution(Base):
+    """診断スコアの分布（全ワーカーの集計を合算したヒストグラム）"""
+    __tablename__ = "score_distributions"
+
+    metric = Column(String(64), primary_key=True)  # "personality.empathy", "marriage.values" など
+    counts = Column(JSON, nullable=False)  # 区間ごとの件数
+    total = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
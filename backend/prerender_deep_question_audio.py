@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Deep Questions audio pre-render script
+深堀り質問の発言（statement）音声を事前に一括生成し、audio_url に保存するスクリプト
+
+生成した音声は内容のハッシュをファイル名として音声ストアに保存し、
+`/api/audio/{ファイル名}` から配信する。同じ内容の音声は再生成しない。
+
+使い方:
+    python prerender_deep_question_audio.py --voice alloy --speed 0.9 --concurrency 4
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import update
+
+from database import SessionLocal
+from models.deep_question import DeepQuestion
+from services.openai_client import openai_registry
+from services.llm_gateway import llm_gateway, SPEECH_MEDIA_TYPES
+from services.tts_cache import get_audio_store, audio_store_url, tts_cache_key
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="深堀り質問の音声を事前生成する")
+    parser.add_argument("--voice", default="alloy", help="音声の種類（既定: alloy）")
+    parser.add_argument("--model", default="tts-1", help="TTSモデル（既定: tts-1）")
+    parser.add_argument("--speed", type=float, default=0.9, help="再生速度（既定: 0.9）")
+    parser.add_argument("--format", default="mp3", choices=sorted(SPEECH_MEDIA_TYPES), help="出力形式（既定: mp3）")
+    parser.add_argument("--concurrency", type=int, default=4, help="同時生成数（既定: 4）")
+    parser.add_argument("--force", action="store_true", help="生成済みの音声も作り直す")
+    return parser.parse_args()
+
+
+async def render_question(question_id, key, statement, args, store, semaphore):
+    """1件の音声を生成して音声ストアに保存する"""
+    async with semaphore:
+        audio = await llm_gateway.speech(
+            text=statement,
+            voice=args.voice,
+            model=args.model,
+            speed=args.speed,
+            response_format=args.format
+        )
+    store.put(key, args.format, audio)
+    print(f"🎙️  質問ID {question_id}: {len(audio)} バイト生成しました")
+
+
+async def prerender_deep_question_audio(args):
+    """有効な深堀り質問の音声を一括生成し、audio_url を更新"""
+    if not llm_gateway.available:
+        print("❌ OPENAI_API_KEY が設定されていません")
+        return
+
+    store = get_audio_store()
+    db = SessionLocal()
+
+    try:
+        questions = db.query(DeepQuestion.id, DeepQuestion.statement, DeepQuestion.audio_url).filter(
+            DeepQuestion.is_active == True
+        ).all()
+
+        updates = []
+        jobs = {}  # キー -> (質問ID, 発言) 同じ発言は1回だけ生成する
+        for question_id, statement, current_url in questions:
+            key = tts_cache_key(statement, args.voice, args.model, args.speed, args.format)
+            url = audio_store_url(key, args.format)
+
+            needs_render = args.force or store.get(key, args.format) is None
+            if needs_render:
+                jobs.setdefault(key, (question_id, statement))
+            if current_url != url:
+                updates.append((key, {"id": question_id, "audio_url": url}))
+
+        print(f"📋 対象 {len(questions)} 件 / 生成 {len(jobs)} 件 / URL更新 {len(updates)} 件")
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        results = await asyncio.gather(*[
+            render_question(question_id, key, statement, args, store, semaphore)
+            for key, (question_id, statement) in jobs.items()
+        ], return_exceptions=True)
+
+        failed_keys = set()
+        for key, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                failed_keys.add(key)
+                print(f"⚠️  質問ID {jobs[key][0]} の音声生成に失敗しました: {result}")
+
+        # 生成に失敗した音声の URL は書き込まない
+        updates = [row for key, row in updates if key not in failed_keys]
+
+        if updates:
+            db.execute(update(DeepQuestion), updates)
+            db.commit()
+
+        print(f"✅ {len(updates)} 件の audio_url を更新しました（失敗 {len(failed_keys)} 件）")
+
+    except Exception as e:
+        print(f"❌ エラーが発生しました: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        await openai_registry.aclose()
+
+
+if __name__ == "__main__":
+    print("🚀 深堀り質問の音声事前生成を開始...")
+    asyncio.run(prerender_deep_question_audio(parse_args()))
+    print("🎉 完了しました！")
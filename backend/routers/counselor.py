@@ -1,26 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
-from openai import OpenAI
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional, Tuple
+from datetime import datetime, timezone
 import os
+import json
+import base64
+import time
+import random
+import logging
 from pydantic import BaseModel
 
-from database import get_db
+from database import get_async_db, AsyncSessionLocal
 from auth.jwt import get_current_user
 from models.user import User
-from models.conversation import Conversation
+from models.conversation import Conversation, ConversationSession
+from services.llm_gateway import LLMGateway, get_llm_gateway
 
 router = APIRouter(prefix="/api/counselor", tags=["counselor"])
 
+logger = logging.getLogger(__name__)
+
+# 会話保存ログのサンプリング率（0.0〜1.0、エラーは常に出力）
+SAVE_LOG_SAMPLE_RATE = float(os.getenv("SAVE_LOG_SAMPLE_RATE", "0.1"))
+
 # 開発環境用の簡易認証機能
-async def get_dev_user(db: Session = Depends(get_db)):
+async def get_dev_user(db: AsyncSession = Depends(get_async_db)):
     """開発環境用：認証をバイパスしてテストユーザーを返す"""
     if os.getenv("ENV") == "development":
         # 開発環境用: 固定ユーザーを使用
         user_id = "dev_user_fixed"  # 固定ユーザーID
         
-        user = db.query(User).filter(User.username == user_id).first()
+        result = await db.execute(select(User).where(User.username == user_id).limit(1))
+        user = result.scalars().first()
         if not user:
             # 新しい開発ユーザーを作成
             from datetime import date, datetime
@@ -36,8 +50,8 @@ async def get_dev_user(db: Session = Depends(get_db)):
                 matchmaking_agency="開発用結婚相談所"
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
             print(f"Created new dev user: {user_id}")
         
         return user
@@ -232,44 +246,47 @@ PROFILE_IMPROVEMENT_PROMPT = """
 - 女性心理を考慮した表現の提案
 """
 
+# カウンセラーチャットの生成パラメータ
+COUNSELOR_CHAT_PARAMS = {
+    "model": "gpt-4o-mini",
+    "temperature": 0.8,
+    "max_tokens": 300,  # 文字数制限のため調整
+    "presence_penalty": 0.1,
+    "frequency_penalty": 0.1
+}
+
+# OpenAI APIエラー時のフォールバック応答
+COUNSELOR_FALLBACK_MESSAGE = "申し訳ございません。現在、システムに一時的な問題が発生しております。お悩みをお聞かせいただければ、私なりのアドバイスをさせていただきます。どのようなことでお困りでしょうか？"
+
+def build_counselor_messages(request: ChatRequest) -> List[dict]:
+    """カウンセラーチャット用のメッセージを構築"""
+    messages = [
+        {"role": "system", "content": COUNSELOR_SYSTEM_PROMPT}
+    ]
+    
+    # コンテキストがある場合は追加
+    if request.context:
+        messages.append({"role": "system", "content": f"会話のコンテキスト: {request.context}"})
+    
+    # ユーザーのメッセージを追加
+    messages.append({"role": "user", "content": request.message})
+    return messages
+
 @router.post("/chat", response_model=ChatResponse)
 async def counselor_chat(
     request: ChatRequest,
     current_user: User = Depends(get_dev_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    gateway: LLMGateway = Depends(get_llm_gateway)
 ):
     """AIカウンセラーとのチャット"""
     try:
-        # OpenAI クライアントの初期化
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        # LLMゲートウェイの確認
+        if not gateway.available:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
-        client = OpenAI(api_key=api_key)
-        
-        # メッセージの構築
-        messages = [
-            {"role": "system", "content": COUNSELOR_SYSTEM_PROMPT}
-        ]
-        
-        # コンテキストがある場合は追加
-        if request.context:
-            messages.append({"role": "system", "content": f"会話のコンテキスト: {request.context}"})
-        
-        # ユーザーのメッセージを追加
-        messages.append({"role": "user", "content": request.message})
-        
         # OpenAI APIを呼び出し
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            temperature=0.8,
-            max_tokens=300,  # 文字数制限のため調整
-            presence_penalty=0.1,
-            frequency_penalty=0.1
-        )
-        
-        ai_message = response.choices[0].message.content
+        ai_message = await gateway.chat(build_counselor_messages(request), **COUNSELOR_CHAT_PARAMS)
         
         # 会話履歴を保存（オプション）
         conversation = Conversation(
@@ -280,7 +297,7 @@ async def counselor_chat(
             created_at=datetime.utcnow()
         )
         db.add(conversation)
-        db.commit()
+        await db.commit()
         
         return ChatResponse(
             message=ai_message,
@@ -290,26 +307,99 @@ async def counselor_chat(
     except Exception as e:
         # OpenAI APIエラーの場合はフォールバック応答
         print(f"OpenAI API Error: {str(e)}")
-        fallback_message = "申し訳ございません。現在、システムに一時的な問題が発生しております。お悩みをお聞かせいただければ、私なりのアドバイスをさせていただきます。どのようなことでお困りでしょうか？"
         
         return ChatResponse(
-            message=fallback_message,
+            message=COUNSELOR_FALLBACK_MESSAGE,
             timestamp=datetime.utcnow()
         )
 
+def _sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Server-Sent Events 形式の1イベントを組み立てる"""
+    payload = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return f"event: {event}\n{payload}" if event else payload
+
+@router.post("/chat/stream")
+async def counselor_chat_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_dev_user),
+    gateway: LLMGateway = Depends(get_llm_gateway)
+):
+    """
+    AIカウンセラーとのチャット（SSEストリーミング版）
+    
+    生成されたトークンを `data: {"delta": ...}` として順次送信し、
+    生成完了後に会話履歴を保存し、最後に `event: done` で全文とタイムスタンプを送る。
+    
+    最初のトークンより前に失敗した場合はフォールバック応答を送って `event: done` で終える
+    （非ストリーミング版と同じく保存しない）。途中で失敗した場合は `event: error` で
+    それまでの部分的な応答を送り、完了した会話としては保存しない。
+    """
+    user_id = current_user.id
+    messages = build_counselor_messages(request)
+    
+    async def event_stream() -> AsyncIterator[str]:
+        chunks = []
+        try:
+            async for delta in gateway.stream_chat(messages, **COUNSELOR_CHAT_PARAMS):
+                chunks.append(delta)
+                yield _sse_event({"delta": delta})
+        except Exception as e:
+            print(f"OpenAI API Error (stream): {str(e)}")
+            if chunks:
+                yield _sse_event(
+                    {"message": "".join(chunks), "detail": "応答の生成が途中で中断されました"},
+                    event="error"
+                )
+            else:
+                yield _sse_event({"delta": COUNSELOR_FALLBACK_MESSAGE})
+                yield _sse_event(
+                    {"message": COUNSELOR_FALLBACK_MESSAGE, "timestamp": datetime.utcnow().isoformat()},
+                    event="done"
+                )
+            return
+        
+        ai_message = "".join(chunks)
+        
+        # 生成完了後に会話履歴を保存（リクエストのセッションとは独立）
+        async with AsyncSessionLocal() as db:
+            try:
+                db.add(Conversation(
+                    user_id=user_id,
+                    role="counselor",
+                    user_message=request.message,
+                    ai_message=ai_message,
+                    created_at=datetime.utcnow()
+                ))
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                print(f"Stream conversation save error: {str(e)}")
+        
+        yield _sse_event(
+            {"message": ai_message, "timestamp": datetime.utcnow().isoformat()},
+            event="done"
+        )
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # プロキシでのバッファリングを無効化
+        }
+    )
+
 @router.post("/profile-generation", response_model=ProfileGenerationResponse)
 async def generate_profile(
-    request: ProfileGenerationRequest
+    request: ProfileGenerationRequest,
+    gateway: LLMGateway = Depends(get_llm_gateway)
 ):
     """自己紹介文の生成"""
     try:
-        # OpenAI クライアントの初期化
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        # LLMゲートウェイの確認
+        if not gateway.available:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
-        client = OpenAI(api_key=api_key)
-        
         # 質問と回答を整形（より詳細な情報を含める）
         qa_text = ""
         question_labels = {
@@ -329,23 +419,21 @@ async def generate_profile(
         prompt = PROFILE_GENERATION_PROMPT + qa_text
         
         # OpenAI APIを呼び出し
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        ai_response = await gateway.chat(
+            [
                 {
                     "role": "system", 
                     "content": "あなたは成婚率85%以上を誇る結婚相談所の敏腕仲人です。男性の魅力を最大限に引き出し、女性が「この人と会ってみたい」と思える自己紹介文のスペシャリストです。"
                 },
                 {"role": "user", "content": prompt}
             ],
+            model="gpt-4o-mini",
             temperature=0.8,  # 創造性と一貫性のバランスを調整
             max_tokens=1500,  # より詳細なプロフィールを生成
             presence_penalty=0.3,
             frequency_penalty=0.2
         )
         
-        ai_response = response.choices[0].message.content
-        
         # レスポンスを3つのプロフィールに分割
         profiles = []
         sections = ai_response.split("\n\n")
@@ -406,17 +494,15 @@ async def generate_profile(
 
 @router.post("/profile-improvement", response_model=ProfileImprovementResponse)
 async def improve_profile(
-    request: ProfileImprovementRequest
+    request: ProfileImprovementRequest,
+    gateway: LLMGateway = Depends(get_llm_gateway)
 ):
     """自己紹介文の改善提案を生成"""
     try:
-        # OpenAI APIキーの確認
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        # LLMゲートウェイの確認
+        if not gateway.available:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
-        openai.api_key = api_key
-        
         # プロンプトを構築
         prompt = PROFILE_IMPROVEMENT_PROMPT.format(
             profile_content=request.profile_content,
@@ -424,22 +510,19 @@ async def improve_profile(
         )
         
         # OpenAI APIを呼び出し
-        client = openai.OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
+        ai_response = await gateway.chat(
+            [
                 {
                     "role": "system", 
                     "content": "あなたは婚活のプロフェッショナルです。具体的で実践的なアドバイスを提供してください。"
                 },
                 {"role": "user", "content": prompt}
             ],
+            model="gpt-4o",
             temperature=0.7,
             max_tokens=1500
         )
         
-        ai_response = response.choices[0].message.content
-        
         # レスポンスを構造化
         improvements = {
             "analysis": ai_response,
@@ -496,15 +579,17 @@ async def improve_profile(
         }
         return ProfileImprovementResponse(improvements=default_improvements)
 
-async def generate_conversation_title(messages: List[dict]) -> str:
+def fallback_conversation_title(messages: List[dict]) -> str:
+    """最初のユーザーメッセージから仮のタイトルを作成"""
+    first_user_msg = next((msg["content"] for msg in messages if msg["role"] == "user"), "")
+    return first_user_msg[:20] + "..." if len(first_user_msg) > 20 else first_user_msg or "相談セッション"
+
+async def generate_conversation_title(messages: List[dict], gateway: LLMGateway) -> str:
     """会話内容からタイトルを生成"""
     try:
-        # OpenAI APIキーの確認
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            # フォールバック: 最初のユーザーメッセージから作成
-            first_user_msg = next((msg["content"] for msg in messages if msg["role"] == "user"), "")
-            return first_user_msg[:20] + "..." if len(first_user_msg) > 20 else first_user_msg or "相談セッション"
+        # LLMゲートウェイの確認
+        if not gateway.available:
+            return fallback_conversation_title(messages)
         
         # 会話の要約を作成するためのプロンプト
         conversation_text = ""
@@ -535,18 +620,17 @@ async def generate_conversation_title(messages: List[dict]) -> str:
 
 タイトル:"""
 
-        client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        title = await gateway.chat(
+            [
                 {"role": "system", "content": "あなたは会話内容から適切なタイトルを生成するAIです。"},
                 {"role": "user", "content": title_prompt}
             ],
+            model="gpt-4o-mini",
             temperature=0.3,
             max_tokens=50
         )
         
-        title = response.choices[0].message.content.strip()
+        title = title.strip()
         # 「タイトル:」プレフィックスがある場合は除去
         title = title.replace("タイトル:", "").strip()
         
@@ -555,97 +639,178 @@ async def generate_conversation_title(messages: List[dict]) -> str:
     except Exception as e:
         print(f"Title generation error: {e}")
         # エラー時のフォールバック
-        first_user_msg = next((msg["content"] for msg in messages if msg["role"] == "user"), "")
-        return first_user_msg[:20] + "..." if len(first_user_msg) > 20 else first_user_msg or "相談セッション"
+        return fallback_conversation_title(messages)
+
+async def update_conversation_title(conversation_id: str, user_id: int, messages: List[dict], gateway: LLMGateway):
+    """
+    バックグラウンドでタイトルを生成し、保存済みの会話に反映する
+    
+    保存時は仮のタイトルでコミットしておき、生成できたら会話セッションと
+    最初のレコードの conversation_title を更新する（履歴一覧は次回取得時に反映される）。
+    """
+    title = await generate_conversation_title(messages, gateway)
+    
+    async with AsyncSessionLocal() as db:
+        try:
+            await db.execute(
+                update(ConversationSession)
+                .where(ConversationSession.id == conversation_id, ConversationSession.user_id == user_id)
+                .values(title=title)
+            )
+            await db.execute(
+                update(Conversation)
+                .where(
+                    Conversation.user_id == user_id,
+                    Conversation.conversation_id == conversation_id,
+                    Conversation.conversation_title.isnot(None)
+                )
+                .values(conversation_title=title)
+            )
+            await db.commit()
+            print(f"生成されたタイトル: {title} ({conversation_id})")
+        except Exception as e:
+            await db.rollback()
+            print(f"Title update error: {str(e)}")
+
+def _parse_message_timestamp(timestamp) -> datetime:
+    """メッセージのタイムスタンプ（ISO形式の文字列または datetime）を UTC の naive datetime に変換"""
+    if not timestamp:
+        return datetime.utcnow()
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+def build_conversation_rows(
+    messages: List[dict],
+    user_id: int,
+    session_type: str,
+    conversation_id: str,
+    title: Optional[str]
+) -> List[dict]:
+    """
+    メッセージ列から保存用の行を作成
+    
+    ユーザーメッセージと直後のAIメッセージを1行にまとめる（先頭のAIの挨拶や
+    ペアにならないメッセージは読み飛ばす）。タイトルは最初の行にのみ設定する。
+    """
+    rows = []
+    i = 1 if messages and messages[0]["role"] == "ai" else 0
+    
+    while i < len(messages) - 1:
+        user_msg, ai_msg = messages[i], messages[i + 1]
+        if user_msg["role"] == "user" and ai_msg["role"] == "ai":
+            rows.append({
+                "user_id": user_id,
+                "role": session_type,  # session_typeを使用
+                "user_message": user_msg["content"],
+                "ai_message": ai_msg["content"],
+                "conversation_id": conversation_id,
+                "conversation_title": None if rows else title,
+                "created_at": _parse_message_timestamp(user_msg.get("timestamp"))
+            })
+            i += 2
+        else:
+            i += 1
+    
+    return rows
+
+async def record_conversation_session(db: AsyncSession, rows: List[dict]) -> ConversationSession:
+    """
+    保存した行を会話セッションに反映
+    
+    同じ会話IDのセッションが既にある場合（同一秒内の保存など）は、
+    やり取り回数と最終更新日時を加算する。同時に保存された別のリクエストが
+    先にセッションを作成した場合も、その行に加算する。
+    """
+    first = rows[0]
+    created_at = min(row["created_at"] for row in rows)
+    last_updated = max(row["created_at"] for row in rows)
+    
+    session = await db.get(ConversationSession, first["conversation_id"])
+    if session is None:
+        session = ConversationSession(
+            id=first["conversation_id"],
+            user_id=first["user_id"],
+            type=first["role"],
+            title=first["conversation_title"],
+            created_at=created_at,
+            last_updated=last_updated,
+            exchange_count=len(rows)
+        )
+        try:
+            async with db.begin_nested():
+                db.add(session)
+            return session
+        except IntegrityError:
+            # 同時リクエストが先に作成した場合はその行に加算する
+            session = await db.get(ConversationSession, first["conversation_id"], populate_existing=True)
+    
+    session.created_at = min(session.created_at, created_at)
+    session.last_updated = max(session.last_updated, last_updated)
+    session.exchange_count += len(rows)
+    return session
+
+def _log_save_event(event: str, **fields):
+    """保存処理の構造化ログ（SAVE_LOG_SAMPLE_RATE の割合でサンプリング）"""
+    if random.random() < SAVE_LOG_SAMPLE_RATE:
+        logger.info(json.dumps({"event": event, **fields}, ensure_ascii=False))
 
 @router.post("/save", response_model=ConversationSaveResponse)
 async def save_conversation(
     request: ConversationSaveRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_dev_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    gateway: LLMGateway = Depends(get_llm_gateway)
 ):
-    """会話の保存"""
+    """会話の保存（全ペアを1回のバルクINSERTで保存）"""
+    started = time.perf_counter()
     try:
         # 会話IDを生成
         conversation_id = f"conv_{current_user.id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
-        print(f"=== プロフィール保存処理開始 ===")
-        print(f"ユーザーID: {current_user.id}")
-        print(f"生成された会話ID: {conversation_id}")
-        print(f"セッションタイプ: {request.session_type}")
-        print(f"メッセージ数: {len(request.messages)}")
-        
-        # 会話内容からタイトルを自動生成
-        title = await generate_conversation_title(request.messages)
-        print(f"生成されたタイトル: {title}")
-        
-        # メッセージをペアで保存
-        conversation_saved = False
-        saved_count = 0
-        i = 0
-        
-        # 最初のAIメッセージをスキップ
-        if len(request.messages) > 0 and request.messages[0]["role"] == "ai":
-            i = 1
-        
-        # ユーザーメッセージから始まるペアを探す
-        while i < len(request.messages) - 1:
-            if request.messages[i]["role"] == "user" and request.messages[i + 1]["role"] == "ai":
-                user_msg = request.messages[i]
-                ai_msg = request.messages[i + 1]
-                
-                print(f"Processing pair at index {i}: user_content='{user_msg['content'][:50]}...', ai_content='{ai_msg['content'][:50]}...'")
-                
-                try:
-                    # タイムスタンプの処理
-                    timestamp = user_msg.get("timestamp")
-                    if timestamp:
-                        if isinstance(timestamp, str):
-                            # ISO形式の文字列をパース
-                            created_at = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                        else:
-                            # すでにdatetimeオブジェクトの場合
-                            created_at = timestamp
-                    else:
-                        created_at = datetime.utcnow()
-                    
-                    conversation = Conversation(
-                        user_id=current_user.id,
-                        role=request.session_type,  # session_typeを使用
-                        user_message=user_msg["content"],
-                        ai_message=ai_msg["content"],
-                        conversation_id=conversation_id,
-                        conversation_title=title if not conversation_saved else None,  # 最初のレコードのみタイトルを保存
-                        created_at=created_at
-                    )
-                    db.add(conversation)
-                    conversation_saved = True
-                    saved_count += 1
-                    print(f"Saved conversation pair {saved_count} with conversation_id: {conversation_id}")
-                    
-                except Exception as e:
-                    print(f"Error creating conversation: {e}")
-                    print(f"User message: {user_msg}")
-                    print(f"AI message: {ai_msg}")
-                    raise
-                
-                # 次のペアへ（2つずつ進める）
-                i += 2
-            else:
-                # ペアになっていない場合は1つずつ進める
-                i += 1
         
-        if saved_count == 0:
-            print("No conversation pairs were saved")
+        # 仮のタイトルで保存し、LLMによるタイトル生成はレスポンス後に行う
+        title = fallback_conversation_title(request.messages)
+        rows = build_conversation_rows(
+            request.messages,
+            user_id=current_user.id,
+            session_type=request.session_type,
+            conversation_id=conversation_id,
+            title=title
+        )
+        
+        if not rows:
+            _log_save_event(
+                "conversation_save_skipped",
+                user_id=current_user.id,
+                conversation_id=conversation_id,
+                messages=len(request.messages)
+            )
             return ConversationSaveResponse(
                 conversation_id=conversation_id,
                 saved=False
             )
         
-        db.commit()
-        print(f"=== 保存完了 ===")
-        print(f"保存されたペア数: {saved_count}")
-        print(f"会話ID: {conversation_id}")
-        print(f"データベースコミット: 成功")
+        await db.execute(insert(Conversation), rows)
+        await record_conversation_session(db, rows)
+        await db.commit()
+        
+        if gateway.available:
+            background_tasks.add_task(
+                update_conversation_title, conversation_id, current_user.id, request.messages, gateway
+            )
+        
+        _log_save_event(
+            "conversation_saved",
+            user_id=current_user.id,
+            conversation_id=conversation_id,
+            session_type=request.session_type,
+            messages=len(request.messages),
+            pairs=len(rows),
+            duration_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
         
         return ConversationSaveResponse(
             conversation_id=conversation_id,
@@ -653,8 +818,13 @@ async def save_conversation(
         )
         
     except Exception as e:
-        db.rollback()
-        print(f"Save conversation error: {str(e)}")
+        await db.rollback()
+        logger.error(json.dumps({
+            "event": "conversation_save_failed",
+            "user_id": current_user.id,
+            "messages": len(request.messages),
+            "error": f"{type(e).__name__}: {str(e)}"
+        }, ensure_ascii=False))
         raise HTTPException(status_code=500, detail=f"Failed to save conversation: {str(e)}")
 
 @router.get("/current-time")
@@ -670,74 +840,112 @@ async def get_current_time():
         "formatted_date": now.strftime("%Y/%m/%d(%a)")
     }
 
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+def encode_history_cursor(last_updated: datetime, conversation_id: str) -> str:
+    """履歴ページングのカーソル（最後の行の並び順キー）を作成"""
+    payload = json.dumps([last_updated.isoformat(), conversation_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, str]:
+    """カーソルを (最終更新日時, 会話ID) に戻す"""
+    try:
+        last_updated, conversation_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(last_updated), str(conversation_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/history")
 async def get_counselor_history(
+    response: Response,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_dev_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """カウンセリング履歴の取得（会話セッションごとにグループ化）"""
-    # conversation_idごとにグループ化して取得（全ての種類のセッションを含む）
-    conversations = db.query(Conversation).filter(
-        Conversation.user_id == current_user.id,
-        Conversation.conversation_id.isnot(None)
-    ).order_by(Conversation.created_at.desc()).all()
+    """
+    カウンセリング履歴の取得（会話セッションごとにグループ化）
     
-    # conversation_idでグループ化
-    grouped_conversations = {}
-    for conv in conversations:
-        conv_id = getattr(conv, 'conversation_id', None)
-        if conv_id:
-            if conv_id not in grouped_conversations:
-                grouped_conversations[conv_id] = []
-            grouped_conversations[conv_id].append(conv)
+    会話セッションテーブルを (user_id, last_updated, id) のインデックス順に読み、
+    最終更新日時の新しい順にキーセットページングで返す。続きがある場合は
+    X-Next-Cursor ヘッダーに次ページのカーソルを設定する（`?cursor=...` で続きを取得）。
+    """
+    query = select(ConversationSession).where(ConversationSession.user_id == current_user.id)
+    
+    if cursor:
+        cursor_updated, cursor_id = decode_history_cursor(cursor)
+        query = query.where(or_(
+            ConversationSession.last_updated < cursor_updated,
+            and_(ConversationSession.last_updated == cursor_updated, ConversationSession.id < cursor_id)
+        ))
+    
+    # 最新の更新日時でソートし、続きの有無を判定するため1件多く取得
+    result = await db.execute(
+        query.order_by(ConversationSession.last_updated.desc(), ConversationSession.id.desc()).limit(limit + 1)
+    )
+    sessions = result.scalars().all()
+    
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        response.headers["X-Next-Cursor"] = encode_history_cursor(sessions[-1].last_updated, sessions[-1].id)
+    
+    if not sessions:
+        return []
+    
+    # ページ内の各セッションの最初のレコード（サマリーの取得元）
+    first_ids = select(func.min(Conversation.id)).where(
+        Conversation.user_id == current_user.id,
+        Conversation.conversation_id.in_([session.id for session in sessions])
+    ).group_by(Conversation.conversation_id)
+    result = await db.execute(
+        select(Conversation.id, Conversation.conversation_id, Conversation.user_message, Conversation.ai_message)
+        .where(Conversation.id.in_(first_ids))
+    )
+    first_rows = {row.conversation_id: row for row in result}
     
-    # 会話セッションごとの履歴を作成
     session_history = []
-    for conv_id, conv_list in grouped_conversations.items():
-        # 最初のメッセージを取得
-        first_conv = min(conv_list, key=lambda x: x.created_at)
+    for session in sessions:
+        first_row = first_rows.get(session.id)
         
         # タイトル取得（保存されたタイトルまたはフォールバック）
-        title = getattr(first_conv, 'conversation_title', None)
-        if not title:
+        title = session.title
+        if not title and first_row:
             # フォールバック: 最初のユーザーメッセージから作成
-            user_message = first_conv.user_message
+            user_message = first_row.user_message
             title = user_message[:30] + "..." if len(user_message) > 30 else user_message
         
         # サマリー生成（最初のAIレスポンスの冒頭を使用）
-        ai_message = first_conv.ai_message
+        ai_message = first_row.ai_message if first_row else ""
         summary = ai_message[:60] + "..." if len(ai_message) > 60 else ai_message
         
-        # やり取り回数を計算
-        exchange_count = len(conv_list)
-        
         session_history.append({
-            "id": first_conv.id,
-            "conversation_id": conv_id,
+            "id": first_row.id if first_row else None,
+            "conversation_id": session.id,
             "title": title,
             "summary": summary,
-            "exchange_count": exchange_count,
-            "session_type": first_conv.role if first_conv.role in ['profile', 'counselor', 'practice'] else "counselor",  # roleフィールドから取得
-            "created_at": first_conv.created_at,
-            "last_updated": max(conv_list, key=lambda x: x.created_at).created_at
+            "exchange_count": session.exchange_count,
+            "session_type": session.type if session.type in ['profile', 'counselor', 'practice'] else "counselor",
+            "created_at": session.created_at,
+            "last_updated": session.last_updated
         })
     
-    # 最新の更新日時でソート
-    session_history.sort(key=lambda x: x["last_updated"], reverse=True)
-    
-    return session_history[:20]  # 最新20セッションを返す
+    return session_history
 
 @router.get("/history/{conversation_id}", response_model=ConversationHistoryResponse)
 async def get_conversation_by_id(
     conversation_id: str,
     current_user: User = Depends(get_dev_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """特定の会話履歴の取得"""
-    conversations = db.query(Conversation).filter(
-        Conversation.user_id == current_user.id,
-        Conversation.conversation_id == conversation_id
-    ).order_by(Conversation.created_at.asc()).all()
+    result = await db.execute(
+        select(Conversation).where(
+            Conversation.user_id == current_user.id,
+            Conversation.conversation_id == conversation_id
+        ).order_by(Conversation.created_at.asc())
+    )
+    conversations = result.scalars().all()
     
     if not conversations:
         raise HTTPException(status_code=404, detail="Conversation not found")
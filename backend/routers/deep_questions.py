@@ -1,118 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from database import get_db
-from models.deep_question import DeepQuestion, DeepQuestionProgress, ShadowingSession
+from database import get_async_db
+from models.deep_question import DeepQuestionProgress, ShadowingSession, UserQuestionStats
 from models.user import User
 from models import schemas
 from auth.jwt import get_current_user
+from services.question_stats import build_stats_response, load_user_stats, record_answer, record_shadowing
+from services.http_cache import etag_response
+from services.question_catalog import QuestionCatalog, get_question_catalog
+from services.question_scheduler import next_question_batch, schedule_review
 
 router = APIRouter(prefix="/api/deep-questions", tags=["deep-questions"])
 
+def _catalog_response(request: Request, catalog: QuestionCatalog, body: bytes) -> Response:
+    """シリアライズ済みのカタログを ETag 付きで返す（一致すれば 304）"""
+    return etag_response(request, catalog.etag, body)
+
+def _get_active_question(catalog: QuestionCatalog, question_id: int) -> dict:
+    """有効な質問を1件取得（無ければ 404）"""
+    question = catalog.by_id.get(question_id)
+    if not question:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Question not found"
+        )
+    return question
+
 @router.get("/", response_model=List[schemas.DeepQuestionResponse])
 async def get_deep_questions(
+    request: Request,
     category: Optional[str] = None,
     level: Optional[int] = None,
     limit: Optional[int] = None,
-    db: Session = Depends(get_db)
+    catalog: QuestionCatalog = Depends(get_question_catalog)
 ):
-    """深堀り質問の一覧を取得"""
-    query = db.query(DeepQuestion).filter(DeepQuestion.is_active == True)
-    
-    if category and category != 'all':
-        query = query.filter(DeepQuestion.category == category)
-    
-    if level:
-        query = query.filter(DeepQuestion.level == level)
-    
-    if limit:
-        query = query.limit(limit)
-    
-    questions = query.all()
-    return questions
+    """深堀り質問の一覧を取得（メモリ上のカタログから返す）"""
+    return _catalog_response(request, catalog, catalog.list_json(category, level, limit))
 
 @router.get("/categories")
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(request: Request, catalog: QuestionCatalog = Depends(get_question_catalog)):
     """利用可能なカテゴリー一覧を取得"""
-    categories = db.query(DeepQuestion.category).filter(DeepQuestion.is_active == True).distinct().all()
-    category_list = [{"value": cat[0], "label": cat[0]} for cat in categories]
-    return [{"value": "all", "label": "すべて"}] + category_list
+    return _catalog_response(request, catalog, catalog.categories_json)
+
+@router.get("/next", response_model=List[schemas.DeepQuestionResponse])
+async def get_next_questions(
+    limit: int = Query(10, ge=1, le=50),
+    category: Optional[str] = None,
+    level: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    catalog: QuestionCatalog = Depends(get_question_catalog)
+):
+    """次に練習する問題を取得（期限切れの復習 → 未回答の問題の順）"""
+    return await next_question_batch(db, catalog, current_user.id, limit, category, level)
 
 @router.get("/{question_id}", response_model=schemas.DeepQuestionResponse)
-async def get_deep_question(question_id: int, db: Session = Depends(get_db)):
+async def get_deep_question(
+    question_id: int,
+    request: Request,
+    catalog: QuestionCatalog = Depends(get_question_catalog)
+):
     """特定の質問を取得"""
-    question = db.query(DeepQuestion).filter(
-        DeepQuestion.id == question_id,
-        DeepQuestion.is_active == True
-    ).first()
-    
-    if not question:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Question not found"
-        )
-    
-    return question
+    _get_active_question(catalog, question_id)
+    return _catalog_response(request, catalog, catalog.question_json(question_id))
 
 @router.post("/progress", response_model=schemas.DeepQuestionProgressResponse)
 async def submit_answer(
     progress_data: schemas.DeepQuestionProgressCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    catalog: QuestionCatalog = Depends(get_question_catalog)
 ):
     """回答を送信して進捗を記録"""
     
     # 質問が存在するか確認
-    question = db.query(DeepQuestion).filter(
-        DeepQuestion.id == progress_data.question_id,
-        DeepQuestion.is_active == True
-    ).first()
-    
-    if not question:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Question not found"
-        )
+    question = _get_active_question(catalog, progress_data.question_id)
     
     # 正解判定
-    is_correct = question.correct_answer == progress_data.selected_answer
+    is_correct = question["correct_answer"] == progress_data.selected_answer
+    
+    # 集計行をロックしてから進捗を更新（同じトランザクションで集計も更新する）
+    stats = await load_user_stats(db, current_user.id, for_update=True)
     
     # 既存の進捗を確認（同じ問題に再挑戦の場合）
-    existing_progress = db.query(DeepQuestionProgress).filter(
-        DeepQuestionProgress.user_id == current_user.id,
-        DeepQuestionProgress.question_id == progress_data.question_id
-    ).first()
+    result = await db.execute(
+        select(DeepQuestionProgress).where(
+            DeepQuestionProgress.user_id == current_user.id,
+            DeepQuestionProgress.question_id == progress_data.question_id
+        ).limit(1)
+    )
+    existing_progress = result.scalars().first()
     
     if existing_progress:
         # 再挑戦の場合は挑戦回数を増やす
+        record_answer(stats, question["category"], was_correct=existing_progress.is_correct, is_correct=is_correct)
         existing_progress.selected_answer = progress_data.selected_answer
         existing_progress.is_correct = is_correct
         existing_progress.attempts += 1
-        db.commit()
-        db.refresh(existing_progress)
+        schedule_review(existing_progress, is_correct)
+        await db.commit()
+        await db.refresh(existing_progress)
         return existing_progress
     else:
         # 新規挑戦の場合
+        record_answer(stats, question["category"], was_correct=None, is_correct=is_correct)
         progress = DeepQuestionProgress(
             user_id=current_user.id,
             question_id=progress_data.question_id,
             selected_answer=progress_data.selected_answer,
             is_correct=is_correct
         )
+        schedule_review(progress, is_correct)
         db.add(progress)
-        db.commit()
-        db.refresh(progress)
+        await db.commit()
+        await db.refresh(progress)
         return progress
 
 @router.get("/progress/user", response_model=List[schemas.DeepQuestionProgressResponse])
 async def get_user_progress(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """ユーザーの進捗を取得"""
-    progress = db.query(DeepQuestionProgress).filter(
-        DeepQuestionProgress.user_id == current_user.id
-    ).all()
+    result = await db.execute(
+        select(DeepQuestionProgress).where(DeepQuestionProgress.user_id == current_user.id)
+    )
+    progress = result.scalars().all()
     
     return progress
 
@@ -120,100 +135,47 @@ async def get_user_progress(
 async def create_shadowing_session(
     session_data: schemas.ShadowingSessionCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    catalog: QuestionCatalog = Depends(get_question_catalog)
 ):
     """シャドウィング練習セッションを記録"""
     
     # 質問が存在するか確認
-    question = db.query(DeepQuestion).filter(
-        DeepQuestion.id == session_data.question_id,
-        DeepQuestion.is_active == True
-    ).first()
+    question = _get_active_question(catalog, session_data.question_id)
     
-    if not question:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Question not found"
-        )
+    stats = await load_user_stats(db, current_user.id, for_update=True)
+    record_shadowing(stats, session_data.duration_seconds, session_data.tone_score, session_data.speed_score)
     
     session = ShadowingSession(
         user_id=current_user.id,
         question_id=session_data.question_id,
+        model_audio_url=question["audio_url"],
         duration_seconds=session_data.duration_seconds,
         tone_score=session_data.tone_score,
         speed_score=session_data.speed_score
     )
     
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
     return session
 
 @router.get("/stats/user")
 async def get_user_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    catalog: QuestionCatalog = Depends(get_question_catalog)
 ):
-    """ユーザーの統計情報を取得"""
-    
-    # 総問題数
-    total_questions = db.query(DeepQuestion).filter(DeepQuestion.is_active == True).count()
-    
-    # 挑戦済み問題数
-    attempted_questions = db.query(DeepQuestionProgress).filter(
-        DeepQuestionProgress.user_id == current_user.id
-    ).count()
-    
-    # 正解数
-    correct_answers = db.query(DeepQuestionProgress).filter(
-        DeepQuestionProgress.user_id == current_user.id,
-        DeepQuestionProgress.is_correct == True
-    ).count()
-    
-    # 正答率
-    accuracy_rate = (correct_answers / attempted_questions * 100) if attempted_questions > 0 else 0
-    
-    # カテゴリー別統計
-    category_stats = db.execute("""
-        SELECT 
-            dq.category,
-            COUNT(dqp.id) as attempted,
-            SUM(CASE WHEN dqp.is_correct THEN 1 ELSE 0 END) as correct
-        FROM deep_questions dq
-        LEFT JOIN deep_question_progress dqp ON dq.id = dqp.question_id AND dqp.user_id = :user_id
-        WHERE dq.is_active = true
-        GROUP BY dq.category
-    """, {"user_id": current_user.id}).fetchall()
-    
-    category_progress = {}
-    for cat in category_stats:
-        category_progress[cat.category] = {
-            "attempted": cat.attempted or 0,
-            "correct": cat.correct or 0,
-            "accuracy": (cat.correct / cat.attempted * 100) if cat.attempted > 0 else 0
-        }
-    
-    # シャドウィング練習統計
-    shadowing_stats = db.execute("""
-        SELECT 
-            COUNT(*) as total_sessions,
-            AVG(duration_seconds) as avg_duration,
-            AVG(tone_score) as avg_tone_score,
-            AVG(speed_score) as avg_speed_score
-        FROM shadowing_sessions
-        WHERE user_id = :user_id
-    """, {"user_id": current_user.id}).fetchone()
-    
-    return {
-        "total_questions": total_questions,
-        "attempted_questions": attempted_questions,
-        "correct_answers": correct_answers,
-        "accuracy_rate": round(accuracy_rate, 2),
-        "category_progress": category_progress,
-        "shadowing_stats": {
-            "total_sessions": shadowing_stats.total_sessions or 0,
-            "avg_duration": round(shadowing_stats.avg_duration or 0, 2),
-            "avg_tone_score": round(shadowing_stats.avg_tone_score or 0, 2),
-            "avg_speed_score": round(shadowing_stats.avg_speed_score or 0, 2)
-        }
-    }
\ No newline at end of file
+    """
+    ユーザーの統計情報を取得
+    
+    回答・シャドウィング記録時に更新している集計行を主キーで読むだけで返す。
+    """
+    stats = await db.get(UserQuestionStats, current_user.id)
+    if stats is None:
+        # 集計行が無い場合（導入前からのユーザー）は既存の記録から作成
+        stats = await load_user_stats(db, current_user.id)
+        await db.commit()
+    
+    # 有効な質問のカテゴリー別件数はカタログから取得
+    return build_stats_response(stats, catalog.category_totals)
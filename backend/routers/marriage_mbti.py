@@ -1,22 +1,133 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict, Any, List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, List, Optional
+import logging
 from schemas.marriage_mbti import (
     MarriageMBTIAnswers,
     MarriageMBTIResult,
     QuestionsResponse,
+    MarriageMBTIBatchRequest,
+    MarriageMBTIBatchResult,
+    CompatibilityRankRequest,
+    CompatibilityRankResult,
+    MarriageSimilarityRequest,
+    SimilarUsersResult,
+    SimilarPersonasResult,
     ErrorResponse,
     MBTIQuestion,
     MarriageQuestion,
     MBTIDimension,
-    MarriageCategory
+    MarriageCategory,
+    MarriageScore,
+    MBTIType
 )
 from services.marriage_mbti_logic import (
     MBTI_QUESTIONS,
     MARRIAGE_QUESTIONS,
-    analyze_marriage_mbti
+    analyze_marriage_mbti,
+    get_mbti_description_and_compatibility
 )
+from services.http_cache import StaticJSON
+from services.batch_scoring import analyze_marriage_mbti_batch
+from services.analysis_cache import analysis_cache, marriage_mbti_fingerprint
+from services.compatibility import CandidatePool, compatibility_matrix_response
+from services.marriage_similarity import (
+    MarriageSimilarityIndex,
+    find_similar_personas,
+    get_marriage_similarity_index,
+    save_marriage_result
+)
+from services.score_distribution import (
+    MARRIAGE_METRICS,
+    distribution_summary,
+    marriage_metric_values,
+    record_scores,
+    score_percentiles
+)
+from database import get_async_db
+from auth.jwt import get_current_user, get_optional_user
+from models.user import User
+from models.marriage_mbti import MarriageMBTIRecord
 
 router = APIRouter(tags=["marriage-mbti"])
+logger = logging.getLogger(__name__)
+
+
+def _build_questions_response() -> QuestionsResponse:
+    """MBTI・結婚観の質問データをAPIスキーマに変換"""
+    # MBTI質問データを変換
+    mbti_questions = []
+    for q in MBTI_QUESTIONS:
+        question = MBTIQuestion(
+            id=q["id"],
+            question=q["question"],
+            optionA=q["optionA"],
+            optionB=q["optionB"],
+            dimension=q["dimension"],
+            direction=q["direction"]
+        )
+        mbti_questions.append(question)
+    
+    # 結婚観質問データを変換
+    marriage_questions = []
+    for q in MARRIAGE_QUESTIONS:
+        question = MarriageQuestion(
+            id=q["id"],
+            question=q["question"],
+            options=q["options"],
+            category=q["category"]
+        )
+        marriage_questions.append(question)
+    
+    return QuestionsResponse(
+        mbtiQuestions=mbti_questions,
+        marriageQuestions=marriage_questions,
+        totalMBTIQuestions=len(mbti_questions),
+        totalMarriageQuestions=len(marriage_questions)
+    )
+
+
+def _build_mbti_types_response() -> Dict[str, Any]:
+    """MBTI 16タイプ一覧のレスポンスを作成"""
+    types_info = {}
+    for mbti_type in MBTIType:
+        description = get_mbti_description_and_compatibility(mbti_type)
+        
+        types_info[mbti_type.value] = {
+            "name": description["name"],
+            "description": description["description"],
+            "loveCharacteristics": description["loveCharacteristics"],
+            "compatibleTypes": [ct["type"] for ct in description["compatibleTypes"]]
+        }
+    
+    return {
+        "mbtiTypes": types_info,
+        "totalTypes": len(MBTIType)
+    }
+
+
+def _build_categories_response() -> Dict[str, Any]:
+    """結婚観カテゴリ一覧のレスポンスを作成"""
+    categories = {
+        MarriageCategory.COMMUNICATION: "コミュニケーション",
+        MarriageCategory.LIFESTYLE: "ライフスタイル", 
+        MarriageCategory.VALUES: "価値観",
+        MarriageCategory.FUTURE: "将来設計",
+        MarriageCategory.INTIMACY: "親密さ"
+    }
+    
+    return {
+        "categories": {k.value: v for k, v in categories.items()},
+        "totalCategories": len(categories)
+    }
+
+
+# 質問・タイプ・カテゴリ一覧は固定データのため、起動時にシリアライズしておく
+QUESTIONS_RESPONSE = StaticJSON(_build_questions_response())
+MBTI_TYPES_RESPONSE = StaticJSON(_build_mbti_types_response())
+CATEGORIES_RESPONSE = StaticJSON(_build_categories_response())
+COMPATIBILITY_MATRIX_RESPONSE = StaticJSON(compatibility_matrix_response())
 
 
 @router.get(
@@ -25,45 +136,9 @@ router = APIRouter(tags=["marriage-mbti"])
     summary="Marriage MBTI+ 質問一覧取得",
     description="MBTI診断と結婚観診断で使用する全質問を取得します"
 )
-async def get_marriage_mbti_questions() -> QuestionsResponse:
+async def get_marriage_mbti_questions(request: Request) -> Response:
     """Marriage MBTI+ の質問一覧を取得"""
-    try:
-        # MBTI質問データを変換
-        mbti_questions = []
-        for q in MBTI_QUESTIONS:
-            question = MBTIQuestion(
-                id=q["id"],
-                question=q["question"],
-                optionA=q["optionA"],
-                optionB=q["optionB"],
-                dimension=q["dimension"],
-                direction=q["direction"]
-            )
-            mbti_questions.append(question)
-        
-        # 結婚観質問データを変換
-        marriage_questions = []
-        for q in MARRIAGE_QUESTIONS:
-            question = MarriageQuestion(
-                id=q["id"],
-                question=q["question"],
-                options=q["options"],
-                category=q["category"]
-            )
-            marriage_questions.append(question)
-        
-        return QuestionsResponse(
-            mbtiQuestions=mbti_questions,
-            marriageQuestions=marriage_questions,
-            totalMBTIQuestions=len(mbti_questions),
-            totalMarriageQuestions=len(marriage_questions)
-        )
-    
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"質問データの取得に失敗しました: {str(e)}"
-        )
+    return QUESTIONS_RESPONSE.response(request)
 
 
 @router.post(
@@ -76,12 +151,18 @@ async def get_marriage_mbti_questions() -> QuestionsResponse:
         500: {"model": ErrorResponse, "description": "サーバーエラー"}
     }
 )
-async def analyze_marriage_mbti_test(answers_data: MarriageMBTIAnswers) -> MarriageMBTIResult:
+async def analyze_marriage_mbti_test(
+    answers_data: MarriageMBTIAnswers,
+    current_user: Optional[User] = Depends(get_optional_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> MarriageMBTIResult:
     """
     Marriage MBTI+ の分析を実行
     
     Args:
         answers_data: MBTI回答と結婚観回答データ
+        current_user: ログインユーザー（ログイン時のみ結果を保存し、discoverable が true なら
+            類似ユーザー検索の対象にする。初回の結果だけを分布に加える）
     
     Returns:
         MarriageMBTIResult: 統合診断結果
@@ -139,10 +220,31 @@ async def analyze_marriage_mbti_test(answers_data: MarriageMBTIAnswers) -> Marri
                     detail=f"結婚観回答は1-5の範囲である必要があります: {answer.answer}"
                 )
         
-        # 統合分析実行
-        result = analyze_marriage_mbti(mbti_answers, marriage_answers)
+        # 統合分析実行（同じ回答の結果はキャッシュから返す）
+        result = analysis_cache.get_or_compute(
+            marriage_mbti_fingerprint(mbti_answers, marriage_answers),
+            lambda: analyze_marriage_mbti(mbti_answers, marriage_answers)
+        )
+        
+        # ログインユーザーの初回の結果だけを分布に加え、全診断結果の中での位置を求める
+        # （匿名の診断・再診断は分布に加えない）
+        values = marriage_metric_values(result.marriageScores.model_dump())
+        if current_user is not None and await _is_first_result(db, current_user.id):
+            percentiles = record_scores(values)
+        else:
+            percentiles = score_percentiles(values)
+        # 分布がまだ無い場合（最初の診断が匿名など）はパーセンタイルを付けない
+        marriage_percentiles = None
+        if None not in percentiles.values():
+            marriage_percentiles = MarriageScore(**{
+                category: percentiles[metric] for category, metric in MARRIAGE_METRICS.items()
+            })
         
-        return result
+        if current_user is not None:
+            await _save_marriage_result(db, current_user.id, result, answers_data.discoverable)
+        
+        # キャッシュした結果は変更せず、コピーにパーセンタイルを付ける
+        return result.model_copy(update={"marriagePercentiles": marriage_percentiles})
     
     except HTTPException:
         # HTTPExceptionはそのまま再送出
@@ -156,38 +258,66 @@ async def analyze_marriage_mbti_test(answers_data: MarriageMBTIAnswers) -> Marri
         )
 
 
+async def _is_first_result(db: AsyncSession, user_id: int) -> bool:
+    """保存済みの診断結果が無いか（確認に失敗した場合は分布に加えないよう False）"""
+    try:
+        saved = await db.execute(
+            select(MarriageMBTIRecord.id).where(MarriageMBTIRecord.user_id == user_id).limit(1)
+        )
+        return saved.first() is None
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Marriage MBTI+ の保存済み結果の確認に失敗しました: {type(e).__name__}: {str(e)}")
+        return False
+
+
+async def _save_marriage_result(
+    db: AsyncSession,
+    user_id: int,
+    result: MarriageMBTIResult,
+    discoverable: bool
+) -> None:
+    """診断結果を保存する（保存に失敗しても診断結果は返す）"""
+    try:
+        await save_marriage_result(db, user_id, result, discoverable)
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Marriage MBTI+ の診断結果の保存に失敗しました: {type(e).__name__}: {str(e)}")
+
+
+@router.post(
+    "/analyze/batch",
+    response_model=MarriageMBTIBatchResult,
+    summary="Marriage MBTI+ 一括採点",
+    description="複数人の回答をまとめて採点し、MBTIタイプ・軸別スコア・結婚観スコアを返します（説明文・アドバイスは含みません）",
+    responses={
+        400: {"model": ErrorResponse, "description": "回答データが不正"}
+    }
+)
+def analyze_marriage_mbti_batch_test(batch: MarriageMBTIBatchRequest) -> MarriageMBTIBatchResult:
+    """Marriage MBTI+ の一括採点（CPU処理のためスレッドプールで実行）"""
+    try:
+        results = analyze_marriage_mbti_batch(
+            [sheet.mbti for sheet in batch.sheets],
+            [sheet.marriage for sheet in batch.sheets]
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return MarriageMBTIBatchResult(results=results, total=len(results))
+
+
 @router.get(
     "/mbti-types",
     summary="MBTI タイプ一覧取得",
     description="利用可能な MBTI 16タイプの一覧を取得します"
 )
-async def get_mbti_types() -> Dict[str, Any]:
+async def get_mbti_types(request: Request) -> Response:
     """MBTI 16タイプ一覧を取得"""
-    try:
-        from schemas.marriage_mbti import MBTIType
-        from services.marriage_mbti_logic import get_mbti_description_and_compatibility
-        
-        types_info = {}
-        for mbti_type in MBTIType:
-            description = get_mbti_description_and_compatibility(mbti_type)
-            
-            types_info[mbti_type.value] = {
-                "name": description["name"],
-                "description": description["description"],
-                "loveCharacteristics": description["loveCharacteristics"],
-                "compatibleTypes": [ct["type"] for ct in description["compatibleTypes"]]
-            }
-        
-        return {
-            "mbtiTypes": types_info,
-            "totalTypes": len(MBTIType)
-        }
-    
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"MBTI タイプデータの取得に失敗しました: {str(e)}"
-        )
+    return MBTI_TYPES_RESPONSE.response(request)
 
 
 @router.get(
@@ -195,27 +325,78 @@ async def get_mbti_types() -> Dict[str, Any]:
     summary="結婚観カテゴリ一覧取得",
     description="結婚観診断で使用するカテゴリ一覧を取得します"
 )
-async def get_marriage_categories() -> Dict[str, Any]:
+async def get_marriage_categories(request: Request) -> Response:
     """結婚観カテゴリ一覧を取得"""
-    try:
-        categories = {
-            MarriageCategory.COMMUNICATION: "コミュニケーション",
-            MarriageCategory.LIFESTYLE: "ライフスタイル", 
-            MarriageCategory.VALUES: "価値観",
-            MarriageCategory.FUTURE: "将来設計",
-            MarriageCategory.INTIMACY: "親密さ"
-        }
-        
-        return {
-            "categories": {k.value: v for k, v in categories.items()},
-            "totalCategories": len(categories)
-        }
-    
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"結婚観カテゴリデータの取得に失敗しました: {str(e)}"
-        )
+    return CATEGORIES_RESPONSE.response(request)
+
+
+@router.get(
+    "/distribution",
+    summary="結婚観スコアの分布取得",
+    description="これまでの診断結果の結婚観カテゴリ別スコアの件数と分位点（p10/p25/p50/p75/p90）を取得します"
+)
+async def get_marriage_distribution() -> Dict[str, Any]:
+    """結婚観カテゴリ別スコアの分布を取得"""
+    return {"distribution": distribution_summary(MARRIAGE_METRICS)}
+
+
+@router.get(
+    "/compatibility-matrix",
+    summary="MBTI 相性行列取得",
+    description="MBTI 16タイプ同士の相性スコア（0-100）の行列を取得します"
+)
+async def get_compatibility_matrix(request: Request) -> Response:
+    """MBTI 相性行列を取得"""
+    return COMPATIBILITY_MATRIX_RESPONSE.response(request)
+
+
+@router.post(
+    "/compatibility/rank",
+    response_model=CompatibilityRankResult,
+    summary="相性ランキング",
+    description="ユーザーのタイプと候補者一覧から、相性スコアの高い上位k件を返します"
+)
+def rank_compatible_candidates(rank_request: CompatibilityRankRequest) -> CompatibilityRankResult:
+    """候補者を相性スコアでランキング（CPU処理のためスレッドプールで実行）"""
+    pool = CandidatePool(
+        (c.id, c.mbtiType.value, c.personalityType.value if c.personalityType else None)
+        for c in rank_request.candidates
+    )
+    results = pool.rank(
+        rank_request.mbtiType.value,
+        rank_request.personalityType.value if rank_request.personalityType else None,
+        rank_request.k
+    )
+    return CompatibilityRankResult(results=results, totalCandidates=len(pool))
+
+
+@router.post(
+    "/similar/users",
+    response_model=SimilarUsersResult,
+    summary="結婚観の近いユーザー検索",
+    description="結婚観カテゴリ別スコアが近い（コサイン類似度の高い）ユーザーを上位k件返します（掲載に同意したユーザーのみ、ユーザーIDと類似度だけを返します）"
+)
+async def find_similar_users(
+    similarity_request: MarriageSimilarityRequest,
+    current_user: User = Depends(get_current_user),
+    index: MarriageSimilarityIndex = Depends(get_marriage_similarity_index)
+) -> SimilarUsersResult:
+    """結婚観の近いユーザーを検索（自分自身は除く）"""
+    results = index.search(similarity_request.scores, similarity_request.k, exclude_id=current_user.id)
+    return SimilarUsersResult(results=results, totalUsers=len(index))
+
+
+@router.post(
+    "/similar/personas",
+    response_model=SimilarPersonasResult,
+    summary="結婚観の近いペルソナ検索",
+    description="結婚観カテゴリ別スコアが近いサンプルペルソナを上位k件返します"
+)
+def find_similar_sample_personas(similarity_request: MarriageSimilarityRequest) -> SimilarPersonasResult:
+    """結婚観の近いサンプルペルソナを検索"""
+    return SimilarPersonasResult(
+        results=find_similar_personas(similarity_request.scores, similarity_request.k)
+    )
 
 
 @router.get(
@@ -0,0 +1,53 @@
+"""
+運用向けの統計エンドポイント（各キャッシュ・DBコネクションプールの状態）
+
+内部状態を返すため、OPS_ADMIN_USERNAMES（カンマ区切り）に含まれるユーザーで
+ログインしている場合だけ参照できる。未設定の場合は誰も参照できない。
+"""
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from auth.jwt import get_current_user, user_cache
+from database import get_pool_metrics
+from models.user import User
+from services.analysis_cache import analysis_cache
+from services.tts_cache import AudioFileCache, get_tts_cache
+
+OPS_ADMIN_USERNAMES = frozenset(
+    name.strip() for name in os.getenv("OPS_ADMIN_USERNAMES", "").split(",") if name.strip()
+)
+
+
+async def get_ops_user(current_user: User = Depends(get_current_user)) -> User:
+    """運用担当（OPS_ADMIN_USERNAMES に含まれるユーザー）のみ通す"""
+    if current_user.username not in OPS_ADMIN_USERNAMES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    return current_user
+
+
+router = APIRouter(prefix="/api/ops", tags=["ops"], dependencies=[Depends(get_ops_user)])
+
+
+@router.get("/auth/user-cache-stats")
+async def auth_user_cache_stats():
+    """認証ユーザーキャッシュのヒット・ミス数などを取得"""
+    return user_cache.stats()
+
+
+@router.get("/analysis/cache-stats")
+async def analysis_cache_stats():
+    """診断結果キャッシュのヒット率・件数などを取得"""
+    return analysis_cache.stats()
+
+
+@router.get("/text-to-speech/cache-stats")
+async def text_to_speech_cache_stats(tts_cache: AudioFileCache = Depends(get_tts_cache)):
+    """TTSキャッシュのヒット・ミス数などを取得"""
+    return tts_cache.stats()
+
+
+@router.get("/db/pool-stats")
+async def db_pool_stats():
+    """DBコネクションプールの使用状況（貸し出し中・オーバーフロー・待ち時間）を取得"""
+    return get_pool_metrics()
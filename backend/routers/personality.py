@@ -1,23 +1,92 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, Optional
+import logging
 from schemas.personality import (
     PersonalityTestAnswers,
     PersonalityTestResult,
+    PersonalityScore,
+    PersonalityDescription,
     QuestionsResponse,
+    PersonalityBatchRequest,
+    PersonalityBatchResult,
     ErrorResponse,
     Question,
     QuestionOption
 )
 from services.personality_logic import (
     PERSONALITY_QUESTIONS,
+    PERSONALITY_QUESTION_INDEX,
     calculate_personality_scores,
     determine_personality_type,
     get_personality_description,
     get_compatible_types,
-    PersonalityDimension
+    PersonalityDimension,
+    PersonalityType
 )
+from services.http_cache import StaticJSON
+from services.batch_scoring import analyze_personality_batch
+from services.analysis_cache import analysis_cache, personality_fingerprint
+from services.score_distribution import (
+    PERSONALITY_METRICS,
+    distribution_summary,
+    personality_metric_values,
+    record_scores,
+    score_percentiles
+)
+from database import get_async_db
+from auth.jwt import get_optional_user
+from models.user import User
+from models.personality import PersonalityResult
 
 router = APIRouter(tags=["personality"])
+logger = logging.getLogger(__name__)
+
+
+def _build_questions_response() -> QuestionsResponse:
+    """personality_logic.pyの質問データをAPIスキーマに変換"""
+    questions = []
+    for q in PERSONALITY_QUESTIONS:
+        question = Question(
+            id=q["id"],
+            question=q["question"],
+            dimension=q["dimension"],
+            options=[
+                QuestionOption(text=opt["text"], score=opt["score"])
+                for opt in q["options"]
+            ]
+        )
+        questions.append(question)
+    
+    return QuestionsResponse(
+        questions=questions,
+        total_questions=len(questions)
+    )
+
+
+def _build_types_response() -> Dict[str, Any]:
+    """性格タイプ一覧のレスポンスを作成"""
+    types_info = {}
+    for personality_type in PersonalityType:
+        description = get_personality_description(personality_type)
+        compatible_types = get_compatible_types(personality_type)
+        
+        types_info[personality_type.value] = {
+            "title": description["title"],
+            "summary": description["summary"],
+            "compatible_types": [t.value for t in compatible_types]
+        }
+    
+    return {
+        "personality_types": types_info,
+        "total_types": len(PersonalityType)
+    }
+
+
+# 質問・タイプ一覧は固定データのため、起動時にシリアライズしておく
+QUESTIONS_RESPONSE = StaticJSON(_build_questions_response())
+TYPES_RESPONSE = StaticJSON(_build_types_response())
 
 
 @router.get(
@@ -26,33 +95,9 @@ router = APIRouter(tags=["personality"])
     summary="性格診断質問一覧取得",
     description="性格診断で使用する全質問を取得します"
 )
-async def get_personality_questions() -> QuestionsResponse:
+async def get_personality_questions(request: Request) -> Response:
     """性格診断の質問一覧を取得"""
-    try:
-        # personality_logic.pyの質問データをAPIスキーマに変換
-        questions = []
-        for q in PERSONALITY_QUESTIONS:
-            question = Question(
-                id=q["id"],
-                question=q["question"],
-                dimension=q["dimension"],
-                options=[
-                    QuestionOption(text=opt["text"], score=opt["score"])
-                    for opt in q["options"]
-                ]
-            )
-            questions.append(question)
-        
-        return QuestionsResponse(
-            questions=questions,
-            total_questions=len(questions)
-        )
-    
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"質問データの取得に失敗しました: {str(e)}"
-        )
+    return QUESTIONS_RESPONSE.response(request)
 
 
 @router.post(
@@ -65,12 +110,17 @@ async def get_personality_questions() -> QuestionsResponse:
         500: {"model": ErrorResponse, "description": "サーバーエラー"}
     }
 )
-async def analyze_personality(answers_data: PersonalityTestAnswers) -> PersonalityTestResult:
+async def analyze_personality(
+    answers_data: PersonalityTestAnswers,
+    current_user: Optional[User] = Depends(get_optional_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> PersonalityTestResult:
     """
     性格診断の分析を実行
     
     Args:
         answers_data: 回答データ {question_id: selected_option_index}
+        current_user: ログインユーザー（ログイン時のみ結果を保存し、初回の結果だけを分布に加える）
     
     Returns:
         PersonalityTestResult: 診断結果
@@ -98,52 +148,46 @@ async def analyze_personality(answers_data: PersonalityTestAnswers) -> Personali
         
         # 回答の範囲をチェック
         for question_id, option_index in answers.items():
-            question = next((q for q in PERSONALITY_QUESTIONS if q["id"] == question_id), None)
+            question = PERSONALITY_QUESTION_INDEX.get(question_id)
             if question is None:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"存在しない質問ID: {question_id}"
                 )
             
-            if not (0 <= option_index < len(question["options"])):
+            _, option_scores = question
+            if not (0 <= option_index < len(option_scores)):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"無効な選択肢インデックス: 質問{question_id}, 選択肢{option_index}"
                 )
         
-        # 性格分析実行
-        scores = calculate_personality_scores(answers)
-        personality_type = determine_personality_type(scores)
-        description = get_personality_description(personality_type)
-        compatible_types = get_compatible_types(personality_type)
-        
-        # レスポンス用にスコアを変換
-        from schemas.personality import PersonalityScore
-        personality_scores = PersonalityScore(
-            外向性=scores.get(PersonalityDimension.EXTROVERSION, 0.0),
-            コミュニケーション=scores.get(PersonalityDimension.COMMUNICATION, 0.0),
-            感情安定性=scores.get(PersonalityDimension.EMOTIONAL_STABILITY, 0.0),
-            意思決定=scores.get(PersonalityDimension.DECISION_MAKING, 0.0),
-            共感性=scores.get(PersonalityDimension.EMPATHY, 0.0),
-            コミット力=scores.get(PersonalityDimension.COMMITMENT, 0.0)
+        # 性格分析実行（同じ回答の結果はキャッシュから返す）
+        result = analysis_cache.get_or_compute(
+            personality_fingerprint(answers),
+            lambda: _build_personality_result(answers)
         )
+        scores = {dimension: getattr(result.scores, dimension.value) for dimension in PersonalityDimension}
         
-        # レスポンス用に説明を変換
-        from schemas.personality import PersonalityDescription
-        personality_description = PersonalityDescription(
-            title=description["title"],
-            summary=description["summary"],
-            strengths=description["strengths"],
-            marriage_advice=description["marriage_advice"],
-            growth_points=description["growth_points"]
-        )
+        # ログインユーザーの初回の結果だけを分布に加え、全診断結果の中での位置を求める
+        # （匿名の診断・再診断は分布に加えない）
+        values = personality_metric_values(scores)
+        if current_user is not None and await _is_first_result(db, current_user.id):
+            percentiles = record_scores(values)
+        else:
+            percentiles = score_percentiles(values)
+        # 分布がまだ無い場合（最初の診断が匿名など）はパーセンタイルを付けない
+        personality_percentiles = None
+        if None not in percentiles.values():
+            personality_percentiles = PersonalityScore(**{
+                dimension.value: percentiles[metric] for dimension, metric in PERSONALITY_METRICS.items()
+            })
         
-        return PersonalityTestResult(
-            personality_type=personality_type,
-            scores=personality_scores,
-            description=personality_description,
-            compatible_types=compatible_types
-        )
+        if current_user is not None:
+            await _save_personality_result(db, current_user.id, result.personality_type, scores)
+        
+        # キャッシュした結果は変更せず、コピーにパーセンタイルを付ける
+        return result.model_copy(update={"percentiles": personality_percentiles})
     
     except HTTPException:
         # HTTPExceptionはそのまま再送出
@@ -157,34 +201,113 @@ async def analyze_personality(answers_data: PersonalityTestAnswers) -> Personali
         )
 
 
+def _build_personality_result(answers: Dict[int, int]) -> PersonalityTestResult:
+    """検証済みの回答から診断結果（パーセンタイル以外）を組み立てる"""
+    scores = calculate_personality_scores(answers)
+    personality_type = determine_personality_type(scores)
+    description = get_personality_description(personality_type)
+    compatible_types = get_compatible_types(personality_type)
+    
+    # レスポンス用にスコアを変換
+    personality_scores = PersonalityScore(
+        外向性=scores.get(PersonalityDimension.EXTROVERSION, 0.0),
+        コミュニケーション=scores.get(PersonalityDimension.COMMUNICATION, 0.0),
+        感情安定性=scores.get(PersonalityDimension.EMOTIONAL_STABILITY, 0.0),
+        意思決定=scores.get(PersonalityDimension.DECISION_MAKING, 0.0),
+        共感性=scores.get(PersonalityDimension.EMPATHY, 0.0),
+        コミット力=scores.get(PersonalityDimension.COMMITMENT, 0.0)
+    )
+    
+    # レスポンス用に説明を変換
+    personality_description = PersonalityDescription(
+        title=description["title"],
+        summary=description["summary"],
+        strengths=description["strengths"],
+        marriage_advice=description["marriage_advice"],
+        growth_points=description["growth_points"]
+    )
+    
+    return PersonalityTestResult(
+        personality_type=personality_type,
+        scores=personality_scores,
+        description=personality_description,
+        compatible_types=compatible_types
+    )
+
+
+async def _is_first_result(db: AsyncSession, user_id: int) -> bool:
+    """保存済みの診断結果が無いか（確認に失敗した場合は分布に加えないよう False）"""
+    try:
+        saved = await db.execute(
+            select(PersonalityResult.id).where(PersonalityResult.user_id == user_id).limit(1)
+        )
+        return saved.first() is None
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"性格診断の保存済み結果の確認に失敗しました: {type(e).__name__}: {str(e)}")
+        return False
+
+
+async def _save_personality_result(
+    db: AsyncSession,
+    user_id: int,
+    personality_type: PersonalityType,
+    scores: Dict[PersonalityDimension, float]
+) -> None:
+    """診断結果を保存する（保存に失敗しても診断結果は返す）"""
+    try:
+        db.add(PersonalityResult(
+            user_id=user_id,
+            personality_type=personality_type.value,
+            **{dimension.name.lower(): scores.get(dimension, 0.0) for dimension in PersonalityDimension}
+        ))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"性格診断の結果の保存に失敗しました: {type(e).__name__}: {str(e)}")
+
+
+@router.post(
+    "/analyze/batch",
+    response_model=PersonalityBatchResult,
+    summary="性格診断一括採点",
+    description="複数の回答データをまとめて採点し、性格タイプと軸別スコアを返します（説明文は含みません）",
+    responses={
+        400: {"model": ErrorResponse, "description": "回答データが不正"}
+    }
+)
+def analyze_personality_batch_test(batch: PersonalityBatchRequest) -> PersonalityBatchResult:
+    """性格診断の一括採点（CPU処理のためスレッドプールで実行）"""
+    try:
+        results = analyze_personality_batch(batch.sheets)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return PersonalityBatchResult(results=results, total=len(results))
+
+
 @router.get(
     "/types",
     summary="性格タイプ一覧取得",
     description="利用可能な性格タイプの一覧を取得します"
 )
-async def get_personality_types() -> Dict[str, Any]:
+async def get_personality_types(request: Request) -> Response:
     """性格タイプ一覧を取得"""
-    try:
-        from services.personality_logic import PersonalityType
-        
-        types_info = {}
-        for personality_type in PersonalityType:
-            description = get_personality_description(personality_type)
-            compatible_types = get_compatible_types(personality_type)
-            
-            types_info[personality_type.value] = {
-                "title": description["title"],
-                "summary": description["summary"],
-                "compatible_types": [t.value for t in compatible_types]
-            }
-        
-        return {
-            "personality_types": types_info,
-            "total_types": len(PersonalityType)
-        }
-    
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"性格タイプデータの取得に失敗しました: {str(e)}"
-        )
\ No newline at end of file
+    return TYPES_RESPONSE.response(request)
+
+
+@router.get(
+    "/distribution",
+    summary="性格軸別スコアの分布取得",
+    description="これまでの診断結果の性格軸別スコアの件数と分位点（p10/p25/p50/p75/p90）を取得します"
+)
+async def get_personality_distribution() -> Dict[str, Any]:
+    """性格軸別スコアの分布を取得"""
+    return {
+        "distribution": distribution_summary(
+            {dimension.value: metric for dimension, metric in PERSONALITY_METRICS.items()}
+        )
+    }
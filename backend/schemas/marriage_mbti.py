@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Union
 from enum import Enum
+from schemas.personality import PersonalityTypeEnum
 
 
 class MBTIDimension(str, Enum):
@@ -80,6 +81,7 @@ class MarriageMBTIAnswers(BaseModel):
     """統合診断の回答データ"""
     mbtiAnswers: List[MBTIAnswer]
     marriageAnswers: List[MarriageAnswer]
+    discoverable: bool = False  # 結果を類似ユーザー検索に載せることに同意するか（ログイン時のみ有効）
     
     class Config:
         json_schema_extra = {
@@ -139,6 +141,7 @@ class MarriageMBTIResult(BaseModel):
     advice: List[PersonalizedAdvice]
     mbtiScores: MBTIScore
     marriageScores: MarriageScore
+    marriagePercentiles: Optional[MarriageScore] = None  # 結婚観スコアのパーセンタイル（0-100、ログインユーザーの初回の診断結果の中での位置、分布が無い場合は None）
     
     class Config:
         json_schema_extra = {
@@ -174,11 +177,147 @@ class MarriageMBTIResult(BaseModel):
                     "values": 4.5,
                     "future": 3.9,
                     "intimacy": 4.1
+                },
+                "marriagePercentiles": {
+                    "communication": 78.5,
+                    "lifestyle": 52.0,
+                    "values": 88.1,
+                    "future": 60.4,
+                    "intimacy": 70.2
                 }
             }
         }
 
 
+# 一括採点で1リクエストに含められる回答数
+BATCH_MAX_SHEETS = 10000
+
+
+class MarriageMBTIBatchSheet(BaseModel):
+    """一括採点用の回答（1人分）"""
+    mbti: str  # questionId 順の 'A'/'B' 16文字
+    marriage: List[int]  # questionId 順の 1-5 の回答10問
+
+
+class MarriageMBTIBatchRequest(BaseModel):
+    """Marriage MBTI+ の一括採点リクエスト"""
+    sheets: List[MarriageMBTIBatchSheet] = Field(..., min_length=1, max_length=BATCH_MAX_SHEETS)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "sheets": [
+                    {"mbti": "ABABAABBABABBBAA", "marriage": [3, 4, 2, 5, 1, 3, 4, 2, 3, 5]}
+                ]
+            }
+        }
+
+
+class MarriageMBTIBatchItem(BaseModel):
+    """一括採点の結果（1人分）"""
+    mbtiType: MBTIType
+    mbtiScores: MBTIScore
+    marriageScores: MarriageScore
+
+
+class MarriageMBTIBatchResult(BaseModel):
+    """一括採点の結果"""
+    results: List[MarriageMBTIBatchItem]  # リクエストの sheets と同じ順
+    total: int
+
+
+# 相性ランキングで1リクエストに含められる候補者数
+RANKING_MAX_CANDIDATES = 100000
+
+
+class CompatibilityCandidate(BaseModel):
+    """相性ランキングの候補者"""
+    id: int
+    mbtiType: MBTIType
+    personalityType: Optional[PersonalityTypeEnum] = None
+
+
+class CompatibilityRankRequest(BaseModel):
+    """相性ランキングのリクエスト"""
+    mbtiType: MBTIType
+    personalityType: Optional[PersonalityTypeEnum] = None
+    candidates: List[CompatibilityCandidate] = Field(..., min_length=1, max_length=RANKING_MAX_CANDIDATES)
+    k: int = Field(10, ge=1, le=100)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "mbtiType": "INTJ",
+                "personalityType": "アナリスト",
+                "candidates": [
+                    {"id": 1, "mbtiType": "ENFP", "personalityType": "コミュニケーター"},
+                    {"id": 2, "mbtiType": "ISTJ"}
+                ],
+                "k": 10
+            }
+        }
+
+
+class RankedCandidate(BaseModel):
+    """相性ランキングの結果（1件分）"""
+    id: int
+    score: float  # 総合スコア（0-100）
+    mbtiScore: float
+    personalityScore: Optional[float] = None  # 候補者の性格タイプが不明な場合は null
+
+
+class CompatibilityRankResult(BaseModel):
+    """相性ランキングの結果"""
+    results: List[RankedCandidate]  # 総合スコアの高い順
+    totalCandidates: int
+
+
+class MarriageSimilarityRequest(BaseModel):
+    """結婚観の近いユーザー・ペルソナの検索リクエスト"""
+    scores: MarriageScore
+    k: int = Field(10, ge=1, le=100)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "scores": {
+                    "communication": 4.0,
+                    "lifestyle": 3.5,
+                    "values": 2.5,
+                    "future": 3.0,
+                    "intimacy": 4.5
+                },
+                "k": 10
+            }
+        }
+
+
+class SimilarUser(BaseModel):
+    """結婚観の近いユーザー（1件分、掲載に同意したユーザーのみ。スコアそのものは返さない）"""
+    id: int  # ユーザーID
+    similarity: float  # コサイン類似度（-1〜1）
+
+
+class SimilarUsersResult(BaseModel):
+    """結婚観の近いユーザーの検索結果"""
+    results: List[SimilarUser]  # 類似度の高い順
+    totalUsers: int  # 検索対象（掲載に同意した）ユーザー数
+
+
+class SimilarPersona(BaseModel):
+    """結婚観の近いサンプルペルソナ（1件分）"""
+    id: str
+    name: str
+    description: str
+    similarity: float  # コサイン類似度（-1〜1）
+    scores: MarriageScore
+
+
+class SimilarPersonasResult(BaseModel):
+    """結婚観の近いサンプルペルソナの検索結果"""
+    results: List[SimilarPersona]  # 類似度の高い順
+
+
 class QuestionsResponse(BaseModel):
     """質問一覧レスポンス"""
     mbtiQuestions: List[MBTIQuestion]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
 from enum import Enum
 
@@ -80,6 +80,7 @@ class PersonalityTestResult(BaseModel):
     scores: PersonalityScore
     description: PersonalityDescription
     compatible_types: List[PersonalityTypeEnum]
+    percentiles: Optional[PersonalityScore] = None  # 軸別スコアのパーセンタイル（0-100、ログインユーザーの初回の診断結果の中での位置、分布が無い場合は None）
     
     class Config:
         json_schema_extra = {
@@ -100,11 +101,50 @@ class PersonalityTestResult(BaseModel):
                     "marriage_advice": "パートナーとの対話を大切にし、お互いの気持ちを理解し合うことで、深い絆を築けるでしょう。",
                     "growth_points": "時には自分の意見もしっかりと伝え、相手との健全な議論も大切にしましょう。"
                 },
-                "compatible_types": ["サポーター", "アナリスト", "信頼できるパートナー"]
+                "compatible_types": ["サポーター", "アナリスト", "信頼できるパートナー"],
+                "percentiles": {
+                    "外向性": 72.4,
+                    "コミュニケーション": 85.0,
+                    "感情安定性": 55.1,
+                    "意思決定": 61.8,
+                    "共感性": 80.3,
+                    "コミット力": 66.9
+                }
             }
         }
 
 
+# 一括採点で1リクエストに含められる回答数
+BATCH_MAX_SHEETS = 10000
+
+
+class PersonalityBatchRequest(BaseModel):
+    """性格診断の一括採点リクエスト"""
+    # {question_id: selected_option_index} の一覧
+    sheets: List[Dict[int, int]] = Field(..., min_length=1, max_length=BATCH_MAX_SHEETS)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "sheets": [
+                    {1: 0, 2: 1, 3: 2, 4: 0, 5: 1, 6: 3, 7: 0, 8: 1, 9: 2, 10: 0}
+                ]
+            }
+        }
+
+
+class PersonalityBatchItem(BaseModel):
+    """一括採点の結果（1件分）"""
+    personality_type: PersonalityTypeEnum
+    scores: PersonalityScore
+
+
+class PersonalityBatchResult(BaseModel):
+    """一括採点の結果"""
+    results: List[PersonalityBatchItem]  # リクエストの sheets と同じ順
+    total: int
+
+
 class QuestionsResponse(BaseModel):
     """質問一覧レスポンス"""
     questions: List[Question]
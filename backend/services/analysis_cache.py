@@ -0,0 +1,84 @@
+"""
+診断結果のキャッシュ
+
+性格診断（10問×4択）と Marriage MBTI+（16問の2択 + 10問の5段階）は回答の組み合わせが
+限られており、同じ回答の診断が繰り返されやすい。回答を質問順に並べた文字列（フィンガー
+プリント）をキーに、採点・説明文・アドバイスまで組み立てた結果を LRU で保持する。
+
+パーセンタイルは診断のたびに変わるため、キャッシュした結果には含めず、返す直前に
+コピーへ付け加える。
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, TypeVar
+
+from schemas.marriage_mbti import MBTIAnswer, MarriageAnswer
+from services.personality_logic import PERSONALITY_QUESTIONS
+
+T = TypeVar("T")
+
+# キャッシュする診断結果の最大件数（0 で無効）
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "4096"))
+
+_PERSONALITY_QUESTION_IDS = [q["id"] for q in PERSONALITY_QUESTIONS]
+
+
+def personality_fingerprint(answers: Dict[int, int]) -> str:
+    """性格診断の回答のフィンガープリント（質問ID順の選択肢インデックス）"""
+    return "personality:" + ",".join(str(answers[question_id]) for question_id in _PERSONALITY_QUESTION_IDS)
+
+
+def marriage_mbti_fingerprint(mbti_answers: List[MBTIAnswer], marriage_answers: List[MarriageAnswer]) -> str:
+    """Marriage MBTI+ の回答のフィンガープリント（質問ID順の 'A'/'B' と 1-5）"""
+    mbti = "".join(a.answer for a in sorted(mbti_answers, key=lambda a: a.questionId))
+    marriage = "".join(str(a.answer) for a in sorted(marriage_answers, key=lambda a: a.questionId))
+    return f"marriage-mbti:{mbti}:{marriage}"
+
+
+class AnalysisCache:
+    """フィンガープリント → 診断結果の LRU キャッシュ（性格診断・Marriage MBTI+ で共有）"""
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: str, compute: Callable[[], T]) -> T:
+        """キャッシュにあれば返し、無ければ compute() の結果を保存して返す（結果は変更せずに使うこと）"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        if self.max_entries <= 0:
+            return value
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+analysis_cache = AnalysisCache()
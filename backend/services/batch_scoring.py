@@ -0,0 +1,213 @@
+"""
+性格診断・Marriage MBTI+ の一括採点
+
+数千件の回答を行列にまとめ、軸別スコア・タイプ・カテゴリ別スコアを NumPy の
+行列演算でまとめて計算する。結果は 1件ずつの関数
+（calculate_personality_scores / determine_personality_type / calculate_mbti /
+calculate_marriage_scores）と同じ値になる。
+
+回答の行列表現:
+    性格診断   (件数, 質問数) の選択肢インデックス。未回答・範囲外は -1
+    MBTI       (件数, 16) で A=1, B=0。未回答は -1
+    結婚観     (件数, 10) で 1-5 の回答。未回答は 0
+"""
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from schemas.marriage_mbti import MBTIType, MarriageCategory
+from services.personality_logic import PERSONALITY_QUESTIONS, PersonalityDimension, PersonalityType
+from services.marriage_mbti_logic import MBTI_QUESTION_MAPPINGS, MARRIAGE_QUESTION_CATEGORIES
+
+# ---- 性格診断 ----
+
+PERSONALITY_DIMENSIONS = list(PersonalityDimension)
+PERSONALITY_TYPES = list(PersonalityType)
+PERSONALITY_QUESTION_IDS = [q["id"] for q in PERSONALITY_QUESTIONS]
+
+_MAX_OPTIONS = max(len(q["options"]) for q in PERSONALITY_QUESTIONS)
+
+# 質問ごとの選択肢スコア（選択肢が少ない質問は 0 で埋める）
+_OPTION_SCORES = np.zeros((len(PERSONALITY_QUESTIONS), _MAX_OPTIONS), dtype=np.int64)
+_OPTION_COUNTS = np.array([len(q["options"]) for q in PERSONALITY_QUESTIONS])
+_QUESTION_INDEX = np.arange(len(PERSONALITY_QUESTIONS))[None, :]
+for _i, _q in enumerate(PERSONALITY_QUESTIONS):
+    _OPTION_SCORES[_i, :len(_q["options"])] = [opt["score"] for opt in _q["options"]]
+
+# 質問 → 軸 の対応（one-hot）
+_PERSONALITY_DIMENSION_MATRIX = np.zeros((len(PERSONALITY_QUESTIONS), len(PERSONALITY_DIMENSIONS)), dtype=np.int64)
+for _i, _q in enumerate(PERSONALITY_QUESTIONS):
+    _PERSONALITY_DIMENSION_MATRIX[_i, PERSONALITY_DIMENSIONS.index(_q["dimension"])] = 1
+
+# 回答数・合計点 → 0-100 のスコア（1件ずつの計算と同じ丸めになるよう事前に計算しておく）
+_MAX_PER_DIMENSION = int(_PERSONALITY_DIMENSION_MATRIX.sum(axis=0).max())
+_MAX_SCORE = int(_OPTION_SCORES.max())
+_NORMALIZED_SCORES = np.zeros((_MAX_PER_DIMENSION + 1, _MAX_SCORE * _MAX_PER_DIMENSION + 1))
+for _count in range(1, _MAX_PER_DIMENSION + 1):
+    for _total in range(_MAX_SCORE * _count + 1):
+        _NORMALIZED_SCORES[_count, _total] = round(((_total / _count - 1) / 3) * 100, 1)
+
+
+def encode_personality_answers(sheets: Sequence[Dict[int, int]], strict: bool = True) -> np.ndarray:
+    """
+    {question_id: 選択肢インデックス} の一覧を行列に変換
+
+    strict=True の場合は未回答・存在しない質問ID・範囲外の選択肢があれば ValueError、
+    False の場合は calculate_personality_scores と同じくその回答を無視する（-1）。
+    """
+    matrix = np.array(
+        [[sheet.get(question_id, -1) for question_id in PERSONALITY_QUESTION_IDS] for sheet in sheets],
+        dtype=np.int64
+    ).reshape(len(sheets), len(PERSONALITY_QUESTION_IDS))
+    invalid = (matrix < 0) | (matrix >= _OPTION_COUNTS)
+
+    if strict:
+        for index, sheet in enumerate(sheets):
+            if len(sheet) != len(PERSONALITY_QUESTION_IDS) or invalid[index].any():
+                raise ValueError(f"{index}件目: 全質問に有効な選択肢で回答する必要があります")
+
+    matrix[invalid] = -1
+    return matrix
+
+
+def score_personality_batch(option_matrix: np.ndarray) -> np.ndarray:
+    """軸別スコア (件数, 軸数) を計算（列は PERSONALITY_DIMENSIONS の順）"""
+    answered = option_matrix >= 0
+    scores = _OPTION_SCORES[_QUESTION_INDEX, np.where(answered, option_matrix, 0)]
+    totals = (scores * answered) @ _PERSONALITY_DIMENSION_MATRIX
+    counts = answered.astype(np.int64) @ _PERSONALITY_DIMENSION_MATRIX
+    return _NORMALIZED_SCORES[counts, totals]
+
+
+def determine_personality_types_batch(scores: np.ndarray) -> np.ndarray:
+    """軸別スコアから性格タイプ（PERSONALITY_TYPES のインデックス）を判定"""
+    dim = {d: scores[:, i] for i, d in enumerate(PERSONALITY_DIMENSIONS)}
+    extroversion = dim[PersonalityDimension.EXTROVERSION]
+    communication = dim[PersonalityDimension.COMMUNICATION]
+    emotional_stability = dim[PersonalityDimension.EMOTIONAL_STABILITY]
+    decision_making = dim[PersonalityDimension.DECISION_MAKING]
+    empathy = dim[PersonalityDimension.EMPATHY]
+
+    # determine_personality_type と同じ順に判定する
+    conditions = [
+        (extroversion >= 70) & (communication >= 70),
+        (empathy >= 70) & (emotional_stability >= 60),
+        (extroversion >= 70) & (decision_making >= 70),
+        (decision_making >= 70) & (emotional_stability >= 70),
+        (extroversion >= 60) & (empathy >= 60) & (communication >= 60),
+    ]
+    choices = [
+        PERSONALITY_TYPES.index(PersonalityType.COMMUNICATOR),
+        PERSONALITY_TYPES.index(PersonalityType.SUPPORTER),
+        PERSONALITY_TYPES.index(PersonalityType.LEADER),
+        PERSONALITY_TYPES.index(PersonalityType.ANALYST),
+        PERSONALITY_TYPES.index(PersonalityType.CREATIVE),
+    ]
+    return np.select(conditions, choices, default=PERSONALITY_TYPES.index(PersonalityType.RELIABLE))
+
+
+def analyze_personality_batch(sheets: Sequence[Dict[int, int]], strict: bool = True) -> List[dict]:
+    """性格診断の回答をまとめて採点し、タイプと軸別スコアを返す"""
+    scores = score_personality_batch(encode_personality_answers(sheets, strict))
+    types = determine_personality_types_batch(scores)
+    dimension_names = [d.value for d in PERSONALITY_DIMENSIONS]
+    return [
+        {
+            "personality_type": PERSONALITY_TYPES[type_index].value,
+            "scores": dict(zip(dimension_names, row))
+        }
+        for type_index, row in zip(types.tolist(), scores.tolist())
+    ]
+
+
+# ---- MBTI ----
+
+MBTI_LETTERS = ["E", "I", "S", "N", "T", "F", "J", "P"]
+MBTI_QUESTION_COUNT = len(MBTI_QUESTION_MAPPINGS)
+
+# 質問 → A/B を選んだときに加点する文字の列
+_MBTI_A_MATRIX = np.zeros((MBTI_QUESTION_COUNT, len(MBTI_LETTERS)), dtype=np.int64)
+_MBTI_B_MATRIX = np.zeros((MBTI_QUESTION_COUNT, len(MBTI_LETTERS)), dtype=np.int64)
+for _i, _mapping in enumerate(MBTI_QUESTION_MAPPINGS):
+    _MBTI_A_MATRIX[_i, MBTI_LETTERS.index(_mapping["aLetter"])] = 1
+    _MBTI_B_MATRIX[_i, MBTI_LETTERS.index(_mapping["bLetter"])] = 1
+
+# 各軸で後ろの文字（I, N, F, P）が多い場合のビット → タイプ
+_MBTI_TYPES_BY_CODE = [
+    MBTIType(
+        ("I" if code & 8 else "E") + ("N" if code & 4 else "S") +
+        ("F" if code & 2 else "T") + ("P" if code & 1 else "J")
+    )
+    for code in range(16)
+]
+
+
+def encode_mbti_answers(sheets: Sequence[str]) -> np.ndarray:
+    """'ABBA...' 形式（questionId 順に16文字）の回答を行列に変換"""
+    for index, sheet in enumerate(sheets):
+        if len(sheet) != MBTI_QUESTION_COUNT or not set(sheet) <= {"A", "B"}:
+            raise ValueError(f"{index}件目: MBTI回答は'A'または'B'の{MBTI_QUESTION_COUNT}文字である必要があります")
+    raw = np.frombuffer("".join(sheets).encode("ascii"), dtype=np.uint8)
+    return (raw == ord("A")).astype(np.int64).reshape(len(sheets), MBTI_QUESTION_COUNT)
+
+
+def score_mbti_batch(answer_matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """文字別スコア (件数, 8) とタイプ（_MBTI_TYPES_BY_CODE のインデックス）を計算"""
+    letters = (answer_matrix == 1) @ _MBTI_A_MATRIX + (answer_matrix == 0) @ _MBTI_B_MATRIX
+    # calculate_mbti と同じく同点は前の文字（E, S, T, J）
+    codes = (
+        (letters[:, 0] < letters[:, 1]) * 8 +
+        (letters[:, 2] < letters[:, 3]) * 4 +
+        (letters[:, 4] < letters[:, 5]) * 2 +
+        (letters[:, 6] < letters[:, 7]) * 1
+    )
+    return letters, codes
+
+
+# ---- 結婚観 ----
+
+MARRIAGE_CATEGORIES = list(MarriageCategory)
+MARRIAGE_QUESTION_COUNT = len(MARRIAGE_QUESTION_CATEGORIES)
+
+_MARRIAGE_CATEGORY_MATRIX = np.zeros((MARRIAGE_QUESTION_COUNT, len(MARRIAGE_CATEGORIES)), dtype=np.int64)
+for _i, _category in enumerate(MARRIAGE_QUESTION_CATEGORIES):
+    _MARRIAGE_CATEGORY_MATRIX[_i, MARRIAGE_CATEGORIES.index(_category)] = 1
+
+
+def encode_marriage_answers(sheets: Sequence[Sequence[int]]) -> np.ndarray:
+    """questionId 順の 1-5 の回答一覧を行列に変換"""
+    for index, sheet in enumerate(sheets):
+        if len(sheet) != MARRIAGE_QUESTION_COUNT:
+            raise ValueError(f"{index}件目: 結婚観回答は{MARRIAGE_QUESTION_COUNT}問必須です")
+    matrix = np.array(sheets, dtype=np.int64).reshape(len(sheets), MARRIAGE_QUESTION_COUNT)
+    invalid = ((matrix < 1) | (matrix > 5)).any(axis=1)
+    if invalid.any():
+        raise ValueError(f"{int(np.argmax(invalid))}件目: 結婚観回答は1-5の範囲である必要があります")
+    return matrix
+
+
+def score_marriage_batch(answer_matrix: np.ndarray) -> np.ndarray:
+    """カテゴリ別の平均スコア (件数, カテゴリ数) を計算（回答の無いカテゴリは 3.0）"""
+    totals = answer_matrix @ _MARRIAGE_CATEGORY_MATRIX
+    counts = (answer_matrix > 0).astype(np.int64) @ _MARRIAGE_CATEGORY_MATRIX
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = totals / counts
+    return np.where(counts > 0, averages, 3.0)
+
+
+def analyze_marriage_mbti_batch(mbti_sheets: Sequence[str], marriage_sheets: Sequence[Sequence[int]]) -> List[dict]:
+    """MBTI・結婚観の回答をまとめて採点し、タイプ・文字別スコア・カテゴリ別スコアを返す"""
+    if len(mbti_sheets) != len(marriage_sheets):
+        raise ValueError("MBTI回答と結婚観回答の件数が一致しません")
+
+    letters, codes = score_mbti_batch(encode_mbti_answers(mbti_sheets))
+    marriage_scores = score_marriage_batch(encode_marriage_answers(marriage_sheets))
+    category_names = [c.value for c in MARRIAGE_CATEGORIES]
+    return [
+        {
+            "mbtiType": _MBTI_TYPES_BY_CODE[code].value,
+            "mbtiScores": dict(zip(MBTI_LETTERS, letter_row)),
+            "marriageScores": dict(zip(category_names, marriage_row))
+        }
+        for code, letter_row, marriage_row in zip(codes.tolist(), letters.tolist(), marriage_scores.tolist())
+    ]
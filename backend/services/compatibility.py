@@ -0,0 +1,176 @@
+"""
+MBTI・性格タイプの相性行列と候補者ランキング
+
+MBTI_TYPE_DESCRIPTIONS / PERSONALITY_COMPATIBILITY_MAP の「相性の良いタイプ」を
+起動時に 16×16（MBTI）・6×6（性格タイプ）の相性スコア行列（0-100）に展開しておき、
+相性の判定を行列の参照だけで行う。
+
+MBTI の相性スコア:
+    相性の良いタイプに挙げられている組み合わせ   95 / 90 / 85（挙げられている順）
+    それ以外                                       40 + 感覚・直観が同じなら 10
+                                                   + 外向・内向が異なれば 5 + 思考・感情が異なれば 5
+どちらか一方のタイプにだけ挙げられている場合も高い方を採用し、行列は対称になる。
+
+ランキングは候補者のタイプをインデックス配列にしておき、スコアをまとめて計算してから
+上位 k 件だけを選ぶ（全件の並べ替えはしない）。
+"""
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from schemas.marriage_mbti import MBTIType
+from services.personality_logic import PersonalityType, PERSONALITY_COMPATIBILITY_MAP
+from services.marriage_mbti_logic import MBTI_TYPE_DESCRIPTIONS
+
+MBTI_TYPES = list(MBTIType)
+PERSONALITY_TYPES = list(PersonalityType)
+MBTI_INDEX = {t.value: i for i, t in enumerate(MBTI_TYPES)}
+PERSONALITY_INDEX = {t.value: i for i, t in enumerate(PERSONALITY_TYPES)}
+
+# 相性の良いタイプに挙げられている順のスコア
+LISTED_MBTI_SCORES = [95.0, 90.0, 85.0]
+LISTED_PERSONALITY_SCORES = [90.0, 85.0, 80.0]
+DEFAULT_PERSONALITY_SCORE = 50.0
+
+# 性格タイプが分かる場合の重み（MBTI : 性格タイプ）
+MBTI_WEIGHT = 0.7
+PERSONALITY_WEIGHT = 0.3
+
+
+def _letter_score(a: str, b: str) -> float:
+    """説明に挙げられていない組み合わせの MBTI 相性スコア"""
+    score = 40.0
+    if a[1] == b[1]:
+        score += 10.0
+    if a[0] != b[0]:
+        score += 5.0
+    if a[2] != b[2]:
+        score += 5.0
+    return score
+
+
+def _build_mbti_matrix() -> np.ndarray:
+    matrix = np.array([[_letter_score(a.value, b.value) for b in MBTI_TYPES] for a in MBTI_TYPES])
+    for mbti_type, description in MBTI_TYPE_DESCRIPTIONS.items():
+        for rank, compatible in enumerate(description["compatibleTypes"]):
+            # "ENFP (活動家)" の先頭4文字がタイプ
+            other = MBTI_INDEX[compatible["type"][:4]]
+            matrix[MBTI_INDEX[mbti_type.value], other] = max(
+                matrix[MBTI_INDEX[mbti_type.value], other], LISTED_MBTI_SCORES[rank]
+            )
+    matrix = np.maximum(matrix, matrix.T)
+    matrix.setflags(write=False)
+    return matrix
+
+
+def _build_personality_matrix() -> np.ndarray:
+    matrix = np.full((len(PERSONALITY_TYPES), len(PERSONALITY_TYPES)), DEFAULT_PERSONALITY_SCORE)
+    for personality_type, compatible_types in PERSONALITY_COMPATIBILITY_MAP.items():
+        for rank, other in enumerate(compatible_types):
+            matrix[PERSONALITY_INDEX[personality_type.value], PERSONALITY_INDEX[other.value]] = LISTED_PERSONALITY_SCORES[rank]
+    matrix = np.maximum(matrix, matrix.T)
+    matrix.setflags(write=False)
+    return matrix
+
+
+MBTI_COMPATIBILITY = _build_mbti_matrix()
+PERSONALITY_COMPATIBILITY = _build_personality_matrix()
+
+
+def mbti_compatibility(a: Union[MBTIType, str], b: Union[MBTIType, str]) -> float:
+    """MBTI タイプ同士の相性スコア（0-100）"""
+    return float(MBTI_COMPATIBILITY[MBTI_INDEX[MBTIType(a).value], MBTI_INDEX[MBTIType(b).value]])
+
+
+def personality_compatibility(a: Union[PersonalityType, str], b: Union[PersonalityType, str]) -> float:
+    """性格タイプ同士の相性スコア（0-100）"""
+    return float(PERSONALITY_COMPATIBILITY[
+        PERSONALITY_INDEX[PersonalityType(a).value], PERSONALITY_INDEX[PersonalityType(b).value]
+    ])
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    スコアの上位 k 件のインデックスを降順で返す（O(n + k log k)）
+
+    同点の場合は元の順序が先のものを優先する。
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+
+    threshold = np.partition(scores, n - k)[n - k]  # k 番目に大きいスコア
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    selected = np.concatenate([above, ties])
+    return selected[np.argsort(-scores[selected], kind="stable")]
+
+
+class CandidatePool:
+    """ランキング対象の候補者（タイプをインデックス配列で保持し、複数回のランキングに使い回せる）"""
+
+    def __init__(self, candidates: Iterable[Tuple[Union[int, str], str, Optional[str]]]):
+        """candidates: (候補者ID, MBTIタイプ, 性格タイプ または None) の一覧"""
+        ids, mbti, personality = [], [], []
+        for candidate_id, mbti_type, personality_type in candidates:
+            ids.append(candidate_id)
+            mbti.append(MBTI_INDEX[mbti_type])
+            personality.append(PERSONALITY_INDEX[personality_type] if personality_type else -1)
+        self.ids = ids
+        self.mbti = np.array(mbti, dtype=np.int64)
+        self.personality = np.array(personality, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, mbti_type: str, personality_type: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """全候補者の (総合スコア, MBTIスコア, 性格タイプスコア) を計算（性格タイプ不明は NaN）"""
+        mbti_scores = MBTI_COMPATIBILITY[MBTI_INDEX[mbti_type]][self.mbti]
+        known = self.personality >= 0
+        if personality_type is None or not known.any():
+            return mbti_scores, mbti_scores, np.full(len(self), np.nan)
+
+        personality_scores = np.where(
+            known,
+            PERSONALITY_COMPATIBILITY[PERSONALITY_INDEX[personality_type]][np.where(known, self.personality, 0)],
+            np.nan
+        )
+        # 性格タイプが分からない候補者は中立のスコアとして扱う
+        total = MBTI_WEIGHT * mbti_scores + PERSONALITY_WEIGHT * np.where(
+            known, personality_scores, DEFAULT_PERSONALITY_SCORE
+        )
+        return total, mbti_scores, personality_scores
+
+    def rank(self, mbti_type: str, personality_type: Optional[str] = None, k: int = 10) -> List[dict]:
+        """相性スコアの上位 k 件を返す"""
+        total, mbti_scores, personality_scores = self.scores(mbti_type, personality_type)
+        results = []
+        for index in top_k_indices(total, k).tolist():
+            personality_score = personality_scores[index]
+            results.append({
+                "id": self.ids[index],
+                "score": round(float(total[index]), 2),
+                "mbtiScore": float(mbti_scores[index]),
+                "personalityScore": None if np.isnan(personality_score) else float(personality_score)
+            })
+        return results
+
+
+def rank_candidates(
+    mbti_type: str,
+    personality_type: Optional[str],
+    candidates: Sequence[Tuple[Union[int, str], str, Optional[str]]],
+    k: int = 10
+) -> List[dict]:
+    """候補者一覧から相性の良い上位 k 件を返す"""
+    return CandidatePool(candidates).rank(mbti_type, personality_type, k)
+
+
+def compatibility_matrix_response() -> dict:
+    """MBTI 相性行列の API レスポンス"""
+    return {
+        "types": [t.value for t in MBTI_TYPES],
+        "matrix": MBTI_COMPATIBILITY.tolist()
+    }
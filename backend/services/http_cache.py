@@ -0,0 +1,54 @@
+"""
+条件付きGET（ETag / If-None-Match）の共通処理
+
+内容が変わらないレスポンスは JSON のバイト列と ETag を先に作っておき、
+リクエストごとのモデル生成・検証・シリアライズを省いてそのまま返す。
+"""
+import json
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+
+
+def to_json_bytes(data: Any) -> bytes:
+    """FastAPI の JSONResponse と同じ形式（非ASCIIはそのまま）でシリアライズ"""
+    if isinstance(data, BaseModel):
+        data = data.model_dump(mode="json")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def make_etag(body: bytes) -> str:
+    """内容のハッシュから強い ETag を作成"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match ヘッダーに ETag が含まれるか（弱い比較）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def etag_response(request: Request, etag: str, body: bytes, cache_control: str = "no-cache") -> Response:
+    """ETag 付きの JSON レスポンスを返す（一致すれば本文なしの 304）"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class StaticJSON:
+    """起動時にシリアライズ済みの固定レスポンス"""
+
+    def __init__(self, data: Any):
+        self.body = to_json_bytes(data)
+        self.etag = make_etag(self.body)
+
+    def response(self, request: Request) -> Response:
+        return etag_response(request, self.etag, self.body, cache_control="public, no-cache")
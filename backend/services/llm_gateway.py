@@ -0,0 +1,126 @@
+"""
+LLMゲートウェイ
+
+全ルーターからの OpenAI 呼び出し（チャット・音声認識・音声合成）をここに集約する。
+呼び出しはすべて非同期で行い、イベントループを塞がずに多数のリクエストを
+同時に処理できるようにする。同時実行数はセマフォで上限を設ける。
+"""
+import os
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from openai import AsyncOpenAI
+
+from services.openai_client import openai_registry
+
+logger = logging.getLogger(__name__)
+
+# 1ワーカーあたりの上流への同時リクエスト数の上限
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "256"))
+
+# 音声ストリーミング時のチャンクサイズ（バイト）
+SPEECH_CHUNK_SIZE = int(os.getenv("TTS_STREAM_CHUNK_SIZE", str(16 * 1024)))
+
+# 音声合成の出力形式と Content-Type の対応
+SPEECH_MEDIA_TYPES = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg",
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+}
+
+
+class LLMUnavailableError(Exception):
+    """OpenAI クライアントが利用できない（APIキー未設定など）"""
+
+
+class LLMGateway:
+    """OpenAI API への非同期アクセスをまとめるゲートウェイ"""
+
+    def __init__(
+        self,
+        client_provider: Callable[[], Optional[AsyncOpenAI]] = openai_registry.get,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+    ):
+        self._client_provider = client_provider
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def available(self) -> bool:
+        """クライアントが利用可能かどうか"""
+        return self._client_provider() is not None
+
+    def _client(self) -> AsyncOpenAI:
+        client = self._client_provider()
+        if client is None:
+            raise LLMUnavailableError("OpenAI API key not configured")
+        return client
+
+    async def chat_completion(self, messages: List[Dict[str, str]], model: str = "gpt-4o-mini", **params: Any):
+        """Chat Completions API を呼び出し、レスポンスをそのまま返す"""
+        client = self._client()
+        async with self._semaphore:
+            return await client.chat.completions.create(model=model, messages=messages, **params)
+
+    async def chat(self, messages: List[Dict[str, str]], model: str = "gpt-4o-mini", **params: Any) -> str:
+        """Chat Completions API を呼び出し、生成テキストを返す"""
+        response = await self.chat_completion(messages, model=model, **params)
+        return response.choices[0].message.content
+
+    async def stream_chat(self, messages: List[Dict[str, str]], model: str = "gpt-4o-mini", **params: Any) -> AsyncIterator[str]:
+        """Chat Completions API をストリーミングで呼び出し、生成されたトークンを順次返す"""
+        client = self._client()
+        async with self._semaphore:
+            stream = await client.chat.completions.create(model=model, messages=messages, stream=True, **params)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    async def transcribe(self, filename: str, content: bytes, model: str = "whisper-1", language: str = "ja") -> str:
+        """音声データをテキストに変換する"""
+        client = self._client()
+        async with self._semaphore:
+            transcript = await client.audio.transcriptions.create(
+                model=model,
+                file=(filename, content),
+                language=language
+            )
+        return transcript.text
+
+    async def speech(self, text: str, voice: str = "alloy", model: str = "tts-1", speed: float = 1.0,
+                     response_format: str = "mp3") -> bytes:
+        """テキストから音声データを生成する"""
+        client = self._client()
+        async with self._semaphore:
+            response = await client.audio.speech.create(
+                model=model,
+                voice=voice,
+                input=text,
+                speed=speed,
+                response_format=response_format
+            )
+        return response.content
+
+    async def stream_speech(self, text: str, voice: str = "alloy", model: str = "tts-1", speed: float = 1.0,
+                            response_format: str = "mp3", chunk_size: int = SPEECH_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """テキストから音声データを生成し、届いたチャンクから順次返す"""
+        client = self._client()
+        async with self._semaphore:
+            async with client.audio.speech.with_streaming_response.create(
+                model=model,
+                voice=voice,
+                input=text,
+                speed=speed,
+                response_format=response_format
+            ) as response:
+                async for chunk in response.iter_bytes(chunk_size):
+                    yield chunk
+
+
+llm_gateway = LLMGateway()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """FastAPI 依存関係: 共有 LLM ゲートウェイを返す"""
+    return llm_gateway
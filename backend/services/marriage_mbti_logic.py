@@ -5,6 +5,7 @@ from schemas.marriage_mbti import (
     MBTIAnswer, MarriageAnswer, MBTIScore, MarriageScore,
     CompatibleType, PersonalizedAdvice, MarriageMBTIResult
 )
+from services.question_index import bucket_answers, first_answers
 
 
 # MBTI質問データ（参考コードより）
@@ -268,36 +269,51 @@ MARRIAGE_QUESTIONS = [
 ]
 
 
+# MBTI質問マッピング（questionId 順、参考コードより）
+MBTI_QUESTION_MAPPINGS = [
+    {"dimension": "EI", "aLetter": "E", "bLetter": "I"},
+    {"dimension": "EI", "aLetter": "E", "bLetter": "I"},
+    {"dimension": "EI", "aLetter": "E", "bLetter": "I"},
+    {"dimension": "EI", "aLetter": "E", "bLetter": "I"},
+    {"dimension": "SN", "aLetter": "S", "bLetter": "N"},
+    {"dimension": "SN", "aLetter": "S", "bLetter": "N"},
+    {"dimension": "SN", "aLetter": "S", "bLetter": "N"},
+    {"dimension": "SN", "aLetter": "S", "bLetter": "N"},
+    {"dimension": "TF", "aLetter": "T", "bLetter": "F"},
+    {"dimension": "TF", "aLetter": "T", "bLetter": "F"},
+    {"dimension": "TF", "aLetter": "T", "bLetter": "F"},
+    {"dimension": "TF", "aLetter": "T", "bLetter": "F"},
+    {"dimension": "JP", "aLetter": "J", "bLetter": "P"},
+    {"dimension": "JP", "aLetter": "J", "bLetter": "P"},
+    {"dimension": "JP", "aLetter": "J", "bLetter": "P"},
+    {"dimension": "JP", "aLetter": "J", "bLetter": "P"},
+]
+
+# questionId -> (A の文字, B の文字)
+MBTI_QUESTION_LETTERS = [(m["aLetter"], m["bLetter"]) for m in MBTI_QUESTION_MAPPINGS]
+
+# 結婚観質問とカテゴリのマッピング（questionId 順）
+MARRIAGE_QUESTION_CATEGORIES = [
+    MarriageCategory.COMMUNICATION,  # Q1
+    MarriageCategory.LIFESTYLE,      # Q2
+    MarriageCategory.VALUES,         # Q3
+    MarriageCategory.FUTURE,         # Q4
+    MarriageCategory.FUTURE,         # Q5
+    MarriageCategory.INTIMACY,       # Q6
+    MarriageCategory.LIFESTYLE,      # Q7
+    MarriageCategory.VALUES,         # Q8
+    MarriageCategory.LIFESTYLE,      # Q9
+    MarriageCategory.VALUES,         # Q10
+]
+
+
 def calculate_mbti(answers: List[MBTIAnswer]) -> Tuple[MBTIType, MBTIScore]:
     """MBTI分析を実行"""
     scores = {"E": 0, "I": 0, "S": 0, "N": 0, "T": 0, "F": 0, "J": 0, "P": 0}
     
-    # 質問マッピング（参考コードより）
-    question_mappings = [
-        {"dimension": "EI", "aLetter": "E", "bLetter": "I"},
-        {"dimension": "EI", "aLetter": "E", "bLetter": "I"},
-        {"dimension": "EI", "aLetter": "E", "bLetter": "I"},
-        {"dimension": "EI", "aLetter": "E", "bLetter": "I"},
-        {"dimension": "SN", "aLetter": "S", "bLetter": "N"},
-        {"dimension": "SN", "aLetter": "S", "bLetter": "N"},
-        {"dimension": "SN", "aLetter": "S", "bLetter": "N"},
-        {"dimension": "SN", "aLetter": "S", "bLetter": "N"},
-        {"dimension": "TF", "aLetter": "T", "bLetter": "F"},
-        {"dimension": "TF", "aLetter": "T", "bLetter": "F"},
-        {"dimension": "TF", "aLetter": "T", "bLetter": "F"},
-        {"dimension": "TF", "aLetter": "T", "bLetter": "F"},
-        {"dimension": "JP", "aLetter": "J", "bLetter": "P"},
-        {"dimension": "JP", "aLetter": "J", "bLetter": "P"},
-        {"dimension": "JP", "aLetter": "J", "bLetter": "P"},
-        {"dimension": "JP", "aLetter": "J", "bLetter": "P"},
-    ]
-    
     for answer in answers:
-        mapping = question_mappings[answer.questionId]
-        if answer.answer == "A":
-            scores[mapping["aLetter"]] += 1
-        else:
-            scores[mapping["bLetter"]] += 1
+        a_letter, b_letter = MBTI_QUESTION_LETTERS[answer.questionId]
+        scores[a_letter if answer.answer == "A" else b_letter] += 1
     
     # MBTI タイプを決定
     mbti_string = (
@@ -315,31 +331,7 @@ def calculate_mbti(answers: List[MBTIAnswer]) -> Tuple[MBTIType, MBTIScore]:
 
 def calculate_marriage_scores(answers: List[MarriageAnswer]) -> MarriageScore:
     """結婚観スコアを計算"""
-    category_scores = {
-        MarriageCategory.COMMUNICATION: [],
-        MarriageCategory.LIFESTYLE: [],
-        MarriageCategory.VALUES: [],
-        MarriageCategory.FUTURE: [],
-        MarriageCategory.INTIMACY: []
-    }
-    
-    # 質問とカテゴリのマッピング
-    question_categories = [
-        MarriageCategory.COMMUNICATION,  # Q1
-        MarriageCategory.LIFESTYLE,      # Q2
-        MarriageCategory.VALUES,         # Q3
-        MarriageCategory.FUTURE,         # Q4
-        MarriageCategory.FUTURE,         # Q5
-        MarriageCategory.INTIMACY,       # Q6
-        MarriageCategory.LIFESTYLE,      # Q7
-        MarriageCategory.VALUES,         # Q8
-        MarriageCategory.LIFESTYLE,      # Q9
-        MarriageCategory.VALUES,         # Q10
-    ]
-    
-    for answer in answers:
-        category = question_categories[answer.questionId]
-        category_scores[category].append(answer.answer)
+    category_scores = bucket_answers(answers, MARRIAGE_QUESTION_CATEGORIES, MarriageCategory)
     
     # 各カテゴリの平均スコアを計算
     avg_scores = {}
@@ -352,252 +344,254 @@ def calculate_marriage_scores(answers: List[MarriageAnswer]) -> MarriageScore:
     return MarriageScore(**avg_scores)
 
 
+# MBTI タイプの説明と相性の良いタイプ（相性の良い順）
+MBTI_TYPE_DESCRIPTIONS = {
+    MBTIType.INTJ: {
+        "name": "建築家タイプ",
+        "description": "独立心が強く、長期的なビジョンを持って関係を築く理想主義者",
+        "loveCharacteristics": [
+            "深く意味のある関係を求める",
+            "パートナーの知性と独立性を重視",
+            "長期的な計画を立てて関係を発展させる",
+            "感情表現は控えめだが、深い愛情を持つ"
+        ],
+        "compatibleTypes": [
+            {"type": "ENFP (活動家)", "reason": "互いの創造性と理想を刺激し合える"},
+            {"type": "ENTP (討論者)", "reason": "知的な刺激と新しい視点を提供し合える"},
+            {"type": "INFJ (提唱者)", "reason": "深いレベルでの理解と価値観の共有"}
+        ]
+    },
+    MBTIType.INTP: {
+        "name": "論理学者タイプ",
+        "description": "知的好奇心旺盛で、パートナーとの深い理解を求める思考家",
+        "loveCharacteristics": [
+            "知的な刺激を重視する",
+            "独立性と自由を大切にする",
+            "感情よりも論理的な理解を優先",
+            "深く考えてから行動する慎重さ"
+        ],
+        "compatibleTypes": [
+            {"type": "ENFJ (主人公)", "reason": "感情面でのサポートと成長の機会"},
+            {"type": "ENTJ (指揮官)", "reason": "共通の目標と知的な議論"},
+            {"type": "INFP (仲裁者)", "reason": "創造性と深い理解の共有"}
+        ]
+    },
+    MBTIType.ENTJ: {
+        "name": "指揮官タイプ",
+        "description": "リーダーシップがあり、パートナーと共に目標を達成することを重視",
+        "loveCharacteristics": [
+            "関係においてもリーダーシップを発揮",
+            "共通の目標達成を重視",
+            "効率的で建設的な関係を好む",
+            "パートナーの成長をサポート"
+        ],
+        "compatibleTypes": [
+            {"type": "INFP (仲裁者)", "reason": "感情面での深さとバランス"},
+            {"type": "INTP (論理学者)", "reason": "知的な刺激と補完関係"},
+            {"type": "ENFP (活動家)", "reason": "エネルギーと創造性の共有"}
+        ]
+    },
+    MBTIType.ENTP: {
+        "name": "討論者タイプ",
+        "description": "創造的で社交的、パートナーとの知的な交流を楽しむ革新者",
+        "loveCharacteristics": [
+            "知的な議論と新しいアイデアを楽しむ",
+            "変化と刺激を求める",
+            "パートナーの可能性を引き出す",
+            "自由で開放的な関係を好む"
+        ],
+        "compatibleTypes": [
+            {"type": "INFJ (提唱者)", "reason": "深い洞察と理想の共有"},
+            {"type": "INTJ (建築家)", "reason": "長期的なビジョンと戦略的思考"},
+            {"type": "ENFJ (主人公)", "reason": "人間関係とコミュニケーションの得意さ"}
+        ]
+    },
+    MBTIType.INFJ: {
+        "name": "提唱者タイプ",
+        "description": "深い洞察力を持ち、理想的な関係を追求する理想主義者",
+        "loveCharacteristics": [
+            "深い精神的なつながりを求める",
+            "パートナーの内面を理解したがる",
+            "理想的な関係像を持っている",
+            "献身的で思いやりがある"
+        ],
+        "compatibleTypes": [
+            {"type": "ENTP (討論者)", "reason": "創造的なエネルギーと新しい視点"},
+            {"type": "ENFP (活動家)", "reason": "感情面での理解と共感"},
+            {"type": "INTJ (建築家)", "reason": "深い理解と長期的なビジョン"}
+        ]
+    },
+    MBTIType.INFP: {
+        "name": "仲裁者タイプ",
+        "description": "価値観を大切にし、真の理解者を求める情熱的な理想主義者",
+        "loveCharacteristics": [
+            "価値観の一致を重視",
+            "真の理解と受容を求める",
+            "創造的で情熱的な関係",
+            "個性と独立性を尊重"
+        ],
+        "compatibleTypes": [
+            {"type": "ENFJ (主人公)", "reason": "感情面での深いサポート"},
+            {"type": "ENTJ (指揮官)", "reason": "目標達成と成長の機会"},
+            {"type": "INTP (論理学者)", "reason": "知的好奇心と創造性の共有"}
+        ]
+    },
+    MBTIType.ENFJ: {
+        "name": "主人公タイプ",
+        "description": "人の成長を支援し、調和の取れた関係を築くカリスマ的リーダー",
+        "loveCharacteristics": [
+            "パートナーの成長をサポート",
+            "調和とコミュニケーションを重視",
+            "感情的な絆を大切にする",
+            "関係に情熱と献身を注ぐ"
+        ],
+        "compatibleTypes": [
+            {"type": "INFP (仲裁者)", "reason": "価値観と感情面での深いつながり"},
+            {"type": "ISFP (冒険家)", "reason": "感受性と芸術的センスの共有"},
+            {"type": "INTP (論理学者)", "reason": "知的刺激と成長の機会"}
+        ]
+    },
+    MBTIType.ENFP: {
+        "name": "活動家タイプ",
+        "description": "熱意溢れ、創造的で、パートナーとの可能性を探求する自由な魂",
+        "loveCharacteristics": [
+            "情熱的で創造的な関係",
+            "新しい経験と冒険を共有",
+            "パートナーの可能性を信じる",
+            "自由と成長を重視"
+        ],
+        "compatibleTypes": [
+            {"type": "INTJ (建築家)", "reason": "深いビジョンと戦略的思考"},
+            {"type": "INFJ (提唱者)", "reason": "精神的なつながりと理想の共有"},
+            {"type": "ENTJ (指揮官)", "reason": "目標達成と相互成長"}
+        ]
+    },
+    MBTIType.ISTJ: {
+        "name": "管理者タイプ",
+        "description": "責任感が強く、安定した信頼できる関係を築く実用主義者",
+        "loveCharacteristics": [
+            "安定性と信頼性を提供",
+            "伝統的な価値観を重視",
+            "責任感と献身性",
+            "実用的で現実的なアプローチ"
+        ],
+        "compatibleTypes": [
+            {"type": "ESFP (エンターテイナー)", "reason": "楽しさとspontaneityのバランス"},
+            {"type": "ESTP (起業家)", "reason": "活動的なエネルギーと新しい体験"},
+            {"type": "ISFP (冒険家)", "reason": "感受性と芸術的センスの共有"}
+        ]
+    },
+    MBTIType.ISFJ: {
+        "name": "擁護者タイプ",
+        "description": "思いやりがあり、パートナーのニーズを満たすことを喜びとする保護者",
+        "loveCharacteristics": [
+            "パートナーの幸福を最優先",
+            "献身的で思いやりがある",
+            "安定した調和の取れた関係",
+            "細やかな気配りとサポート"
+        ],
+        "compatibleTypes": [
+            {"type": "ESTP (起業家)", "reason": "活動的なエネルギーとバランス"},
+            {"type": "ESFP (エンターテイナー)", "reason": "楽しさとwarmthの共有"},
+            {"type": "ISFP (冒険家)", "reason": "感受性と価値観の共有"}
+        ]
+    },
+    MBTIType.ESTJ: {
+        "name": "幹部タイプ",
+        "description": "組織力があり、効率的で安定した関係を築く実行力のあるリーダー",
+        "loveCharacteristics": [
+            "責任感と安定性を提供",
+            "効率的で計画的な関係",
+            "家族や将来への責任感",
+            "実用的で現実的なサポート"
+        ],
+        "compatibleTypes": [
+            {"type": "ISFP (冒険家)", "reason": "感受性と創造性のバランス"},
+            {"type": "INFP (仲裁者)", "reason": "価値観と感情面での深さ"},
+            {"type": "ISTP (巨匠)", "reason": "実用性と独立性の尊重"}
+        ]
+    },
+    MBTIType.ESFJ: {
+        "name": "領事タイプ",
+        "description": "社交的で思いやりがあり、調和の取れた関係を築く協力者",
+        "loveCharacteristics": [
+            "調和とコミュニケーションを重視",
+            "パートナーのニーズに敏感",
+            "社交的で家族思い",
+            "感情的なサポートを提供"
+        ],
+        "compatibleTypes": [
+            {"type": "ISFP (冒険家)", "reason": "芸術性と感受性の共有"},
+            {"type": "ISTP (巨匠)", "reason": "実用性と独立性のバランス"},
+            {"type": "INFP (仲裁者)", "reason": "価値観と創造性の共有"}
+        ]
+    },
+    MBTIType.ISTP: {
+        "name": "巨匠タイプ",
+        "description": "独立心があり、実用的で柔軟な関係を好む現実主義者",
+        "loveCharacteristics": [
+            "独立性と自由を重視",
+            "実用的で現実的なアプローチ",
+            "行動で愛情を示す",
+            "冷静で客観的な判断"
+        ],
+        "compatibleTypes": [
+            {"type": "ESFJ (領事)", "reason": "感情面でのサポートと社交性"},
+            {"type": "ESTJ (幹部)", "reason": "効率性と目標達成の共有"},
+            {"type": "ISFJ (擁護者)", "reason": "思いやりと安定性"}
+        ]
+    },
+    MBTIType.ISFP: {
+        "name": "冒険家タイプ",
+        "description": "感受性豊かで、真の理解と美的体験を求める芸術的な魂",
+        "loveCharacteristics": [
+            "感受性と芸術的センス",
+            "価値観の深い共有",
+            "個性と独立性の尊重",
+            "美的体験と感情の共有"
+        ],
+        "compatibleTypes": [
+            {"type": "ENFJ (主人公)", "reason": "感情面での理解とサポート"},
+            {"type": "ESFJ (領事)", "reason": "調和と思いやりの共有"},
+            {"type": "ESTJ (幹部)", "reason": "安定性と責任感のバランス"}
+        ]
+    },
+    MBTIType.ESTP: {
+        "name": "起業家タイプ",
+        "description": "活動的で現実的、楽しく刺激的な関係を築く行動派",
+        "loveCharacteristics": [
+            "活動的で楽しい関係",
+            "現在を楽しむことを重視",
+            "柔軟性と適応性",
+            "エネルギッシュで社交的"
+        ],
+        "compatibleTypes": [
+            {"type": "ISFJ (擁護者)", "reason": "安定性と思いやりのバランス"},
+            {"type": "ISTJ (管理者)", "reason": "責任感と実用性の共有"},
+            {"type": "INFJ (提唱者)", "reason": "深い理解と長期的視点"}
+        ]
+    },
+    MBTIType.ESFP: {
+        "name": "エンターテイナータイプ",
+        "description": "楽しく温かい、人生を共に楽しむパートナーを求める自由な魂",
+        "loveCharacteristics": [
+            "楽しさと喜びを共有",
+            "温かく思いやりがある",
+            "spontaneousで柔軟",
+            "人との繋がりを大切にする"
+        ],
+        "compatibleTypes": [
+            {"type": "ISTJ (管理者)", "reason": "安定性と責任感のバランス"},
+            {"type": "ISFJ (擁護者)", "reason": "思いやりと調和の共有"},
+            {"type": "INTJ (建築家)", "reason": "深いビジョンと戦略的思考"}
+        ]
+    }
+}
+
+
 def get_mbti_description_and_compatibility(mbti_type: MBTIType) -> Dict:
     """MBTI タイプの説明と相性を取得"""
-    type_descriptions = {
-        MBTIType.INTJ: {
-            "name": "建築家タイプ",
-            "description": "独立心が強く、長期的なビジョンを持って関係を築く理想主義者",
-            "loveCharacteristics": [
-                "深く意味のある関係を求める",
-                "パートナーの知性と独立性を重視",
-                "長期的な計画を立てて関係を発展させる",
-                "感情表現は控えめだが、深い愛情を持つ"
-            ],
-            "compatibleTypes": [
-                {"type": "ENFP (活動家)", "reason": "互いの創造性と理想を刺激し合える"},
-                {"type": "ENTP (討論者)", "reason": "知的な刺激と新しい視点を提供し合える"},
-                {"type": "INFJ (提唱者)", "reason": "深いレベルでの理解と価値観の共有"}
-            ]
-        },
-        MBTIType.INTP: {
-            "name": "論理学者タイプ",
-            "description": "知的好奇心旺盛で、パートナーとの深い理解を求める思考家",
-            "loveCharacteristics": [
-                "知的な刺激を重視する",
-                "独立性と自由を大切にする",
-                "感情よりも論理的な理解を優先",
-                "深く考えてから行動する慎重さ"
-            ],
-            "compatibleTypes": [
-                {"type": "ENFJ (主人公)", "reason": "感情面でのサポートと成長の機会"},
-                {"type": "ENTJ (指揮官)", "reason": "共通の目標と知的な議論"},
-                {"type": "INFP (仲裁者)", "reason": "創造性と深い理解の共有"}
-            ]
-        },
-        MBTIType.ENTJ: {
-            "name": "指揮官タイプ",
-            "description": "リーダーシップがあり、パートナーと共に目標を達成することを重視",
-            "loveCharacteristics": [
-                "関係においてもリーダーシップを発揮",
-                "共通の目標達成を重視",
-                "効率的で建設的な関係を好む",
-                "パートナーの成長をサポート"
-            ],
-            "compatibleTypes": [
-                {"type": "INFP (仲裁者)", "reason": "感情面での深さとバランス"},
-                {"type": "INTP (論理学者)", "reason": "知的な刺激と補完関係"},
-                {"type": "ENFP (活動家)", "reason": "エネルギーと創造性の共有"}
-            ]
-        },
-        MBTIType.ENTP: {
-            "name": "討論者タイプ",
-            "description": "創造的で社交的、パートナーとの知的な交流を楽しむ革新者",
-            "loveCharacteristics": [
-                "知的な議論と新しいアイデアを楽しむ",
-                "変化と刺激を求める",
-                "パートナーの可能性を引き出す",
-                "自由で開放的な関係を好む"
-            ],
-            "compatibleTypes": [
-                {"type": "INFJ (提唱者)", "reason": "深い洞察と理想の共有"},
-                {"type": "INTJ (建築家)", "reason": "長期的なビジョンと戦略的思考"},
-                {"type": "ENFJ (主人公)", "reason": "人間関係とコミュニケーションの得意さ"}
-            ]
-        },
-        MBTIType.INFJ: {
-            "name": "提唱者タイプ",
-            "description": "深い洞察力を持ち、理想的な関係を追求する理想主義者",
-            "loveCharacteristics": [
-                "深い精神的なつながりを求める",
-                "パートナーの内面を理解したがる",
-                "理想的な関係像を持っている",
-                "献身的で思いやりがある"
-            ],
-            "compatibleTypes": [
-                {"type": "ENTP (討論者)", "reason": "創造的なエネルギーと新しい視点"},
-                {"type": "ENFP (活動家)", "reason": "感情面での理解と共感"},
-                {"type": "INTJ (建築家)", "reason": "深い理解と長期的なビジョン"}
-            ]
-        },
-        MBTIType.INFP: {
-            "name": "仲裁者タイプ",
-            "description": "価値観を大切にし、真の理解者を求める情熱的な理想主義者",
-            "loveCharacteristics": [
-                "価値観の一致を重視",
-                "真の理解と受容を求める",
-                "創造的で情熱的な関係",
-                "個性と独立性を尊重"
-            ],
-            "compatibleTypes": [
-                {"type": "ENFJ (主人公)", "reason": "感情面での深いサポート"},
-                {"type": "ENTJ (指揮官)", "reason": "目標達成と成長の機会"},
-                {"type": "INTP (論理学者)", "reason": "知的好奇心と創造性の共有"}
-            ]
-        },
-        MBTIType.ENFJ: {
-            "name": "主人公タイプ",
-            "description": "人の成長を支援し、調和の取れた関係を築くカリスマ的リーダー",
-            "loveCharacteristics": [
-                "パートナーの成長をサポート",
-                "調和とコミュニケーションを重視",
-                "感情的な絆を大切にする",
-                "関係に情熱と献身を注ぐ"
-            ],
-            "compatibleTypes": [
-                {"type": "INFP (仲裁者)", "reason": "価値観と感情面での深いつながり"},
-                {"type": "ISFP (冒険家)", "reason": "感受性と芸術的センスの共有"},
-                {"type": "INTP (論理学者)", "reason": "知的刺激と成長の機会"}
-            ]
-        },
-        MBTIType.ENFP: {
-            "name": "活動家タイプ",
-            "description": "熱意溢れ、創造的で、パートナーとの可能性を探求する自由な魂",
-            "loveCharacteristics": [
-                "情熱的で創造的な関係",
-                "新しい経験と冒険を共有",
-                "パートナーの可能性を信じる",
-                "自由と成長を重視"
-            ],
-            "compatibleTypes": [
-                {"type": "INTJ (建築家)", "reason": "深いビジョンと戦略的思考"},
-                {"type": "INFJ (提唱者)", "reason": "精神的なつながりと理想の共有"},
-                {"type": "ENTJ (指揮官)", "reason": "目標達成と相互成長"}
-            ]
-        },
-        MBTIType.ISTJ: {
-            "name": "管理者タイプ",
-            "description": "責任感が強く、安定した信頼できる関係を築く実用主義者",
-            "loveCharacteristics": [
-                "安定性と信頼性を提供",
-                "伝統的な価値観を重視",
-                "責任感と献身性",
-                "実用的で現実的なアプローチ"
-            ],
-            "compatibleTypes": [
-                {"type": "ESFP (エンターテイナー)", "reason": "楽しさとspontaneityのバランス"},
-                {"type": "ESTP (起業家)", "reason": "活動的なエネルギーと新しい体験"},
-                {"type": "ISFP (冒険家)", "reason": "感受性と芸術的センスの共有"}
-            ]
-        },
-        MBTIType.ISFJ: {
-            "name": "擁護者タイプ",
-            "description": "思いやりがあり、パートナーのニーズを満たすことを喜びとする保護者",
-            "loveCharacteristics": [
-                "パートナーの幸福を最優先",
-                "献身的で思いやりがある",
-                "安定した調和の取れた関係",
-                "細やかな気配りとサポート"
-            ],
-            "compatibleTypes": [
-                {"type": "ESTP (起業家)", "reason": "活動的なエネルギーとバランス"},
-                {"type": "ESFP (エンターテイナー)", "reason": "楽しさとwarmthの共有"},
-                {"type": "ISFP (冒険家)", "reason": "感受性と価値観の共有"}
-            ]
-        },
-        MBTIType.ESTJ: {
-            "name": "幹部タイプ",
-            "description": "組織力があり、効率的で安定した関係を築く実行力のあるリーダー",
-            "loveCharacteristics": [
-                "責任感と安定性を提供",
-                "効率的で計画的な関係",
-                "家族や将来への責任感",
-                "実用的で現実的なサポート"
-            ],
-            "compatibleTypes": [
-                {"type": "ISFP (冒険家)", "reason": "感受性と創造性のバランス"},
-                {"type": "INFP (仲裁者)", "reason": "価値観と感情面での深さ"},
-                {"type": "ISTP (巨匠)", "reason": "実用性と独立性の尊重"}
-            ]
-        },
-        MBTIType.ESFJ: {
-            "name": "領事タイプ",
-            "description": "社交的で思いやりがあり、調和の取れた関係を築く協力者",
-            "loveCharacteristics": [
-                "調和とコミュニケーションを重視",
-                "パートナーのニーズに敏感",
-                "社交的で家族思い",
-                "感情的なサポートを提供"
-            ],
-            "compatibleTypes": [
-                {"type": "ISFP (冒険家)", "reason": "芸術性と感受性の共有"},
-                {"type": "ISTP (巨匠)", "reason": "実用性と独立性のバランス"},
-                {"type": "INFP (仲裁者)", "reason": "価値観と創造性の共有"}
-            ]
-        },
-        MBTIType.ISTP: {
-            "name": "巨匠タイプ",
-            "description": "独立心があり、実用的で柔軟な関係を好む現実主義者",
-            "loveCharacteristics": [
-                "独立性と自由を重視",
-                "実用的で現実的なアプローチ",
-                "行動で愛情を示す",
-                "冷静で客観的な判断"
-            ],
-            "compatibleTypes": [
-                {"type": "ESFJ (領事)", "reason": "感情面でのサポートと社交性"},
-                {"type": "ESTJ (幹部)", "reason": "効率性と目標達成の共有"},
-                {"type": "ISFJ (擁護者)", "reason": "思いやりと安定性"}
-            ]
-        },
-        MBTIType.ISFP: {
-            "name": "冒険家タイプ",
-            "description": "感受性豊かで、真の理解と美的体験を求める芸術的な魂",
-            "loveCharacteristics": [
-                "感受性と芸術的センス",
-                "価値観の深い共有",
-                "個性と独立性の尊重",
-                "美的体験と感情の共有"
-            ],
-            "compatibleTypes": [
-                {"type": "ENFJ (主人公)", "reason": "感情面での理解とサポート"},
-                {"type": "ESFJ (領事)", "reason": "調和と思いやりの共有"},
-                {"type": "ESTJ (幹部)", "reason": "安定性と責任感のバランス"}
-            ]
-        },
-        MBTIType.ESTP: {
-            "name": "起業家タイプ",
-            "description": "活動的で現実的、楽しく刺激的な関係を築く行動派",
-            "loveCharacteristics": [
-                "活動的で楽しい関係",
-                "現在を楽しむことを重視",
-                "柔軟性と適応性",
-                "エネルギッシュで社交的"
-            ],
-            "compatibleTypes": [
-                {"type": "ISFJ (擁護者)", "reason": "安定性と思いやりのバランス"},
-                {"type": "ISTJ (管理者)", "reason": "責任感と実用性の共有"},
-                {"type": "INFJ (提唱者)", "reason": "深い理解と長期的視点"}
-            ]
-        },
-        MBTIType.ESFP: {
-            "name": "エンターテイナータイプ",
-            "description": "楽しく温かい、人生を共に楽しむパートナーを求める自由な魂",
-            "loveCharacteristics": [
-                "楽しさと喜びを共有",
-                "温かく思いやりがある",
-                "spontaneousで柔軟",
-                "人との繋がりを大切にする"
-            ],
-            "compatibleTypes": [
-                {"type": "ISTJ (管理者)", "reason": "安定性と責任感のバランス"},
-                {"type": "ISFJ (擁護者)", "reason": "思いやりと調和の共有"},
-                {"type": "INTJ (建築家)", "reason": "深いビジョンと戦略的思考"}
-            ]
-        }
-    }
-    
-    return type_descriptions.get(mbti_type, {
+    return MBTI_TYPE_DESCRIPTIONS.get(mbti_type, {
         "name": "未知のタイプ",
         "description": "性格タイプの分析結果です",
         "loveCharacteristics": [],
@@ -608,9 +602,10 @@ def get_mbti_description_and_compatibility(mbti_type: MBTIType) -> Dict:
 def generate_personalized_advice(marriage_answers: List[MarriageAnswer]) -> List[PersonalizedAdvice]:
     """パーソナライズドアドバイスを生成"""
     advice = []
+    answers = first_answers(marriage_answers)
     
     # 質問1: コミュニケーション
-    comm_answer = next((a.answer for a in marriage_answers if a.questionId == 0), 3)
+    comm_answer = answers.get(0, 3)
     if comm_answer <= 2:
         advice.append(PersonalizedAdvice(
             category="コミュニケーション",
@@ -623,7 +618,7 @@ def generate_personalized_advice(marriage_answers: List[MarriageAnswer]) -> List
         ))
     
     # 質問2: ライフスタイル
-    lifestyle_answer = next((a.answer for a in marriage_answers if a.questionId == 1), 3)
+    lifestyle_answer = answers.get(1, 3)
     if lifestyle_answer <= 2:
         advice.append(PersonalizedAdvice(
             category="ライフスタイル",
@@ -636,7 +631,7 @@ def generate_personalized_advice(marriage_answers: List[MarriageAnswer]) -> List
         ))
     
     # 質問3: 価値観
-    values_answer = next((a.answer for a in marriage_answers if a.questionId == 2), 3)
+    values_answer = answers.get(2, 3)
     if values_answer <= 2:
         advice.append(PersonalizedAdvice(
             category="価値観",
@@ -649,7 +644,7 @@ def generate_personalized_advice(marriage_answers: List[MarriageAnswer]) -> List
         ))
     
     # 質問4: 将来設計
-    future_answer = next((a.answer for a in marriage_answers if a.questionId == 3), 3)
+    future_answer = answers.get(3, 3)
     if future_answer <= 2:
         advice.append(PersonalizedAdvice(
             category="将来設計",
@@ -0,0 +1,305 @@
+"""
+結婚観の近いユーザー・サンプルペルソナの検索
+
+結婚観カテゴリ別スコア（1.0-5.0）から中立値 3.0 を引き、長さ 1 に正規化したベクトルを
+float32 の行列として保持する。検索は行列とクエリの内積（コサイン類似度）を1回で計算し、
+上位 k 件だけを選ぶため、100万件でも数ミリ秒で応答できる。
+
+中立値を引くことで「どのカテゴリでどちら寄りか」の向きを比べる（全カテゴリが 3.0 の
+ベクトルは向きを持たないため、類似度は 0 になる）。
+
+ユーザーの診断結果は marriage_mbti_results テーブルに保存され、最新の結果で類似ユーザー検索への
+掲載に同意した（discoverable）ユーザーだけを索引に載せる。最新の結果で同意していなければ
+索引から外す。索引は確認間隔ごとに前回以降に保存された行だけを読み足す。
+検索結果に返すのはユーザーIDと類似度だけで、他のユーザーのスコアそのものは返さない。
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+from models.marriage_mbti import MarriageMBTIRecord
+from schemas.marriage_mbti import MarriageCategory, MarriageMBTIResult, MarriageScore
+from services.compatibility import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+MARRIAGE_CATEGORIES = [c.value for c in MarriageCategory]
+NEUTRAL_SCORE = 3.0
+
+# 新しく保存された診断結果を読み足す間隔（秒）
+SIMILARITY_CHECK_INTERVAL = float(os.getenv("MARRIAGE_SIMILARITY_CHECK_INTERVAL", "30"))
+# 1回の読み込みで取得する行数
+SIMILARITY_LOAD_BATCH = 50000
+
+# 結婚観の典型例（スコアが低いほど論理的・活動的・価値観の一致を重視、高いほど感情的・穏やか・多様性を重視）
+SAMPLE_PERSONAS = [
+    {
+        "id": "logical-planner",
+        "name": "堅実なプランナー",
+        "description": "話し合いで物事を決め、お金や将来の計画をしっかり立てたいタイプ",
+        "scores": {"communication": 1.5, "lifestyle": 2.5, "values": 2.0, "future": 1.5, "intimacy": 3.0}
+    },
+    {
+        "id": "active-partner",
+        "name": "アクティブな相棒",
+        "description": "二人で新しい体験を楽しみ、休日も外に出かけたいタイプ",
+        "scores": {"communication": 3.0, "lifestyle": 1.5, "values": 3.0, "future": 3.0, "intimacy": 2.5}
+    },
+    {
+        "id": "warm-homemaker",
+        "name": "穏やかな家庭派",
+        "description": "家で過ごす時間と気持ちの通い合いを大切にしたいタイプ",
+        "scores": {"communication": 4.5, "lifestyle": 4.5, "values": 3.0, "future": 3.0, "intimacy": 4.0}
+    },
+    {
+        "id": "empathetic-romantic",
+        "name": "共感重視のロマンチスト",
+        "description": "言葉や態度で愛情を伝え合い、感情の理解を何より重視するタイプ",
+        "scores": {"communication": 4.5, "lifestyle": 3.0, "values": 3.5, "future": 3.5, "intimacy": 4.5}
+    },
+    {
+        "id": "independent-equal",
+        "name": "自立したパートナー",
+        "description": "お互いのキャリアと価値観の違いを尊重し、対等な関係を築きたいタイプ",
+        "scores": {"communication": 2.5, "lifestyle": 3.0, "values": 4.5, "future": 4.0, "intimacy": 2.0}
+    },
+    {
+        "id": "traditional-family",
+        "name": "家族第一の伝統派",
+        "description": "価値観の一致と子育て・家族の将来設計を重視するタイプ",
+        "scores": {"communication": 3.0, "lifestyle": 3.5, "values": 1.5, "future": 2.0, "intimacy": 3.5}
+    },
+]
+
+
+def score_vector(scores: Union[MarriageScore, Dict[str, float], Sequence[float]]) -> np.ndarray:
+    """結婚観スコアをカテゴリ順（communication, lifestyle, values, future, intimacy）の配列にする"""
+    if isinstance(scores, MarriageScore):
+        scores = scores.model_dump()
+    if isinstance(scores, dict):
+        scores = [scores[category] for category in MARRIAGE_CATEGORIES]
+    return np.asarray(scores, dtype=np.float32)
+
+
+def normalize_vectors(scores: np.ndarray) -> np.ndarray:
+    """スコア行列（n × 5）を中立値からの向きの単位ベクトルに変換（向きの無い行は 0 ベクトル）"""
+    centered = np.atleast_2d(np.asarray(scores, dtype=np.float32)) - NEUTRAL_SCORE
+    norms = np.linalg.norm(centered, axis=1, keepdims=True)
+    return np.divide(centered, norms, out=np.zeros_like(centered), where=norms > 0)
+
+
+class MarriageSimilarityIndex:
+    """結婚観スコアの類似検索の索引（ID ごとに1件、同じ ID の追加は上書き）"""
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(capacity, 1)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._vectors = np.empty((capacity, len(MARRIAGE_CATEGORIES)), dtype=np.float32)
+        self._rows: Dict[int, int] = {}  # ID -> 行番号
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._ids)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name in ("_ids", "_vectors"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def upsert_many(self, ids: Iterable[int], scores: np.ndarray) -> None:
+        """ID とスコア行列（n × 5）をまとめて追加する（同じ ID が複数あれば後の行を採用）"""
+        scores = np.atleast_2d(np.asarray(scores, dtype=np.float32))
+        latest: Dict[int, int] = {}  # ID -> scores の行番号
+        for position, item_id in enumerate(ids):
+            latest[int(item_id)] = position
+        if not latest:
+            return
+
+        rows = np.empty(len(latest), dtype=np.int64)
+        size = self._size
+        for n, item_id in enumerate(latest):
+            row = self._rows.get(item_id)
+            if row is None:
+                row = self._rows[item_id] = size
+                size += 1
+            rows[n] = row
+        self._reserve(size)
+
+        positions = np.fromiter(latest.values(), dtype=np.int64, count=len(latest))
+        self._ids[rows] = np.fromiter(latest.keys(), dtype=np.int64, count=len(latest))
+        self._vectors[rows] = normalize_vectors(scores[positions])
+        self._size = size
+
+    def upsert(self, item_id: int, scores: Union[MarriageScore, Dict[str, float], Sequence[float]]) -> None:
+        """1件追加する（既にある ID は上書き）"""
+        self.upsert_many([item_id], score_vector(scores)[np.newaxis, :])
+
+    def remove(self, item_id: int) -> None:
+        """ID を索引から外す（無ければ何もしない）。最後の行を空いた行へ移して詰める"""
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            moved_id = int(self._ids[last])
+            self._ids[row] = moved_id
+            self._vectors[row] = self._vectors[last]
+            self._rows[moved_id] = row
+        self._size = last
+
+    def search(
+        self,
+        scores: Union[MarriageScore, Dict[str, float], Sequence[float]],
+        k: int = 10,
+        exclude_id: Optional[int] = None
+    ) -> List[dict]:
+        """結婚観の近い順に上位 k 件を返す（exclude_id は結果から除く）"""
+        if self._size == 0:
+            return []
+        query = normalize_vectors(score_vector(scores))[0]
+        similarities = self._vectors[:self._size] @ query
+        exclude_row = self._rows.get(exclude_id) if exclude_id is not None else None
+        if exclude_row is not None:
+            similarities[exclude_row] = -np.inf
+
+        results = []
+        for row in top_k_indices(similarities, k).tolist():
+            if row == exclude_row:
+                continue
+            results.append({
+                "id": int(self._ids[row]),
+                "similarity": round(float(similarities[row]), 4)
+            })
+        return results
+
+
+def _build_persona_index() -> MarriageSimilarityIndex:
+    index = MarriageSimilarityIndex(capacity=len(SAMPLE_PERSONAS))
+    index.upsert_many(
+        range(len(SAMPLE_PERSONAS)),
+        np.array([[p["scores"][c] for c in MARRIAGE_CATEGORIES] for p in SAMPLE_PERSONAS])
+    )
+    return index
+
+
+PERSONA_INDEX = _build_persona_index()
+
+
+def find_similar_personas(scores: Union[MarriageScore, Dict[str, float]], k: int = 3) -> List[dict]:
+    """結婚観の近いサンプルペルソナを返す"""
+    results = []
+    for result in PERSONA_INDEX.search(scores, k):
+        persona = SAMPLE_PERSONAS[result["id"]]
+        results.append({
+            "id": persona["id"],
+            "name": persona["name"],
+            "description": persona["description"],
+            "similarity": result["similarity"],
+            "scores": persona["scores"]
+        })
+    return results
+
+
+class MarriageSimilarityStore:
+    """保存済みの診断結果から索引を作り、新しい行を読み足す"""
+
+    def __init__(self, check_interval: float = SIMILARITY_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._index = MarriageSimilarityIndex()
+        self._last_id = 0
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    async def _load_new_rows(self, db: AsyncSession) -> int:
+        loaded = 0
+        while True:
+            rows = (await db.execute(
+                select(
+                    MarriageMBTIRecord.id,
+                    MarriageMBTIRecord.user_id,
+                    MarriageMBTIRecord.discoverable,
+                    *(getattr(MarriageMBTIRecord, c) for c in MARRIAGE_CATEGORIES)
+                )
+                .where(MarriageMBTIRecord.id > self._last_id)
+                .order_by(MarriageMBTIRecord.id)
+                .limit(SIMILARITY_LOAD_BATCH)
+            )).all()
+            if not rows:
+                return loaded
+            data = np.array(rows, dtype=np.float64)
+            user_ids = data[:, 1].astype(np.int64)
+            # ユーザーごとの最新の行で、同意していれば載せ、していなければ外す
+            _, last_positions = np.unique(user_ids[::-1], return_index=True)
+            latest = len(user_ids) - 1 - last_positions
+            shared = latest[data[latest, 2] != 0]
+            for user_id in user_ids[latest[data[latest, 2] == 0]].tolist():
+                self._index.remove(user_id)
+            self._index.upsert_many(user_ids[shared], data[shared, 3:])
+            self._last_id = int(data[-1, 0])
+            loaded += len(rows)
+
+    async def get(self, db: AsyncSession) -> MarriageSimilarityIndex:
+        """索引を取得（確認間隔を過ぎていれば新しく保存された結果を読み足す）"""
+        if self._is_fresh():
+            return self._index
+
+        async with self._lock:
+            if self._is_fresh():
+                return self._index
+            loaded = await self._load_new_rows(db)
+            if loaded:
+                logger.info(f"結婚観の類似検索索引に{loaded}件を読み込みました（ユーザー数: {len(self._index)}）")
+            self._checked_at = time.monotonic()
+            return self._index
+
+    def add(self, record: MarriageMBTIRecord) -> None:
+        """このワーカーで保存した結果を即座に索引へ反映する（他のワーカーの分は次回の読み足しで反映）"""
+        if record.discoverable:
+            self._index.upsert(record.user_id, [getattr(record, c) for c in MARRIAGE_CATEGORIES])
+        else:
+            self._index.remove(record.user_id)
+
+
+similarity_store = MarriageSimilarityStore()
+
+
+async def get_marriage_similarity_index(db: AsyncSession = Depends(get_async_db)) -> MarriageSimilarityIndex:
+    """FastAPI 依存関係: 結婚観の類似検索索引を返す"""
+    return await similarity_store.get(db)
+
+
+async def save_marriage_result(
+    db: AsyncSession,
+    user_id: int,
+    result: MarriageMBTIResult,
+    discoverable: bool = False
+) -> MarriageMBTIRecord:
+    """診断結果を保存し、このワーカーの索引にすぐ反映する（discoverable=False なら索引から外す）"""
+    record = MarriageMBTIRecord(
+        user_id=user_id,
+        mbti_type=result.mbtiType.value,
+        discoverable=discoverable,
+        **{category: getattr(result.marriageScores, category) for category in MARRIAGE_CATEGORIES}
+    )
+    db.add(record)
+    await db.commit()
+    similarity_store.add(record)
+    return record
@@ -0,0 +1,77 @@
+"""
+OpenAIクライアントのレジストリ
+
+アプリケーション全体で1つの AsyncOpenAI クライアントを共有し、
+リクエストごとのTLSハンドシェイクや接続確立を避ける。
+"""
+import os
+import logging
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+# コネクションプール設定（環境変数で調整可能）
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "true").lower() == "true"
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """keep-alive プール付きの httpx クライアントを作成"""
+    limits = httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+    try:
+        return httpx.AsyncClient(http2=OPENAI_HTTP2, limits=limits, timeout=timeout)
+    except ImportError:
+        # h2 パッケージが無い環境では HTTP/1.1 で接続する
+        logger.warning("h2 がインストールされていないため HTTP/1.1 で接続します")
+        return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+class OpenAIClientRegistry:
+    """アプリケーションスコープの AsyncOpenAI クライアントを管理する"""
+
+    def __init__(self):
+        self._client: Optional[AsyncOpenAI] = None
+
+    def get(self) -> Optional[AsyncOpenAI]:
+        """共有クライアントを取得（APIキー未設定の場合は None）"""
+        if self._client is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                return None
+
+            self._client = AsyncOpenAI(
+                api_key=api_key,
+                http_client=_create_http_client(),
+                max_retries=OPENAI_MAX_RETRIES,
+            )
+            logger.info("OpenAIクライアントを初期化しました")
+
+        return self._client
+
+    async def aclose(self) -> None:
+        """コネクションプールを閉じる（アプリ終了時）"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+openai_registry = OpenAIClientRegistry()
+
+
+def get_openai_client() -> Optional[AsyncOpenAI]:
+    """FastAPI 依存関係: 共有 OpenAI クライアントを返す"""
+    return openai_registry.get()
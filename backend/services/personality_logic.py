@@ -1,5 +1,6 @@
 from typing import Dict, List, Tuple
 from enum import Enum
+from services.question_index import build_question_index, bucket_option_scores
 
 
 class PersonalityType(str, Enum):
@@ -136,6 +137,9 @@ PERSONALITY_QUESTIONS = [
     }
 ]
 
+# 質問ID -> (性格軸, 選択肢ごとのスコア)
+PERSONALITY_QUESTION_INDEX = build_question_index(PERSONALITY_QUESTIONS)
+
 
 def calculate_personality_scores(answers: Dict[int, int]) -> Dict[PersonalityDimension, float]:
     """
@@ -147,15 +151,7 @@ def calculate_personality_scores(answers: Dict[int, int]) -> Dict[PersonalityDim
     Returns:
         各性格軸のスコア (0-100)
     """
-    dimension_scores = {dim: [] for dim in PersonalityDimension}
-    
-    for question in PERSONALITY_QUESTIONS:
-        question_id = question["id"]
-        if question_id in answers:
-            selected_option_index = answers[question_id]
-            if 0 <= selected_option_index < len(question["options"]):
-                score = question["options"][selected_option_index]["score"]
-                dimension_scores[question["dimension"]].append(score)
+    dimension_scores = bucket_option_scores(answers, PERSONALITY_QUESTION_INDEX, PersonalityDimension)
     
     # 各軸の平均スコアを計算し、100点満点に変換
     result = {}
@@ -255,17 +251,19 @@ def get_personality_description(personality_type: PersonalityType) -> Dict[str,
     })
 
 
+# 性格タイプごとの相性の良いタイプ（相性の良い順）
+PERSONALITY_COMPATIBILITY_MAP = {
+    PersonalityType.COMMUNICATOR: [PersonalityType.SUPPORTER, PersonalityType.ANALYST, PersonalityType.RELIABLE],
+    PersonalityType.SUPPORTER: [PersonalityType.COMMUNICATOR, PersonalityType.LEADER, PersonalityType.CREATIVE],
+    PersonalityType.LEADER: [PersonalityType.SUPPORTER, PersonalityType.ANALYST, PersonalityType.RELIABLE],
+    PersonalityType.ANALYST: [PersonalityType.COMMUNICATOR, PersonalityType.LEADER, PersonalityType.CREATIVE],
+    PersonalityType.CREATIVE: [PersonalityType.SUPPORTER, PersonalityType.ANALYST, PersonalityType.RELIABLE],
+    PersonalityType.RELIABLE: [PersonalityType.COMMUNICATOR, PersonalityType.LEADER, PersonalityType.CREATIVE],
+}
+
+
 def get_compatible_types(personality_type: PersonalityType) -> List[PersonalityType]:
     """
     相性の良い性格タイプを取得
     """
-    compatibility_map = {
-        PersonalityType.COMMUNICATOR: [PersonalityType.SUPPORTER, PersonalityType.ANALYST, PersonalityType.RELIABLE],
-        PersonalityType.SUPPORTER: [PersonalityType.COMMUNICATOR, PersonalityType.LEADER, PersonalityType.CREATIVE],
-        PersonalityType.LEADER: [PersonalityType.SUPPORTER, PersonalityType.ANALYST, PersonalityType.RELIABLE],
-        PersonalityType.ANALYST: [PersonalityType.COMMUNICATOR, PersonalityType.LEADER, PersonalityType.CREATIVE],
-        PersonalityType.CREATIVE: [PersonalityType.SUPPORTER, PersonalityType.ANALYST, PersonalityType.RELIABLE],
-        PersonalityType.RELIABLE: [PersonalityType.COMMUNICATOR, PersonalityType.LEADER, PersonalityType.CREATIVE],
-    }
-    
-    return compatibility_map.get(personality_type, [])
\ No newline at end of file
+    return list(PERSONALITY_COMPATIBILITY_MAP.get(personality_type, []))
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+深堀り質問カタログのインメモリキャッシュ
+
+質問データは seed_deep_questions.py などのスクリプト実行時にしか変わらないため、
+有効な質問を起動時にメモリへ読み込み、カテゴリー・レベル別の索引と
+シリアライズ済みのレスポンスを保持して配信する。
+
+データの変更は「バージョン」（件数・最大ID・最終更新日時から作るフィンガープリント）で
+検出する。DEEP_QUESTION_CATALOG_CHECK_INTERVAL 秒ごとにバージョンだけを確認し、
+変わっていれば読み込み直す。同じプロセス内で変更した場合は invalidate() で即時に反映できる。
+"""
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+from models.deep_question import DeepQuestion
+from models import schemas
+from services.http_cache import to_json_bytes
+
+logger = logging.getLogger(__name__)
+
+# バージョン確認の間隔（秒）
+CATALOG_CHECK_INTERVAL = float(os.getenv("DEEP_QUESTION_CATALOG_CHECK_INTERVAL", "60"))
+
+
+class QuestionCatalog:
+    """ある時点の有効な質問一覧（読み取り専用）"""
+
+    def __init__(self, version: str, questions: List[dict]):
+        self.version = version
+        self.etag = f'"dq-{version}"'
+        self.questions = questions  # ID順
+        self.by_id: Dict[int, dict] = {q["id"]: q for q in questions}
+        self.by_category: Dict[str, List[dict]] = {}
+        self.by_level: Dict[int, List[dict]] = {}
+        for question in questions:
+            self.by_category.setdefault(question["category"], []).append(question)
+            self.by_level.setdefault(question["level"], []).append(question)
+
+        self.category_totals = {category: len(items) for category, items in self.by_category.items()}
+        self.categories_json = to_json_bytes(
+            [{"value": "all", "label": "すべて"}] + [{"value": c, "label": c} for c in self.by_category]
+        )
+        self._question_json = {q["id"]: to_json_bytes(q) for q in questions}
+        self._list_json: Dict[Tuple, bytes] = {}
+
+    def filter(self, category: Optional[str] = None, level: Optional[int] = None) -> List[dict]:
+        """カテゴリー・レベルで絞り込んだ質問（ID順）"""
+        if category and category != "all":
+            questions = self.by_category.get(category, [])
+            if level:
+                questions = [q for q in questions if q["level"] == level]
+        elif level:
+            questions = self.by_level.get(level, [])
+        else:
+            questions = self.questions
+        return questions
+
+    def list_json(self, category: Optional[str] = None, level: Optional[int] = None,
+                  limit: Optional[int] = None) -> bytes:
+        """絞り込み結果のシリアライズ済み JSON（条件ごとにメモ化）"""
+        questions = self.filter(category, level)
+        if not questions:
+            return b"[]"
+        if not limit or limit <= 0 or limit >= len(questions):
+            limit = None
+
+        # 存在するカテゴリー・レベルと件数以下の limit だけがキーになるため、メモの大きさは有限
+        key = (category if category != "all" else None, level or None, limit)
+        body = self._list_json.get(key)
+        if body is None:
+            body = to_json_bytes(questions[:limit] if limit else questions)
+            self._list_json[key] = body
+        return body
+
+    def question_json(self, question_id: int) -> Optional[bytes]:
+        return self._question_json.get(question_id)
+
+
+class QuestionCatalogStore:
+    """カタログの読み込みとバージョン確認を行う"""
+
+    def __init__(self, check_interval: float = CATALOG_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._catalog: Optional[QuestionCatalog] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    async def _fetch_version(db: AsyncSession) -> str:
+        row = (await db.execute(
+            select(func.count(DeepQuestion.id), func.max(DeepQuestion.id), func.max(DeepQuestion.updated_at))
+        )).one()
+        fingerprint = f"{row[0]}:{row[1]}:{row[2]}"
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+
+    async def _load(self, db: AsyncSession, version: str) -> QuestionCatalog:
+        result = await db.execute(
+            select(DeepQuestion).where(DeepQuestion.is_active == True).order_by(DeepQuestion.id)
+        )
+        questions = [
+            schemas.DeepQuestionResponse.model_validate(question).model_dump(mode="json")
+            for question in result.scalars()
+        ]
+        logger.info(f"深堀り質問カタログを読み込みました: {len(questions)}件 (version={version})")
+        return QuestionCatalog(version, questions)
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._catalog is not None
+            and self._checked_at is not None
+            and time.monotonic() - self._checked_at < self.check_interval
+        )
+
+    async def get(self, db: AsyncSession) -> QuestionCatalog:
+        """カタログを取得（確認間隔を過ぎていればバージョンを確認し、変わっていれば読み込み直す）"""
+        if self._is_fresh():
+            return self._catalog
+
+        async with self._lock:
+            # 待っている間に他のリクエストが更新した場合
+            if self._is_fresh():
+                return self._catalog
+
+            version = await self._fetch_version(db)
+            if self._catalog is None or self._catalog.version != version:
+                self._catalog = await self._load(db, version)
+            self._checked_at = time.monotonic()
+            return self._catalog
+
+    def invalidate(self) -> None:
+        """次回アクセス時にバージョンを確認させる"""
+        self._checked_at = None
+
+
+catalog_store = QuestionCatalogStore()
+
+
+async def get_question_catalog(db: AsyncSession = Depends(get_async_db)) -> QuestionCatalog:
+    """FastAPI 依存関係: 現在の質問カタログを返す"""
+    return await catalog_store.get(db)
@@ -0,0 +1,58 @@
+"""
+診断の質問索引と回答の振り分け（性格診断・Marriage MBTI+ の採点で共有）
+
+質問一覧を採点のたびに先頭から探さずに済むよう、質問ID → (軸, 選択肢ごとのスコア) の
+索引を起動時に作っておき、回答は1回の走査で軸ごとに振り分ける。
+"""
+from typing import Any, Dict, Hashable, Iterable, List, Sequence, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+# 質問ID -> (軸, 選択肢インデックス順のスコア)
+QuestionIndex = Dict[int, Tuple[Any, Tuple[int, ...]]]
+
+
+def build_question_index(questions: Sequence[Dict[str, Any]]) -> QuestionIndex:
+    """"id" / "dimension" / "options"（各選択肢に "score"）を持つ質問一覧から索引を作る"""
+    return {
+        question["id"]: (question["dimension"], tuple(option["score"] for option in question["options"]))
+        for question in questions
+    }
+
+
+def bucket_option_scores(
+    answers: Dict[int, int],
+    index: QuestionIndex,
+    buckets: Iterable[K]
+) -> Dict[K, List[int]]:
+    """
+    回答 {質問ID: 選択肢インデックス} を1回の走査で軸ごとのスコアに振り分ける
+
+    索引に無い質問・範囲外の選択肢は無視する。
+    """
+    result: Dict[K, List[int]] = {bucket: [] for bucket in buckets}
+    for question_id, option_index in answers.items():
+        entry = index.get(question_id)
+        if entry is None:
+            continue
+        dimension, option_scores = entry
+        if 0 <= option_index < len(option_scores):
+            result[dimension].append(option_scores[option_index])
+    return result
+
+
+def bucket_answers(answers: Iterable[Any], categories: Sequence[K], buckets: Iterable[K]) -> Dict[K, List[Any]]:
+    """questionId / answer を持つ回答を、categories[questionId] ごとに1回の走査で振り分ける"""
+    result: Dict[K, List[Any]] = {bucket: [] for bucket in buckets}
+    for answer in answers:
+        result[categories[answer.questionId]].append(answer.answer)
+    return result
+
+
+def first_answers(answers: Iterable[Any]) -> Dict[int, Any]:
+    """questionId / answer を持つ回答から、質問IDごとに最初の回答を引ける辞書を作る"""
+    result: Dict[int, Any] = {}
+    for answer in answers:
+        if answer.questionId not in result:
+            result[answer.questionId] = answer.answer
+    return result
@@ -0,0 +1,102 @@
+"""
+深堀り質問の出題スケジューラー（間隔反復）
+
+回答のたびに DeepQuestionProgress の streak（連続正解回数）と due_at（次の復習日時）を更新し、
+(user_id, due_at) の複合インデックスを優先度付きの索引として使う。
+次に出す問題は「期限を過ぎた復習（期限の古い順）→ まだ解いていない問題（ID順）」の順で選ぶ。
+どちらも有効な質問との結合・NOT EXISTS と LIMIT で DB 側で絞り込むため、
+ユーザーの回答履歴をすべて読み込む必要はない。
+
+間隔は REVIEW_INTERVAL_DAYS に従って正解が続くほど長くなり、不正解の問題は
+REVIEW_RETRY_MINUTES 後にもう一度出題される。
+"""
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.deep_question import DeepQuestion, DeepQuestionProgress
+from services.question_catalog import QuestionCatalog
+
+# 連続正解回数ごとの復習間隔（日）。最後の値以降は同じ間隔で復習する
+REVIEW_INTERVAL_DAYS = [int(days) for days in os.getenv("REVIEW_INTERVAL_DAYS", "1,3,7,14,30,60").split(",")]
+# 不正解だった問題を再出題するまでの時間（分）
+REVIEW_RETRY_MINUTES = int(os.getenv("REVIEW_RETRY_MINUTES", "10"))
+
+
+def review_interval(streak: int) -> timedelta:
+    """連続正解回数に応じた次の復習までの間隔"""
+    if streak <= 0:
+        return timedelta(minutes=REVIEW_RETRY_MINUTES)
+    return timedelta(days=REVIEW_INTERVAL_DAYS[min(streak, len(REVIEW_INTERVAL_DAYS)) - 1])
+
+
+def schedule_review(progress: DeepQuestionProgress, is_correct: bool, now: Optional[datetime] = None) -> None:
+    """回答結果から連続正解回数と次の復習日時を更新"""
+    now = now or datetime.utcnow()
+    progress.streak = (progress.streak or 0) + 1 if is_correct else 0
+    progress.completed_at = now
+    progress.due_at = now + review_interval(progress.streak)
+
+
+def _question_conditions(category: Optional[str], level: Optional[int]) -> list:
+    """出題対象（有効な質問、カテゴリー・レベルの絞り込み）の条件。QuestionCatalog.filter と同じ意味"""
+    conditions = [DeepQuestion.is_active == True]
+    if category and category != "all":
+        conditions.append(DeepQuestion.category == category)
+    if level:
+        conditions.append(DeepQuestion.level == level)
+    return conditions
+
+
+async def next_question_batch(
+    db: AsyncSession,
+    catalog: QuestionCatalog,
+    user_id: int,
+    limit: int = 10,
+    category: Optional[str] = None,
+    level: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> List[dict]:
+    """
+    次に出題する問題を最大 limit 件選ぶ
+
+    期限切れの復習を (user_id, due_at) インデックスの範囲走査で期限の古い順に取り、
+    足りない分を未回答の問題（ID順）で埋める。どちらも出題対象の質問との結合で絞り込んだうえで
+    LIMIT を掛けるため、無効化された問題があっても件数が不足しない。期限前の問題は含めない。
+    """
+    now = now or datetime.utcnow()
+    if limit <= 0 or not catalog.filter(category, level):
+        return []
+    conditions = _question_conditions(category, level)
+
+    due_ids = (await db.execute(
+        select(DeepQuestionProgress.question_id)
+        .join(DeepQuestion, DeepQuestion.id == DeepQuestionProgress.question_id)
+        .where(
+            DeepQuestionProgress.user_id == user_id,
+            DeepQuestionProgress.due_at <= now,
+            *conditions
+        )
+        .order_by(DeepQuestionProgress.due_at, DeepQuestionProgress.id)
+        .limit(limit)
+    )).scalars().all()
+
+    # 未回答の問題で埋める（(user_id, question_id) インデックスによる NOT EXISTS）
+    unseen_ids = []
+    if len(due_ids) < limit:
+        answered = exists().where(
+            DeepQuestionProgress.user_id == user_id,
+            DeepQuestionProgress.question_id == DeepQuestion.id
+        )
+        unseen_ids = (await db.execute(
+            select(DeepQuestion.id)
+            .where(*conditions, ~answered)
+            .order_by(DeepQuestion.id)
+            .limit(limit - len(due_ids))
+        )).scalars().all()
+
+    # カタログの再読み込み前に追加された質問はまだ出題しない
+    return [catalog.by_id[question_id] for question_id in [*due_ids, *unseen_ids] if question_id in catalog.by_id]
@@ -0,0 +1,147 @@
+"""
+深堀り質問のユーザー別統計
+
+回答・シャドウィング練習の記録時に user_question_stats を同じトランザクションで
+更新しておき、統計画面は主キーでの1行読み込みだけで表示できるようにする。
+集計行がまだ無いユーザー（導入前からの利用者）は初回アクセス時に既存の記録から作成する。
+"""
+from typing import Dict, Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.deep_question import DeepQuestion, DeepQuestionProgress, ShadowingSession, UserQuestionStats
+
+
+async def _build_stats_from_history(db: AsyncSession, user_id: int) -> UserQuestionStats:
+    """既存の回答・シャドウィング記録から集計行を作成"""
+    category_rows = await db.execute(
+        select(
+            DeepQuestion.category,
+            func.count(DeepQuestionProgress.id),
+            func.sum(case((DeepQuestionProgress.is_correct == True, 1), else_=0))
+        )
+        .join(DeepQuestion, DeepQuestion.id == DeepQuestionProgress.question_id)
+        .where(DeepQuestionProgress.user_id == user_id)
+        .group_by(DeepQuestion.category)
+    )
+    category_progress = {
+        category: {"attempted": attempted, "correct": int(correct or 0)}
+        for category, attempted, correct in category_rows
+    }
+
+    shadowing = (await db.execute(
+        select(
+            func.count(ShadowingSession.id),
+            func.coalesce(func.sum(ShadowingSession.duration_seconds), 0),
+            func.count(ShadowingSession.duration_seconds),
+            func.coalesce(func.sum(ShadowingSession.tone_score), 0),
+            func.count(ShadowingSession.tone_score),
+            func.coalesce(func.sum(ShadowingSession.speed_score), 0),
+            func.count(ShadowingSession.speed_score)
+        ).where(ShadowingSession.user_id == user_id)
+    )).one()
+
+    return UserQuestionStats(
+        user_id=user_id,
+        attempted_questions=sum(c["attempted"] for c in category_progress.values()),
+        correct_answers=sum(c["correct"] for c in category_progress.values()),
+        category_progress=category_progress,
+        shadowing_sessions=shadowing[0],
+        duration_total=int(shadowing[1]),
+        duration_count=shadowing[2],
+        tone_score_total=int(shadowing[3]),
+        tone_score_count=shadowing[4],
+        speed_score_total=int(shadowing[5]),
+        speed_score_count=shadowing[6]
+    )
+
+
+async def load_user_stats(db: AsyncSession, user_id: int, for_update: bool = False) -> UserQuestionStats:
+    """
+    ユーザーの集計行を取得（無ければ作成）
+
+    for_update=True の場合は行ロックを取得し、同じユーザーの同時更新を直列化する。
+    更新する場合は、今回の回答などを追加する前に呼び出すこと。
+    """
+    query = select(UserQuestionStats).where(UserQuestionStats.user_id == user_id)
+    if for_update:
+        query = query.with_for_update()
+
+    stats = (await db.execute(query)).scalars().first()
+    if stats is not None:
+        return stats
+
+    stats = await _build_stats_from_history(db, user_id)
+    try:
+        async with db.begin_nested():
+            db.add(stats)
+    except IntegrityError:
+        # 同時リクエストが先に作成した場合はその行を使う
+        stats = (await db.execute(query.execution_options(populate_existing=True))).scalars().one()
+    return stats
+
+
+def record_answer(stats: UserQuestionStats, category: str, was_correct: Optional[bool], is_correct: bool) -> None:
+    """回答を集計に反映（was_correct は再挑戦時の前回の結果、初回は None）"""
+    category_progress = {key: dict(value) for key, value in (stats.category_progress or {}).items()}
+    progress = category_progress.setdefault(category, {"attempted": 0, "correct": 0})
+
+    if was_correct is None:
+        stats.attempted_questions += 1
+        progress["attempted"] += 1
+    correct_delta = int(is_correct) - int(bool(was_correct))
+    stats.correct_answers += correct_delta
+    progress["correct"] += correct_delta
+
+    # JSON 列は再代入しないと変更が検出されない
+    stats.category_progress = category_progress
+
+
+def record_shadowing(stats: UserQuestionStats, duration_seconds: Optional[int],
+                     tone_score: Optional[int], speed_score: Optional[int]) -> None:
+    """シャドウィング練習を集計に反映"""
+    stats.shadowing_sessions += 1
+    if duration_seconds is not None:
+        stats.duration_total += duration_seconds
+        stats.duration_count += 1
+    if tone_score is not None:
+        stats.tone_score_total += tone_score
+        stats.tone_score_count += 1
+    if speed_score is not None:
+        stats.speed_score_total += speed_score
+        stats.speed_score_count += 1
+
+
+def _average(total: int, count: int) -> float:
+    return round(total / count, 2) if count else 0
+
+
+def build_stats_response(stats: UserQuestionStats, category_totals: Dict[str, int]) -> dict:
+    """統計APIのレスポンスを作成（category_totals は有効な質問のカテゴリー別件数）"""
+    attempted = stats.attempted_questions
+    accuracy_rate = (stats.correct_answers / attempted * 100) if attempted > 0 else 0
+
+    category_progress = {}
+    for category in category_totals:
+        progress = (stats.category_progress or {}).get(category, {"attempted": 0, "correct": 0})
+        category_progress[category] = {
+            "attempted": progress["attempted"],
+            "correct": progress["correct"],
+            "accuracy": (progress["correct"] / progress["attempted"] * 100) if progress["attempted"] > 0 else 0
+        }
+
+    return {
+        "total_questions": sum(category_totals.values()),
+        "attempted_questions": attempted,
+        "correct_answers": stats.correct_answers,
+        "accuracy_rate": round(accuracy_rate, 2),
+        "category_progress": category_progress,
+        "shadowing_stats": {
+            "total_sessions": stats.shadowing_sessions,
+            "avg_duration": _average(stats.duration_total, stats.duration_count),
+            "avg_tone_score": _average(stats.tone_score_total, stats.tone_score_count),
+            "avg_speed_score": _average(stats.speed_score_total, stats.speed_score_count)
+        }
+    }
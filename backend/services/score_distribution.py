@@ -0,0 +1,249 @@
+"""
+診断スコアの分布とパーセンタイル
+
+性格診断の軸別スコア（0-100、0.1刻み）と結婚観カテゴリ別スコア（1.0-5.0）は値域と刻みが
+決まっているため、分布は固定幅の区間ごとの件数（ヒストグラム）で持つ。件数を足すだけで
+ワーカー間の集計を合算でき、メモリは区間数で一定、パーセンタイルは累積件数の参照だけで
+求まる（過去の結果を読み直す必要はない）。
+
+分布に加えるのはログインユーザーの最初の診断結果だけで、匿名の診断や再診断は分布に加えずに
+位置（パーセンタイル）だけを返す（同じ人の繰り返しの送信で全員の分布が偏らないように）。
+
+各ワーカーは分布に加える診断のたびに手元の未反映分に加算し、一定間隔で score_distributions テーブルの
+件数に足し込んで全体の分布を読み直す。パーセンタイルは「全体の分布 + 未反映分」で計算する。
+"""
+import os
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.score_distribution import ScoreDistribution
+from schemas.marriage_mbti import MarriageCategory
+from services.personality_logic import PersonalityDimension
+
+logger = logging.getLogger(__name__)
+
+# 未反映分をテーブルに足し込む間隔（秒）
+DISTRIBUTION_SYNC_INTERVAL = float(os.getenv("SCORE_DISTRIBUTION_SYNC_INTERVAL", "60"))
+
+
+class ScoreSketch:
+    """値域 [low, high] を resolution 刻みの区間に分けたヒストグラム"""
+
+    def __init__(self, low: float, high: float, resolution: float, counts: Optional[Sequence[int]] = None):
+        self.low = low
+        self.resolution = resolution
+        size = int(round((high - low) / resolution)) + 1
+        self.counts = np.zeros(size, dtype=np.int64)
+        if counts is not None and len(counts) == size:
+            self.counts[:] = counts
+        self._cumulative: Optional[np.ndarray] = None
+
+    @property
+    def total(self) -> int:
+        return int(self.cumulative[-1])
+
+    @property
+    def cumulative(self) -> np.ndarray:
+        """区間ごとの累積件数（更新後の最初の参照時に計算し直す）"""
+        if self._cumulative is None:
+            self._cumulative = np.cumsum(self.counts)
+        return self._cumulative
+
+    def bin(self, value: float) -> int:
+        return min(max(int(round((value - self.low) / self.resolution)), 0), len(self.counts) - 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        self.counts[self.bin(value)] += count
+        self._cumulative = None
+
+    def merge(self, other: "ScoreSketch") -> None:
+        self.counts += other.counts
+        self._cumulative = None
+
+    def rank(self, value: float) -> tuple:
+        """(value より小さい件数, value と同じ区間の件数)"""
+        index = self.bin(value)
+        below = int(self.cumulative[index - 1]) if index > 0 else 0
+        return below, int(self.counts[index])
+
+    def percentile(self, value: float) -> Optional[float]:
+        """value のパーセンタイル（0-100、同じ値は半分を下とみなす）。件数が無い場合は None"""
+        return percentile_of([self], value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """下から割合 q（0-1）の位置の値。件数が無い場合は None"""
+        total = self.total
+        if total == 0:
+            return None
+        index = int(np.searchsorted(self.cumulative, max(q * total, 1), side="left"))
+        return round(self.low + index * self.resolution, 4)
+
+
+def percentile_of(sketches: Sequence[ScoreSketch], value: float) -> Optional[float]:
+    """同じ区間設定の複数のヒストグラムを合わせた分布での value のパーセンタイル"""
+    below = equal = total = 0
+    for sketch in sketches:
+        b, e = sketch.rank(value)
+        below += b
+        equal += e
+        total += sketch.total
+    if total == 0:
+        return None
+    return round((below + equal / 2) / total * 100, 1)
+
+
+# 分布を持つスコア: 名前 -> (下限, 上限, 刻み)
+PERSONALITY_METRICS = {dimension: f"personality.{dimension.name.lower()}" for dimension in PersonalityDimension}
+MARRIAGE_METRICS = {category.value: f"marriage.{category.value}" for category in MarriageCategory}
+METRICS = {
+    **{metric: (0.0, 100.0, 0.1) for metric in PERSONALITY_METRICS.values()},
+    # 結婚観スコアは1-3問の平均（1/3 刻みの値を含む）のため 0.01 刻みで持つ
+    **{metric: (1.0, 5.0, 0.01) for metric in MARRIAGE_METRICS.values()},
+}
+
+
+def _new_sketch(metric: str, counts: Optional[Sequence[int]] = None) -> ScoreSketch:
+    return ScoreSketch(*METRICS[metric], counts=counts)
+
+
+class ScoreDistributionStore:
+    """ワーカー内の分布（全体の分布 + 未反映分）とテーブルとの同期"""
+
+    def __init__(self):
+        self._snapshot: Dict[str, ScoreSketch] = {}  # 前回の同期時点の全体の分布
+        self._syncing: Dict[str, ScoreSketch] = {}   # 同期中（テーブルへの反映待ち）の分
+        self._pending: Dict[str, ScoreSketch] = {}   # 未反映分
+        self._lock = threading.Lock()
+        self._sync_lock = asyncio.Lock()
+
+    def record(self, values: Dict[str, float]) -> None:
+        """1回分の診断スコア {名前: 値} を分布に加える"""
+        with self._lock:
+            for metric, value in values.items():
+                sketch = self._pending.get(metric)
+                if sketch is None:
+                    sketch = self._pending[metric] = _new_sketch(metric)
+                sketch.add(value)
+
+    def percentiles(self, values: Dict[str, float]) -> Dict[str, Optional[float]]:
+        """{名前: 値} のそれぞれのパーセンタイル（0-100）を返す"""
+        with self._lock:
+            return {
+                metric: percentile_of(
+                    [s[metric] for s in (self._snapshot, self._syncing, self._pending) if metric in s],
+                    value
+                )
+                for metric, value in values.items()
+            }
+
+    def sketch(self, metric: str) -> ScoreSketch:
+        """現在の分布（全体 + 未反映分）のコピー"""
+        with self._lock:
+            merged = _new_sketch(metric)
+            for sketches in (self._snapshot, self._syncing, self._pending):
+                if metric in sketches:
+                    merged.merge(sketches[metric])
+            return merged
+
+    async def sync(self, db: AsyncSession) -> None:
+        """未反映分をテーブルの件数に足し込み、全体の分布を読み直す"""
+        async with self._sync_lock:
+            with self._lock:
+                self._syncing, self._pending = self._pending, {}
+            syncing = self._syncing
+
+            try:
+                rows = {
+                    row.metric: row
+                    for row in (await db.execute(
+                        select(ScoreDistribution)
+                        .where(ScoreDistribution.metric.in_(list(METRICS)))
+                        .with_for_update()
+                    )).scalars()
+                }
+                snapshot = {}
+                for metric in METRICS:
+                    row = rows.get(metric)
+                    sketch = _new_sketch(metric, row.counts if row is not None else None)
+                    if metric in syncing:
+                        sketch.merge(syncing[metric])
+                        if row is None:
+                            db.add(ScoreDistribution(metric=metric, counts=sketch.counts.tolist(), total=sketch.total))
+                        else:
+                            row.counts = sketch.counts.tolist()
+                            row.total = sketch.total
+                    snapshot[metric] = sketch
+                await db.commit()
+            except BaseException:
+                # 反映できなかった分は次回の同期に回す（終了時のキャンセルも含む）
+                with self._lock:
+                    for metric, sketch in syncing.items():
+                        if metric in self._pending:
+                            self._pending[metric].merge(sketch)
+                        else:
+                            self._pending[metric] = sketch
+                    self._syncing = {}
+                await db.rollback()
+                raise
+
+            with self._lock:
+                self._snapshot = snapshot
+                self._syncing = {}
+
+    async def run_periodic_sync(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        interval: float = DISTRIBUTION_SYNC_INTERVAL
+    ) -> None:
+        """interval 秒ごとに同期する（アプリの起動中に実行し続けるタスク用）"""
+        while True:
+            try:
+                async with session_factory() as db:
+                    await self.sync(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"スコア分布の同期に失敗しました: {type(e).__name__}: {str(e)}")
+            await asyncio.sleep(interval)
+
+
+distribution_store = ScoreDistributionStore()
+
+
+def personality_metric_values(scores: Dict[PersonalityDimension, float]) -> Dict[str, float]:
+    """性格軸別スコアを分布の名前をキーにした辞書に変換"""
+    return {PERSONALITY_METRICS[dimension]: value for dimension, value in scores.items()}
+
+
+def marriage_metric_values(scores: Dict[str, float]) -> Dict[str, float]:
+    """結婚観カテゴリ別スコアを分布の名前をキーにした辞書に変換"""
+    return {MARRIAGE_METRICS[category]: value for category, value in scores.items()}
+
+
+def record_scores(values: Dict[str, float]) -> Dict[str, Optional[float]]:
+    """1回分の診断スコアを分布に加え、それぞれのパーセンタイル（自分を含む全診断結果の中での位置）を返す"""
+    distribution_store.record(values)
+    return distribution_store.percentiles(values)
+
+
+def score_percentiles(values: Dict[str, float]) -> Dict[str, Optional[float]]:
+    """診断スコアを分布に加えずに、それぞれのパーセンタイル（現在の分布の中での位置）を返す"""
+    return distribution_store.percentiles(values)
+
+
+def distribution_summary(metrics: Dict[str, str], quantiles: Sequence[float] = (0.1, 0.25, 0.5, 0.75, 0.9)) -> Dict[str, dict]:
+    """{表示名: 分布の名前} の各分布の件数と分位点"""
+    summary = {}
+    for label, metric in metrics.items():
+        sketch = distribution_store.sketch(metric)
+        summary[label] = {
+            "count": sketch.total,
+            "quantiles": {f"p{int(q * 100)}": sketch.quantile(q) for q in quantiles}
+        }
+    return summary
@@ -0,0 +1,293 @@
+"""
+音声合成（TTS）結果のディスクキャッシュ
+
+(text, voice, model, speed, 出力形式) のハッシュをキーに音声ファイルを保存する
+コンテンツアドレス型のキャッシュ。合計サイズが上限を超えた場合は
+最も長く使われていないファイルから削除する（LRU）。
+
+キャッシュディレクトリは複数のワーカーで共有できる。ヒットの判定はディスク上の
+ファイルで行い、使われた順はファイルの更新日時で共有する。新しいファイルを登録する
+たびにディレクトリを読み直してから削除するため、上限はディレクトリ全体の合計に
+対してかかる。
+
+事前生成した音声（深堀り質問など）は削除されない音声ストアに保存し、
+`/api/audio/{ファイル名}` から静的ファイルとして配信する。
+"""
+import os
+import time
+import json
+import uuid
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# キャッシュ設定（環境変数で調整可能）
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", str(Path(tempfile.gettempdir()) / "miraim_tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+TTS_CACHE_MAX_AGE = int(os.getenv("TTS_CACHE_MAX_AGE", str(30 * 24 * 60 * 60)))
+
+# これより古い一時ファイルは書き込み途中で異常終了したものとみなして削除する
+TEMP_FILE_MAX_AGE = 60 * 60
+
+# キャッシュ済みの音声を読み出す単位
+AUDIO_READ_CHUNK_SIZE = 64 * 1024
+
+# 事前生成音声の保存先と配信URL
+AUDIO_STORE_DIR = os.getenv("AUDIO_STORE_DIR", str(Path(__file__).resolve().parent.parent / "audio_store"))
+AUDIO_STORE_URL_PREFIX = "/api/audio"
+TTS_CACHE_URL_PREFIX = "/api/text-to-speech/audio"
+
+
+def tts_cache_key(text: str, voice: str, model: str, speed: float, response_format: str) -> str:
+    """音声合成パラメータから正規化したキャッシュキーを作成"""
+    canonical = json.dumps(
+        [text, voice, model, float(speed), response_format],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _PendingWrite:
+    """一時ファイルに書き込み、完了時にアトミックにキャッシュへ登録する"""
+
+    def __init__(self, cache: "AudioFileCache", key: str, ext: str):
+        self._cache = cache
+        self._key = key
+        self._ext = ext
+        self._tmp_path = cache.directory / f".{key}.{uuid.uuid4().hex}.tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self._size += len(chunk)
+
+    def commit(self) -> Path:
+        """書き込みを確定し、キャッシュに登録する"""
+        self._file.close()
+        final_path = self._cache.path_for(self._key, self._ext)
+        os.replace(self._tmp_path, final_path)
+        self._cache._register(final_path.name, self._size)
+        return final_path
+
+    def discard(self) -> None:
+        """書き込みを破棄する（上流エラーや切断時）"""
+        self._file.close()
+        try:
+            os.unlink(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class AudioFileCache:
+    """サイズ上限付きの LRU ディスクキャッシュ（max_bytes=None の場合は削除しない）"""
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # ファイル名 -> サイズ（古い順）
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load()
+
+    def _load(self) -> None:
+        """既存のキャッシュファイルを読み込み、残っている古い一時ファイルを削除する"""
+        stale_before = time.time() - TEMP_FILE_MAX_AGE
+        for path in self.directory.glob(".*.tmp"):
+            # 他のワーカーが書き込み中の一時ファイルは残す
+            try:
+                if path.stat().st_mtime < stale_before:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._rescan()
+            self._evict()
+
+    def _rescan(self) -> None:
+        """
+        ディレクトリの内容で一覧を作り直す（ロック中に呼ぶ）
+
+        他のワーカーが追加・削除したファイルを反映する。更新日時の古い順に並べ、
+        同じ更新日時の場合はこのプロセスで使われた順を保つ。
+        """
+        order = {name: i for i, name in enumerate(self._entries)}
+        files = []
+        for path in self.directory.iterdir():
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, order.get(path.name, len(order)), path.name, stat.st_size))
+
+        self._entries = OrderedDict((name, size) for _, _, name, size in sorted(files))
+        self._total_bytes = sum(self._entries.values())
+
+    def path_for(self, key: str, ext: str) -> Path:
+        return self.directory / f"{key}.{ext}"
+
+    def get(self, key: str, ext: str) -> Optional[Path]:
+        """キャッシュされた音声ファイルのパスを返す（無ければ None）"""
+        path = self.path_for(key, ext)
+        with self._lock:
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                self._forget(path.name)
+                self.misses += 1
+                return None
+            self._touch(path.name, size)
+
+        # 再起動後も LRU 順を保てるよう更新日時を更新
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def open(self, key: str, ext: str) -> Optional[BinaryIO]:
+        """
+        キャッシュされた音声ファイルを開いて返す（無ければ None）
+
+        削除（LRU）とぶつからないようロック中に開く。開いたファイルは、その後に
+        キャッシュから削除されても最後まで読める。
+        """
+        path = self.path_for(key, ext)
+        with self._lock:
+            try:
+                file = open(path, "rb")
+            except FileNotFoundError:
+                self._forget(path.name)
+                self.misses += 1
+                return None
+            self._touch(path.name, os.fstat(file.fileno()).st_size)
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return file
+
+    def _touch(self, name: str, size: int) -> None:
+        """
+        ディスク上にあったファイルを最新として記録する（ロック中に呼ぶ）
+
+        ヒットかどうかは一覧ではなくディスク上のファイルで判定し、起動後に他のプロセス
+        （事前生成スクリプト・別ワーカー）が書き込んだファイルは一覧に追加する。
+        """
+        self.hits += 1
+        if name in self._entries:
+            self._entries.move_to_end(name)
+            return
+        self._entries[name] = size
+        self._total_bytes += size
+        self._evict()
+
+    def _forget(self, name: str) -> None:
+        """ディスク上から無くなったファイルを一覧から外す（ロック中に呼ぶ）"""
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def open_writer(self, key: str, ext: str) -> _PendingWrite:
+        """ストリーミングで書き込むためのライターを開く"""
+        return _PendingWrite(self, key, ext)
+
+    def put(self, key: str, ext: str, data: bytes) -> Path:
+        """音声データをまとめて保存する"""
+        writer = self.open_writer(key, ext)
+        writer.write(data)
+        return writer.commit()
+
+    def _register(self, name: str, size: int) -> None:
+        with self._lock:
+            self._forget(name)
+            self._entries[name] = size
+            self._total_bytes += size
+            if self.max_bytes is not None:
+                self._rescan()
+                # 書き込んだばかりのファイルを最新として扱う
+                if name in self._entries:
+                    self._entries.move_to_end(name)
+            self._evict()
+
+    def _evict(self) -> None:
+        """上限を超えている間、最も古いファイルから削除する"""
+        if self.max_bytes is None:
+            return
+        while self._total_bytes > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                (self.directory / name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット・ミス数などの統計情報"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes or 0,
+            }
+
+
+_tts_cache: Optional[AudioFileCache] = None
+_audio_store: Optional[AudioFileCache] = None
+
+
+def get_tts_cache() -> AudioFileCache:
+    """共有 TTS キャッシュを取得（初回呼び出し時に作成）"""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = AudioFileCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES)
+        logger.info(f"TTSキャッシュを初期化しました: {TTS_CACHE_DIR}")
+    return _tts_cache
+
+
+def get_audio_store() -> AudioFileCache:
+    """事前生成音声のストアを取得（サイズ上限なし・削除しない）"""
+    global _audio_store
+    if _audio_store is None:
+        _audio_store = AudioFileCache(AUDIO_STORE_DIR)
+    return _audio_store
+
+
+def iter_audio_file(file: BinaryIO) -> Iterator[bytes]:
+    """開いた音声ファイルをチャンク単位で読み出し、読み終えたら閉じる"""
+    try:
+        while chunk := file.read(AUDIO_READ_CHUNK_SIZE):
+            yield chunk
+    finally:
+        file.close()
+
+
+def tts_cache_url(key: str, ext: str) -> str:
+    """TTS キャッシュ内の音声の配信URL（キャッシュから削除された後は 404）"""
+    return f"{TTS_CACHE_URL_PREFIX}/{key}.{ext}"
+
+
+def audio_store_url(key: str, ext: str) -> str:
+    """音声ストア内のファイルの配信URL"""
+    return f"{AUDIO_STORE_URL_PREFIX}/{key}.{ext}"
@@ -0,0 +1,70 @@
+import sys
+import os
+
+from fastapi.testclient import TestClient
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from schemas.marriage_mbti import MBTIAnswer, MarriageAnswer
+from services import score_distribution
+from services.analysis_cache import AnalysisCache, analysis_cache, marriage_mbti_fingerprint
+from services.score_distribution import METRICS, ScoreDistributionStore
+
+client = TestClient(app)
+
+MARRIAGE_MBTI_ANSWERS = {
+    "mbtiAnswers": [{"questionId": i, "answer": "B" if i % 3 == 0 else "A"} for i in range(16)],
+    "marriageAnswers": [{"questionId": i, "answer": (i % 4) + 2} for i in range(10)]
+}
+
+
+def test_lru_evicts_least_recently_used():
+    """上限を超えると最も長く使われていない結果から削除され、ヒット率が集計されることを確認"""
+    cache = AnalysisCache(max_entries=2)
+    calls = []
+
+    def compute(key):
+        return lambda: calls.append(key) or key.upper()
+
+    assert cache.get_or_compute("a", compute("a")) == "A"
+    cache.get_or_compute("b", compute("b"))
+    cache.get_or_compute("a", compute("a"))  # a を最近使ったものにする
+    cache.get_or_compute("c", compute("c"))  # b が削除される
+    cache.get_or_compute("b", compute("b"))
+
+    assert calls == ["a", "b", "c", "b"]
+    assert cache.stats() == {"hits": 1, "misses": 4, "hit_rate": 0.2, "entries": 2, "max_entries": 2}
+
+
+def test_fingerprint_ignores_answer_order():
+    """回答の並び順が違っても同じフィンガープリントになることを確認"""
+    mbti = [MBTIAnswer(questionId=i, answer="A" if i % 2 else "B") for i in range(16)]
+    marriage = [MarriageAnswer(questionId=i, answer=(i % 5) + 1) for i in range(10)]
+    assert marriage_mbti_fingerprint(mbti, marriage) == marriage_mbti_fingerprint(mbti[::-1], marriage[::-1])
+
+
+def test_repeated_analysis_is_served_from_cache(monkeypatch):
+    """同じ回答の2回目はキャッシュから返り、パーセンタイル以外の結果が一致することを確認"""
+    # 匿名の診断は分布に加えないため、パーセンタイルが付くよう分布を用意する
+    store = ScoreDistributionStore()
+    store.record({metric: low for metric, (low, _, _) in METRICS.items()})
+    monkeypatch.setattr(score_distribution, "distribution_store", store)
+    analysis_cache.clear()
+    before = analysis_cache.stats()
+
+    first = client.post("/api/marriage-mbti/analyze", json=MARRIAGE_MBTI_ANSWERS).json()
+    second = client.post("/api/marriage-mbti/analyze", json=MARRIAGE_MBTI_ANSWERS).json()
+    personality = {"answers": {i: i % 4 for i in range(1, 11)}}
+    third = client.post("/api/personality/analyze", json=personality).json()
+    fourth = client.post("/api/personality/analyze", json=personality).json()
+
+    after = analysis_cache.stats()
+    assert after["hits"] - before["hits"] == 2
+    assert after["misses"] - before["misses"] == 2
+    assert first["marriagePercentiles"] is not None and third["percentiles"] is not None
+    first.pop("marriagePercentiles"), second.pop("marriagePercentiles")
+    third.pop("percentiles"), fourth.pop("percentiles")
+    assert first == second
+    assert third == fourth
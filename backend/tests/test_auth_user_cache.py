@@ -0,0 +1,113 @@
+import sys
+import os
+import time
+from datetime import date
+
+import httpx
+import pytest
+from passlib.hash import bcrypt
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from auth.jwt import UserSnapshotCache, user_cache
+from auth.password import BCRYPT_ROUNDS
+from database import Base, get_async_db
+from models.user import User
+
+
+def make_user(user_id: int, name: str) -> User:
+    return User(
+        id=user_id,
+        username=name,
+        email=f"{name}@example.com",
+        password_hash="hash",
+        full_name=name,
+        birth_date=date(1990, 1, 1)
+    )
+
+
+def test_cache_returns_fresh_snapshot():
+    """キャッシュから毎回別の User が返り、他のリクエストの変更が混ざらないことを確認"""
+    cache = UserSnapshotCache(max_entries=10, ttl=60)
+    assert cache.get("taro@example.com") is None
+
+    cache.put("taro@example.com", make_user(1, "taro"))
+    first = cache.get("taro@example.com")
+    first.full_name = "変更"
+    second = cache.get("taro@example.com")
+
+    assert second is not first
+    assert second.id == 1
+    assert second.full_name == "taro"
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_expires_and_evicts():
+    """TTL切れとサイズ上限（LRU）でエントリが削除されることを確認"""
+    cache = UserSnapshotCache(max_entries=2, ttl=0.05)
+    cache.put("a", make_user(1, "a"))
+    cache.put("b", make_user(2, "b"))
+    assert cache.get("a") is not None
+    cache.put("c", make_user(3, "c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+
+
+def test_invalidate_removes_email_and_username():
+    """プロフィール更新時に email・username の両方のエントリが削除されることを確認"""
+    cache = UserSnapshotCache(max_entries=10, ttl=60)
+    user = make_user(1, "taro")
+    cache.put(user.email, user)
+    cache.put(user.username, user)
+
+    cache.invalidate(user)
+
+    assert cache.get(user.email) is None
+    assert cache.get(user.username) is None
+
+
+@pytest.mark.asyncio
+async def test_login_rehash_invalidates_cached_user():
+    """ログイン時にパスワードハッシュを再計算したら、キャッシュ済みの古いユーザー情報が削除されることを確認"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    TestingSession = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    old_rounds = 4 if BCRYPT_ROUNDS != 4 else 5
+    user = make_user(1, "taro")
+    user.password_hash = bcrypt.using(rounds=old_rounds).hash("secret")
+    async with TestingSession() as db:
+        db.add(user)
+        await db.commit()
+    user_cache.put(user.email, user)
+
+    async def override_db():
+        async with TestingSession() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_db
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/login", json={"username": "taro", "password": "secret"})
+        async with TestingSession() as db:
+            stored = await db.get(User, 1)
+
+        assert response.status_code == 200
+        assert user_cache.get(user.email) is None
+        assert stored.password_hash.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+    finally:
+        app.dependency_overrides.clear()
+        user_cache.clear()
+        await engine.dispose()
@@ -0,0 +1,39 @@
+import sys
+import os
+import json
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.compare_alloc import ALLOC_SLACK_BYTES, compare, find_baseline, load_alloc_bytes, parse_threshold
+
+BASELINE = {"test_scorer[mbti-1calls]": 1000}
+
+
+def test_compare_flags_only_increases_beyond_threshold():
+    """閾値（と許容差）を超えて確保メモリが増えた場合だけ悪化として報告されることを確認"""
+    within = {"test_scorer[mbti-1calls]": 1200 + ALLOC_SLACK_BYTES}
+    heavier = {"test_scorer[mbti-1calls]": 1201 + ALLOC_SLACK_BYTES}
+    new_case = {"test_scorer[mbti-1000calls]": 10**9}
+
+    assert compare(within, BASELINE, parse_threshold("20%")) == []
+    assert len(compare(heavier, BASELINE, parse_threshold("20%"))) == 1
+    assert compare(heavier, BASELINE, parse_threshold("0.25")) == []
+    assert compare(new_case, BASELINE, 0.2) == []
+
+
+def test_loads_latest_saved_baseline(tmp_path):
+    """--benchmark-save で保存した最新のベースラインから extra_info の確保メモリを読み込むことを確認"""
+    machine = tmp_path / "Linux-CPython-3.10-64bit"
+    machine.mkdir()
+    for name, alloc in [("0001_baseline.json", 1), ("0002_baseline.json", 2)]:
+        (machine / name).write_text(json.dumps({"benchmarks": [
+            {"fullname": "test_scorer[mbti-1calls]", "extra_info": {"alloc_bytes": alloc}},
+            {"fullname": "test_other", "extra_info": {}},
+        ]}))
+    os.utime(machine / "0001_baseline.json", (0, 0))
+
+    path = find_baseline(str(tmp_path))
+    assert path.endswith("0002_baseline.json")
+    assert load_alloc_bytes(path) == {"test_scorer[mbti-1calls]": 2}
+    assert find_baseline(str(tmp_path / "missing")) is None
@@ -0,0 +1,61 @@
+import sys
+import os
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from services.compatibility import (
+    MBTI_COMPATIBILITY,
+    PERSONALITY_COMPATIBILITY,
+    mbti_compatibility,
+    personality_compatibility,
+    top_k_indices,
+)
+
+client = TestClient(app)
+
+
+def test_compatibility_matrices_follow_descriptions():
+    """相性行列が対称で、説明に挙げられた組み合わせが高いスコアになることを確認"""
+    assert MBTI_COMPATIBILITY.shape == (16, 16)
+    assert PERSONALITY_COMPATIBILITY.shape == (6, 6)
+    assert (MBTI_COMPATIBILITY == MBTI_COMPATIBILITY.T).all()
+    assert (PERSONALITY_COMPATIBILITY == PERSONALITY_COMPATIBILITY.T).all()
+
+    # INTJ の説明の1番目は ENFP
+    assert mbti_compatibility("INTJ", "ENFP") == 95.0
+    assert mbti_compatibility("ENFP", "INTJ") == 95.0
+    assert mbti_compatibility("INTJ", "ESFJ") < 85.0
+    assert personality_compatibility("コミュニケーター", "サポーター") == 90.0
+
+
+def test_top_k_indices_prefers_earlier_on_ties():
+    """上位k件が降順で、同点は元の順序が先のものになることを確認"""
+    scores = np.array([1.0, 3.0, 3.0, 2.0, 3.0, 0.0])
+    assert top_k_indices(scores, 2).tolist() == [1, 2]
+    assert top_k_indices(scores, 4).tolist() == [1, 2, 4, 3]
+    assert top_k_indices(scores, 10).tolist() == [1, 2, 4, 3, 0, 5]
+
+
+def test_rank_endpoint_returns_top_candidates():
+    """相性ランキングAPIが総合スコアの高い順に上位k件を返すことを確認"""
+    response = client.post("/api/marriage-mbti/compatibility/rank", json={
+        "mbtiType": "INTJ",
+        "personalityType": "コミュニケーター",
+        "candidates": [
+            {"id": 1, "mbtiType": "ENFP"},
+            {"id": 2, "mbtiType": "ISTJ", "personalityType": "サポーター"},
+            {"id": 3, "mbtiType": "ENFP", "personalityType": "サポーター"},
+        ],
+        "k": 2
+    })
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["totalCandidates"] == 3
+    assert [r["id"] for r in data["results"]] == [3, 1]
+    assert data["results"][1]["personalityScore"] is None
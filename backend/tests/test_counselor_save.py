@@ -0,0 +1,239 @@
+import sys
+import os
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from database import Base, get_async_db
+from models.conversation import Conversation, ConversationSession
+from routers import counselor
+from routers.counselor import (
+    COUNSELOR_FALLBACK_MESSAGE,
+    get_dev_user,
+    build_conversation_rows,
+    record_conversation_session
+)
+from services.llm_gateway import LLMGateway, get_llm_gateway
+
+MESSAGES = [
+    {"role": "ai", "content": "こんにちは。今日はどのようなご相談ですか？"},
+    {"role": "user", "content": "初回デートで何を話せばいいか分かりません"},
+    {"role": "ai", "content": "相手の趣味について質問してみましょう。"},
+    {"role": "user", "content": "どんな質問がいいですか？"},
+    {"role": "ai", "content": "きっかけを聞くと話が広がります。"},
+]
+
+
+class TitleCompletions:
+    """タイトル生成時点で保存済みのタイトルを記録するスタンドイン"""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.titles_at_call = None
+
+    async def create(self, **kwargs):
+        async with self.session_factory() as db:
+            result = await db.execute(select(Conversation.conversation_title).order_by(Conversation.id))
+            self.titles_at_call = result.scalars().all()
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="タイトル: 初回デート会話術"))]
+        )
+
+
+class StreamGateway:
+    """stream_chat で決まったトークンを返し、fail=True ならその後に例外を送出するスタンドイン"""
+
+    def __init__(self, tokens, fail=False):
+        self.tokens = tokens
+        self.fail = fail
+
+    async def stream_chat(self, messages, **params):
+        for token in self.tokens:
+            yield token
+        if self.fail:
+            raise RuntimeError("upstream disconnected")
+
+
+def parse_sse(body: str):
+    """SSE の本文を (イベント名, データ) の一覧にする"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = None, None
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((event, data))
+    return events
+
+
+async def stream_chat(gateway):
+    app.dependency_overrides[get_llm_gateway] = lambda: gateway
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/api/counselor/chat/stream", json={"message": "初デートの服装は？"})
+    assert response.status_code == 200
+    return parse_sse(response.text)
+
+
+async def saved_replies(session_factory):
+    async with session_factory() as db:
+        return (await db.execute(select(Conversation.ai_message))).scalars().all()
+
+
+@pytest_asyncio.fixture
+async def sqlite_session(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    TestingSession = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with TestingSession() as db:
+            yield db
+
+    monkeypatch.setattr(counselor, "AsyncSessionLocal", TestingSession)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_dev_user] = lambda: SimpleNamespace(id=1)
+    yield TestingSession
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_save_commits_before_title_generation(sqlite_session):
+    """会話は仮タイトルで先にコミットされ、タイトルは後から更新されることを確認"""
+    completions = TitleCompletions(sqlite_session)
+    stand_in = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    app.dependency_overrides[get_llm_gateway] = lambda: LLMGateway(client_provider=lambda: stand_in)
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/api/counselor/save", json={"messages": MESSAGES})
+
+    assert response.status_code == 200
+    assert response.json()["saved"] is True
+
+    # タイトル生成の時点で、全ペアが仮タイトル付きで保存済み
+    assert completions.titles_at_call == ["初回デートで何を話せばいいか分かりません", None]
+
+    async with sqlite_session() as db:
+        titles = (await db.execute(select(Conversation.conversation_title).order_by(Conversation.id))).scalars().all()
+        session = (await db.execute(select(ConversationSession))).scalar_one()
+    assert titles == ["初回デート会話術", None]
+    assert session.title == "初回デート会話術"
+    assert session.exchange_count == 2
+
+
+def test_build_conversation_rows_pairs_messages():
+    """ユーザー・AIのペアのみが行になり、タイトルは最初の行だけに入ることを確認"""
+    messages = MESSAGES + [{"role": "user", "content": "返信待ちのメッセージ"}]
+    rows = build_conversation_rows(messages, user_id=1, session_type="counselor", conversation_id="conv_1", title="仮タイトル")
+
+    assert [row["user_message"] for row in rows] == [MESSAGES[1]["content"], MESSAGES[3]["content"]]
+    assert [row["ai_message"] for row in rows] == [MESSAGES[2]["content"], MESSAGES[4]["content"]]
+    assert [row["conversation_title"] for row in rows] == ["仮タイトル", None]
+    assert all(row["conversation_id"] == "conv_1" and row["role"] == "counselor" for row in rows)
+
+
+
+@pytest.mark.asyncio
+async def test_record_session_adds_to_session_created_concurrently(sqlite_session):
+    """存在確認の後に同時リクエストが同じ会話IDのセッションを作成しても、その行に加算されることを確認"""
+    rows = build_conversation_rows(MESSAGES, user_id=1, session_type="counselor", conversation_id="conv_1", title="仮タイトル")
+    for i, row in enumerate(rows):
+        row["created_at"] = datetime(2025, 1, 1, 10, 0, i)
+
+    async with sqlite_session() as db:
+        original_get = db.get
+
+        async def racing_get(*args, **kwargs):
+            # 1回目の存在確認の直後に、別のリクエストがセッションを作成する
+            db.get = original_get
+            await db.execute(insert(ConversationSession).values(
+                id="conv_1", user_id=1, type="counselor", title="先に保存",
+                created_at=datetime(2025, 1, 1, 9, 59), last_updated=datetime(2025, 1, 1, 9, 59), exchange_count=3
+            ))
+            return None
+
+        db.get = racing_get
+        await record_conversation_session(db, rows)
+        await db.commit()
+
+    async with sqlite_session() as db:
+        session = (await db.execute(select(ConversationSession))).scalar_one()
+    assert session.title == "先に保存"
+    assert session.exchange_count == 5
+    assert session.created_at == datetime(2025, 1, 1, 9, 59)
+    assert session.last_updated == datetime(2025, 1, 1, 10, 0, 1)
+
+@pytest.mark.asyncio
+async def test_history_keyset_pagination(sqlite_session):
+    """履歴がSQL集計され、カーソルで重複なくページングできることを確認"""
+    async with sqlite_session() as db:
+        for n in range(5):
+            rows = build_conversation_rows(
+                MESSAGES, user_id=1, session_type="counselor", conversation_id=f"conv_{n}", title=f"相談{n}"
+            )
+            for i, row in enumerate(rows):
+                row["created_at"] = datetime(2025, 1, 1, 10, n, i)
+            await db.execute(insert(Conversation), rows)
+            await record_conversation_session(db, rows)
+        await db.commit()
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        first = await client.get("/api/counselor/history", params={"limit": 3})
+        second = await client.get(
+            "/api/counselor/history", params={"limit": 3, "cursor": first.headers["x-next-cursor"]}
+        )
+        invalid = await client.get("/api/counselor/history", params={"cursor": "invalid"})
+
+    assert [s["conversation_id"] for s in first.json()] == ["conv_4", "conv_3", "conv_2"]
+    assert [s["conversation_id"] for s in second.json()] == ["conv_1", "conv_0"]
+    assert "x-next-cursor" not in second.headers
+    assert first.json()[0]["title"] == "相談4"
+    assert first.json()[0]["exchange_count"] == 2
+    assert invalid.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_stream_sends_tokens_and_saves_reply(sqlite_session):
+    """トークンが順に送られ、完了後に全文が保存されて done で終わることを確認"""
+    events = await stream_chat(StreamGateway(["清潔感の", "ある", "服装で"]))
+
+    assert [data["delta"] for event, data in events[:-1]] == ["清潔感の", "ある", "服装で"]
+    assert events[-1][0] == "done"
+    assert events[-1][1]["message"] == "清潔感のある服装で"
+    assert await saved_replies(sqlite_session) == ["清潔感のある服装で"]
+
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_when_failing_before_first_token(sqlite_session):
+    """最初のトークン前に失敗するとフォールバック応答で done になり、保存されないことを確認"""
+    events = await stream_chat(StreamGateway([], fail=True))
+
+    assert events == [
+        (None, {"delta": COUNSELOR_FALLBACK_MESSAGE}),
+        ("done", {"message": COUNSELOR_FALLBACK_MESSAGE, "timestamp": events[-1][1]["timestamp"]}),
+    ]
+    assert await saved_replies(sqlite_session) == []
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_error_when_failing_mid_stream(sqlite_session):
+    """途中で失敗すると error イベントで部分的な応答を送り、done も保存も行わないことを確認"""
+    events = await stream_chat(StreamGateway(["清潔感の", "ある"], fail=True))
+
+    assert [event for event, _ in events] == [None, None, "error"]
+    assert events[-1][1]["message"] == "清潔感のある"
+    assert await saved_replies(sqlite_session) == []
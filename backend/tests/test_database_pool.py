@@ -0,0 +1,42 @@
+import sys
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import InstrumentedQueuePool
+
+
+def test_pool_metrics_count_checkouts_and_timeouts(tmp_path):
+    """貸し出し数・オーバーフロー・タイムアウトが計測されることを確認"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05
+    )
+
+    first = engine.connect()
+    second = engine.connect()
+    first.execute(text("SELECT 1"))
+
+    metrics = engine.pool.metrics()
+    assert metrics["checked_out"] == 2
+    assert metrics["overflow"] == 1
+    assert metrics["checkouts"] == 2
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    metrics = engine.pool.metrics()
+    assert metrics["timeouts"] == 1
+    assert metrics["max_wait_ms"] >= 50
+
+    first.close()
+    second.close()
+    assert engine.pool.metrics()["checked_out"] == 0
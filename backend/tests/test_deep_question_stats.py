@@ -0,0 +1,103 @@
+import sys
+import os
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from auth.jwt import get_current_user
+from database import Base, get_async_db
+from models.deep_question import DeepQuestion, DeepQuestionProgress, UserQuestionStats
+from services import question_catalog
+
+
+def make_question(category: str, correct_answer: str = "A") -> DeepQuestion:
+    return DeepQuestion(
+        category=category,
+        level=1,
+        situation_text="状況",
+        partner_info={"name": "みゆきさん"},
+        statement="最近ヨガを始めたんです",
+        options=[],
+        correct_answer=correct_answer
+    )
+
+
+@pytest_asyncio.fixture
+async def stats_db(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    TestingSession = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async with TestingSession() as db:
+        db.add_all([make_question("趣味について"), make_question("趣味について"), make_question("仕事について")])
+        await db.commit()
+
+    async def override_get_async_db():
+        async with TestingSession() as db:
+            yield db
+
+    monkeypatch.setattr(question_catalog, "catalog_store", question_catalog.QuestionCatalogStore())
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+    yield TestingSession
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_stats_are_maintained_on_answer_and_shadowing(stats_db):
+    """回答・再挑戦・シャドウィングが集計行に反映され、統計APIに返ることを確認"""
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        await client.post("/api/deep-questions/progress", json={"question_id": 1, "selected_answer": "B"})
+        await client.post("/api/deep-questions/progress", json={"question_id": 1, "selected_answer": "A"})
+        await client.post("/api/deep-questions/progress", json={"question_id": 3, "selected_answer": "A"})
+        await client.post("/api/deep-questions/shadowing", json={"question_id": 1, "duration_seconds": 10, "tone_score": 80})
+        await client.post("/api/deep-questions/shadowing", json={"question_id": 1, "duration_seconds": 20})
+        response = await client.get("/api/deep-questions/stats/user")
+
+    assert response.json() == {
+        "total_questions": 3,
+        "attempted_questions": 2,
+        "correct_answers": 2,
+        "accuracy_rate": 100.0,
+        "category_progress": {
+            "仕事について": {"attempted": 1, "correct": 1, "accuracy": 100.0},
+            "趣味について": {"attempted": 1, "correct": 1, "accuracy": 100.0},
+        },
+        "shadowing_stats": {
+            "total_sessions": 2,
+            "avg_duration": 15.0,
+            "avg_tone_score": 80.0,
+            "avg_speed_score": 0
+        }
+    }
+
+
+@pytest.mark.asyncio
+async def test_stats_backfilled_from_existing_progress(stats_db):
+    """集計行が無いユーザーは既存の回答記録から集計行が作成されることを確認"""
+    async with stats_db() as db:
+        db.add_all([
+            DeepQuestionProgress(user_id=1, question_id=1, selected_answer="A", is_correct=True),
+            DeepQuestionProgress(user_id=1, question_id=2, selected_answer="B", is_correct=False),
+        ])
+        await db.commit()
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/deep-questions/stats/user")
+
+    assert response.json()["attempted_questions"] == 2
+    assert response.json()["category_progress"]["趣味について"] == {"attempted": 2, "correct": 1, "accuracy": 50.0}
+
+    async with stats_db() as db:
+        stats = await db.get(UserQuestionStats, 1)
+    assert stats.correct_answers == 1
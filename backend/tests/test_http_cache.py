@@ -0,0 +1,43 @@
+import sys
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from services.http_cache import etag_matches
+
+client = TestClient(app)
+
+STATIC_ENDPOINTS = [
+    "/api/personality/questions",
+    "/api/personality/types",
+    "/api/marriage-mbti/questions",
+    "/api/marriage-mbti/mbti-types",
+    "/api/marriage-mbti/marriage-categories",
+]
+
+
+def test_etag_matches():
+    """If-None-Match の複数指定・弱いETag・* に一致することを確認"""
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+@pytest.mark.parametrize("path", STATIC_ENDPOINTS)
+def test_static_endpoints_support_conditional_get(path):
+    """固定データのエンドポイントが ETag を返し、一致すれば 304 になることを確認"""
+    response = client.get(path)
+    cached = client.get(path, headers={"If-None-Match": response.headers["etag"]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == response.headers["etag"]
@@ -0,0 +1,110 @@
+import asyncio
+import time
+import sys
+import os
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from database import get_async_db
+from routers.counselor import get_dev_user
+from services.llm_gateway import LLMGateway, get_llm_gateway
+
+SLOW_LLM_SECONDS = 1.0
+PENDING_CHAT_CALLS = 50
+
+
+class SlowCompletions:
+    """上流の OpenAI を模した遅いスタンドイン"""
+
+    def __init__(self, delay: float = SLOW_LLM_SECONDS):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="スタンドイン応答"))]
+        )
+
+
+class FakeSession:
+    """会話保存をスキップするためのダミーセッション"""
+
+    def add(self, obj):
+        pass
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def slow_llm():
+    completions = SlowCompletions()
+    stand_in = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    gateway = LLMGateway(client_provider=lambda: stand_in)
+
+    app.dependency_overrides[get_llm_gateway] = lambda: gateway
+    app.dependency_overrides[get_dev_user] = lambda: SimpleNamespace(id=1)
+    app.dependency_overrides[get_async_db] = lambda: FakeSession()
+    yield completions
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_health_stays_responsive_while_chats_pending(slow_llm):
+    """50件のチャットが上流待ちの間も /health が即座に応答することを確認"""
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        started = time.perf_counter()
+        chat_tasks = [
+            asyncio.create_task(
+                client.post("/api/counselor/chat", json={"message": f"相談{i}"})
+            )
+            for i in range(PENDING_CHAT_CALLS)
+        ]
+
+        # 全チャットが上流呼び出し中になるまで待つ
+        while slow_llm.in_flight < PENDING_CHAT_CALLS:
+            await asyncio.sleep(0.01)
+
+        health_started = time.perf_counter()
+        health_response = await client.get("/health")
+        health_elapsed = time.perf_counter() - health_started
+
+        chat_responses = await asyncio.gather(*chat_tasks)
+        total_elapsed = time.perf_counter() - started
+
+    assert health_response.status_code == 200
+    assert health_elapsed < SLOW_LLM_SECONDS / 4
+
+    # 全チャットが並行して処理されている（直列なら50秒かかる）
+    assert slow_llm.max_in_flight == PENDING_CHAT_CALLS
+    assert total_elapsed < SLOW_LLM_SECONDS * 5
+    for response in chat_responses:
+        assert response.status_code == 200
+        assert response.json()["message"] == "スタンドイン応答"
+
+
+@pytest.mark.asyncio
+async def test_gateway_limits_concurrency():
+    """セマフォで上流への同時リクエスト数が制限されることを確認"""
+    completions = SlowCompletions(delay=0.05)
+    stand_in = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    gateway = LLMGateway(client_provider=lambda: stand_in, max_concurrency=5)
+
+    await asyncio.gather(*[
+        gateway.chat([{"role": "user", "content": "hi"}]) for _ in range(10)
+    ])
+
+    assert completions.max_in_flight == 5
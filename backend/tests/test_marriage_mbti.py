@@ -344,5 +344,32 @@ def test_extreme_answers():
     assert data_a["mbtiType"] != data_b["mbtiType"]  # 異なる結果
 
 
+
+def test_analyze_marriage_mbti_batch():
+    """一括採点が1件ずつの分析と同じタイプ・スコアを返し、不正な回答は400になることを確認"""
+    sheets = [
+        {"mbti": "A" * 16, "marriage": [1] * 10},
+        {"mbti": "ABABBABAABBAABAB", "marriage": [3, 4, 2, 5, 1, 3, 4, 2, 3, 5]},
+    ]
+    response = client.post("/api/marriage-mbti/analyze/batch", json={"sheets": sheets})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 2
+
+    for sheet, result in zip(sheets, data["results"]):
+        single = client.post("/api/marriage-mbti/analyze", json={
+            "mbtiAnswers": [{"questionId": i, "answer": a} for i, a in enumerate(sheet["mbti"])],
+            "marriageAnswers": [{"questionId": i, "answer": a} for i, a in enumerate(sheet["marriage"])]
+        }).json()
+        assert result["mbtiType"] == single["mbtiType"]
+        assert result["mbtiScores"] == single["mbtiScores"]
+        assert result["marriageScores"] == single["marriageScores"]
+
+    invalid = client.post("/api/marriage-mbti/analyze/batch", json={
+        "sheets": [sheets[0], {"mbti": "ABC", "marriage": [3] * 10}]
+    })
+    assert invalid.status_code == 400
+    assert "1件目" in invalid.json()["detail"]
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -0,0 +1,162 @@
+import sys
+import os
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from auth.jwt import get_current_user, get_optional_user
+from database import Base, get_async_db
+from models.marriage_mbti import MarriageMBTIRecord
+from services import marriage_similarity
+from services.marriage_similarity import MarriageSimilarityIndex, find_similar_personas, normalize_vectors
+
+SAMPLE_ANSWERS = {
+    "mbtiAnswers": [{"questionId": i, "answer": "A" if i % 2 == 0 else "B"} for i in range(16)],
+    "marriageAnswers": [{"questionId": i, "answer": 5 if i % 2 == 0 else 4} for i in range(10)],
+    "discoverable": True
+}
+
+
+def record(user_id: int, score: float, discoverable: bool = True) -> MarriageMBTIRecord:
+    return MarriageMBTIRecord(
+        user_id=user_id, mbti_type="ENFP", discoverable=discoverable,
+        communication=score, lifestyle=score, values=score, future=score, intimacy=score
+    )
+
+
+@pytest_asyncio.fixture
+async def similarity_db(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    TestingSession = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async with TestingSession() as db:
+        db.add_all([
+            MarriageMBTIRecord(user_id=2, mbti_type="ENFP", communication=1.0, lifestyle=1.0, values=1.0, future=1.0, intimacy=1.0, discoverable=True),
+            MarriageMBTIRecord(user_id=3, mbti_type="INFJ", communication=4.5, lifestyle=4.0, values=4.5, future=4.0, intimacy=4.5, discoverable=True),
+            # ユーザー2の最新の結果
+            MarriageMBTIRecord(user_id=2, mbti_type="ENFP", communication=4.0, lifestyle=4.5, values=4.0, future=4.5, intimacy=4.0, discoverable=True),
+            # 掲載に同意していないユーザー（結婚観は最も近い）
+            MarriageMBTIRecord(user_id=4, mbti_type="ISTJ", communication=5.0, lifestyle=4.0, values=5.0, future=4.0, intimacy=5.0),
+        ])
+        await db.commit()
+
+    async def override_get_async_db():
+        async with TestingSession() as db:
+            yield db
+
+    monkeypatch.setattr(marriage_similarity, "similarity_store", marriage_similarity.MarriageSimilarityStore(check_interval=0))
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+    app.dependency_overrides[get_optional_user] = lambda: SimpleNamespace(id=1)
+    yield TestingSession
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+def test_index_matches_brute_force_cosine():
+    """索引の検索結果が全件のコサイン類似度を並べ替えた結果と一致し、同じIDは上書きされることを確認"""
+    rng = np.random.default_rng(0)
+    scores = rng.integers(2, 11, size=(2000, 5)) / 2.0
+    index = MarriageSimilarityIndex(capacity=16)
+    index.upsert_many(range(1000), scores[:1000])
+    index.upsert_many(range(500, 2000), scores[500:])
+    query = [4.5, 2.0, 3.0, 1.5, 5.0]
+
+    similarities = normalize_vectors(scores) @ normalize_vectors(np.array(query))[0]
+    expected = np.argsort(-similarities, kind="stable")[:21]
+    results = index.search(query, 20, exclude_id=int(expected[0]))
+
+    assert len(index) == 2000
+    assert [r["id"] for r in results] == expected[1:].tolist()
+    assert results[0]["similarity"] == pytest.approx(similarities[expected[1]], abs=1e-4)
+
+    index.upsert(5, [1.0, 1.0, 1.0, 1.0, 1.0])
+    assert len(index) == 2000
+    assert index.search([1.5, 1.5, 1.5, 1.5, 1.5], 1)[0]["id"] == 5
+
+
+def test_neutral_scores_have_zero_similarity():
+    """全カテゴリが中立値のスコアは向きを持たず、類似度 0 になることを確認"""
+    index = MarriageSimilarityIndex()
+    index.upsert(1, [3.0, 3.0, 3.0, 3.0, 3.0])
+    assert index.search([5.0, 1.0, 5.0, 1.0, 5.0], 1)[0]["similarity"] == 0.0
+    assert find_similar_personas({"communication": 4.5, "lifestyle": 4.5, "values": 3.0, "future": 3.0, "intimacy": 4.0}, 1)[0]["id"] == "warm-homemaker"
+
+
+@pytest.mark.asyncio
+async def test_analyze_saves_result_and_finds_similar_users(similarity_db):
+    """ログインユーザーの診断結果が保存され、最新の結果で類似ユーザー検索に使われることを確認"""
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        analyzed = await client.post("/api/marriage-mbti/analyze", json=SAMPLE_ANSWERS)
+        similar = await client.post(
+            "/api/marriage-mbti/similar/users",
+            json={"scores": analyzed.json()["marriageScores"], "k": 5}
+        )
+        personas = await client.post(
+            "/api/marriage-mbti/similar/personas",
+            json={"scores": analyzed.json()["marriageScores"], "k": 2}
+        )
+
+    async with similarity_db() as db:
+        saved = (await db.execute(select(MarriageMBTIRecord).where(MarriageMBTIRecord.user_id == 1))).scalars().all()
+
+    assert analyzed.status_code == 200
+    assert len(saved) == 1
+    assert saved[0].mbti_type == analyzed.json()["mbtiType"]
+
+    data = similar.json()
+    # 自分自身（ユーザー1）は除かれ、ユーザー2は最新の結果で比べられる
+    assert data["totalUsers"] == 3
+    assert [r["id"] for r in data["results"]] == [2, 3]
+    assert set(data["results"][0]) == {"id", "similarity"}
+    assert len(personas.json()["results"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_users_without_consent_never_appear(similarity_db):
+    """掲載に同意していないユーザー・最新の結果で同意を取り消したユーザーは検索結果に出ないことを確認"""
+    store = marriage_similarity.similarity_store
+    async with similarity_db() as db:
+        index = await store.get(db)
+        # ユーザー3は同意を取り消し、ユーザー5は同意してから取り消し（同じ読み込み内）
+        db.add_all([record(3, 4.5, discoverable=False), record(5, 5.0), record(5, 5.0, discoverable=False)])
+        await db.commit()
+        index = await store.get(db)
+
+    results = index.search([5.0, 4.0, 5.0, 4.0, 5.0], 10)
+    assert [r["id"] for r in results] == [2]
+    assert len(index) == 1
+
+    # 同じワーカーで保存した結果もすぐに反映される
+    async with similarity_db() as db:
+        await marriage_similarity.save_marriage_result(
+            db, 6, SimpleNamespace(mbtiType=SimpleNamespace(value="ENFP"), marriageScores=SimpleNamespace(
+                communication=5.0, lifestyle=4.0, values=5.0, future=4.0, intimacy=5.0
+            )), discoverable=False
+        )
+    assert 6 not in [r["id"] for r in store._index.search([5.0, 4.0, 5.0, 4.0, 5.0], 10)]
+
+
+def test_index_remove_keeps_other_rows():
+    """索引から外した ID は結果に出ず、他の ID の行は保たれることを確認"""
+    index = MarriageSimilarityIndex(capacity=4)
+    index.upsert_many([1, 2, 3], np.array([[1.0] * 5, [5.0] * 5, [5.0, 1.0, 5.0, 1.0, 5.0]]))
+    index.remove(1)
+    index.remove(1)
+
+    assert len(index) == 2
+    assert [r["id"] for r in index.search([5.0] * 5, 5)] == [2, 3]
+    index.upsert(1, [5.0] * 5)
+    assert sorted(r["id"] for r in index.search([5.0] * 5, 5)) == [1, 2, 3]
@@ -0,0 +1,43 @@
+import sys
+import os
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from auth.jwt import get_current_user
+from routers import ops
+
+client = TestClient(app)
+
+OPS_PATHS = [
+    "/api/ops/auth/user-cache-stats",
+    "/api/ops/analysis/cache-stats",
+    "/api/ops/text-to-speech/cache-stats",
+    "/api/ops/db/pool-stats",
+]
+
+
+def test_ops_stats_require_login():
+    """ログインしていない場合は統計を参照できないことを確認"""
+    for path in OPS_PATHS:
+        assert client.get(path).status_code == 401
+
+
+def test_ops_stats_are_limited_to_ops_users(monkeypatch):
+    """OPS_ADMIN_USERNAMES に含まれないユーザーは 403、含まれるユーザーだけ参照できることを確認"""
+    monkeypatch.setattr(ops, "OPS_ADMIN_USERNAMES", frozenset({"ops_admin"}))
+    try:
+        app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1, username="member")
+        assert [client.get(path).status_code for path in OPS_PATHS] == [403] * len(OPS_PATHS)
+
+        app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=2, username="ops_admin")
+        responses = [client.get(path) for path in OPS_PATHS]
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [r.status_code for r in responses] == [200] * len(OPS_PATHS)
+    assert "hit_rate" in responses[1].json()
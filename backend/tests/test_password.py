@@ -0,0 +1,35 @@
+import sys
+import os
+
+import pytest
+from passlib.hash import bcrypt
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth.password import BCRYPT_ROUNDS, verify_password_async
+
+
+@pytest.mark.asyncio
+async def test_verify_password_async_rehashes_on_cost_change():
+    """スレッドプールで検証でき、コストが低いハッシュは再計算されることを確認"""
+    old_rounds = 4 if BCRYPT_ROUNDS != 4 else 5
+    hashed = bcrypt.using(rounds=old_rounds).hash("secret")
+
+    verified, new_hash = await verify_password_async("secret", hashed)
+    assert verified is True
+    assert new_hash.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+
+    verified, new_hash = await verify_password_async("wrong", hashed)
+    assert verified is False
+    assert new_hash is None
+
+
+@pytest.mark.asyncio
+async def test_stronger_hash_is_not_downgraded():
+    """現在の設定よりコストが高いハッシュは、ログイン時に弱いコストで再計算されないことを確認"""
+    hashed = bcrypt.using(rounds=BCRYPT_ROUNDS + 1).hash("secret")
+
+    verified, new_hash = await verify_password_async("secret", hashed)
+    assert verified is True
+    assert new_hash is None
@@ -206,5 +206,28 @@ def test_personality_extreme_answers():
         assert 0 <= score <= 100
 
 
+
+def test_analyze_personality_batch_matches_single():
+    """一括採点が1件ずつの分析と同じタイプ・スコアを返すことを確認"""
+    import random
+    from services.personality_logic import PERSONALITY_QUESTIONS
+    from services.batch_scoring import analyze_personality_batch
+
+    rng = random.Random(0)
+    sheets = [
+        {q["id"]: rng.randrange(len(q["options"])) for q in PERSONALITY_QUESTIONS}
+        for _ in range(200)
+    ]
+    batch = analyze_personality_batch(sheets)
+
+    for sheet, result in zip(sheets[:20], batch):
+        single = client.post("/api/personality/analyze", json={"answers": sheet}).json()
+        assert result["personality_type"] == single["personality_type"]
+        assert result["scores"] == single["scores"]
+
+    response = client.post("/api/personality/analyze/batch", json={"sheets": sheets[:3] + [{1: 0}]})
+    assert response.status_code == 400
+    assert "3件目" in response.json()["detail"]
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,102 @@
+import sys
+import os
+from datetime import datetime
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from database import Base, get_async_db
+from models.deep_question import DeepQuestion
+from services import question_catalog
+from services.question_catalog import QuestionCatalogStore
+
+
+def make_question(category: str, level: int) -> DeepQuestion:
+    return DeepQuestion(
+        category=category,
+        level=level,
+        situation_text="状況",
+        partner_info={"name": "みゆきさん"},
+        statement="最近ヨガを始めたんです",
+        options=[{"id": "A", "text": "いいですね"}],
+        correct_answer="A",
+        updated_at=datetime(2025, 1, 1)
+    )
+
+
+@pytest_asyncio.fixture
+async def catalog_db(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    TestingSession = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async with TestingSession() as db:
+        db.add_all([make_question("趣味について", 1), make_question("趣味について", 2), make_question("仕事について", 1)])
+        await db.commit()
+
+    async def override_get_async_db():
+        async with TestingSession() as db:
+            yield db
+
+    # バージョン確認はテスト内で invalidate() したときだけ行う
+    store = QuestionCatalogStore(check_interval=3600)
+    monkeypatch.setattr(question_catalog, "catalog_store", store)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield TestingSession, store
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_catalog_filters_and_etag(catalog_db):
+    """一覧・カテゴリー・個別取得がカタログから返り、ETag が一致すれば 304 になることを確認"""
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        listing = await client.get("/api/deep-questions/")
+        filtered = await client.get("/api/deep-questions/", params={"category": "趣味について", "level": 2})
+        limited = await client.get("/api/deep-questions/", params={"limit": 2})
+        categories = await client.get("/api/deep-questions/categories")
+        single = await client.get("/api/deep-questions/3")
+        missing = await client.get("/api/deep-questions/99")
+        cached = await client.get("/api/deep-questions/", headers={"If-None-Match": listing.headers["etag"]})
+
+    assert [q["id"] for q in listing.json()] == [1, 2, 3]
+    assert [q["id"] for q in filtered.json()] == [2]
+    assert [q["id"] for q in limited.json()] == [1, 2]
+    assert [c["value"] for c in categories.json()] == ["all", "趣味について", "仕事について"]
+    assert single.json()["category"] == "仕事について"
+    assert missing.status_code == 404
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+@pytest.mark.asyncio
+async def test_catalog_reloads_on_version_change(catalog_db):
+    """質問データが変わるとバージョンが変わり、読み込み直されることを確認"""
+    TestingSession, store = catalog_db
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        before = await client.get("/api/deep-questions/")
+
+        async with TestingSession() as db:
+            await db.execute(
+                update(DeepQuestion).where(DeepQuestion.id == 2).values(is_active=False, updated_at=datetime(2025, 2, 1))
+            )
+            await db.commit()
+
+        # 確認間隔内はメモリ上のカタログを返す
+        stale = await client.get("/api/deep-questions/")
+        store.invalidate()
+        after = await client.get("/api/deep-questions/", headers={"If-None-Match": before.headers["etag"]})
+
+    assert stale.headers["etag"] == before.headers["etag"]
+    assert after.status_code == 200
+    assert after.headers["etag"] != before.headers["etag"]
+    assert [q["id"] for q in after.json()] == [1, 3]
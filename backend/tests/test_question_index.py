@@ -0,0 +1,97 @@
+import sys
+import os
+import random
+from types import SimpleNamespace
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schemas.marriage_mbti import MarriageAnswer, MarriageCategory, MarriageScore
+from services.question_index import bucket_answers, bucket_option_scores, build_question_index, first_answers
+from services.personality_logic import PERSONALITY_QUESTIONS, PersonalityDimension, calculate_personality_scores
+from services.marriage_mbti_logic import (
+    MARRIAGE_QUESTION_CATEGORIES,
+    calculate_marriage_scores,
+    generate_personalized_advice
+)
+
+QUESTIONS = [
+    {"id": 1, "dimension": "a", "options": [{"score": 4}, {"score": 1}]},
+    {"id": 2, "dimension": "b", "options": [{"score": 3}]},
+]
+
+
+def reference_personality_scores(answers):
+    """索引を使う前の実装（質問一覧を先頭から走査する）"""
+    dimension_scores = {dim: [] for dim in PersonalityDimension}
+    for question in PERSONALITY_QUESTIONS:
+        if question["id"] in answers:
+            option_index = answers[question["id"]]
+            if 0 <= option_index < len(question["options"]):
+                dimension_scores[question["dimension"]].append(question["options"][option_index]["score"])
+    return {
+        dimension: round(((sum(scores) / len(scores) - 1) / 3) * 100, 1) if scores else 0.0
+        for dimension, scores in dimension_scores.items()
+    }
+
+
+def reference_marriage_scores(answers):
+    """振り分けを共通化する前の実装"""
+    category_scores = {category: [] for category in MarriageCategory}
+    for answer in answers:
+        category_scores[MARRIAGE_QUESTION_CATEGORIES[answer.questionId]].append(answer.answer)
+    return MarriageScore(**{
+        category.value: sum(scores) / len(scores) if scores else 3.0
+        for category, scores in category_scores.items()
+    })
+
+
+def random_personality_sheet(rng):
+    """未回答・範囲外の選択肢・存在しない質問IDを含む回答"""
+    sheet = {q["id"]: rng.randrange(-1, 6) for q in PERSONALITY_QUESTIONS if rng.random() < 0.8}
+    if rng.random() < 0.3:
+        sheet[rng.choice([0, 99])] = 0
+    return sheet
+
+
+def random_marriage_sheet(rng):
+    """並び順がばらばらで、重複・欠けのある回答"""
+    ids = [i for i in range(len(MARRIAGE_QUESTION_CATEGORIES)) if rng.random() < 0.8]
+    ids += rng.sample(ids, min(len(ids), rng.randrange(3)))
+    rng.shuffle(ids)
+    return [MarriageAnswer(questionId=i, answer=rng.randint(1, 5)) for i in ids]
+
+
+def test_bucket_option_scores_ignores_unknown_and_out_of_range():
+    """索引に無い質問ID・範囲外の選択肢は無視され、空の軸も残ることを確認"""
+    index = build_question_index(QUESTIONS)
+    assert index == {1: ("a", (4, 1)), 2: ("b", (3,))}
+
+    buckets = bucket_option_scores({1: 1, 2: 1, 3: 0, 4: -1}, index, ["a", "b", "c"])
+    assert buckets == {"a": [1], "b": [], "c": []}
+
+
+def test_bucket_and_first_answers():
+    """カテゴリごとに回答順で振り分けられ、同じ質問の重複は最初の回答が使われることを確認"""
+    answers = [SimpleNamespace(questionId=q, answer=a) for q, a in [(1, 5), (0, 2), (1, 3), (0, 4)]]
+
+    assert bucket_answers(answers, ["x", "y"], ["x", "y", "z"]) == {"x": [2, 4], "y": [5, 3], "z": []}
+    assert first_answers(answers) == {1: 5, 0: 2}
+
+
+def test_scorers_match_previous_implementation():
+    """ランダムな回答で、性格診断・結婚観スコア・アドバイスがリファクタリング前の実装と一致することを確認"""
+    rng = random.Random(0)
+    for _ in range(500):
+        sheet = random_personality_sheet(rng)
+        assert calculate_personality_scores(sheet) == reference_personality_scores(sheet)
+
+        answers = random_marriage_sheet(rng)
+        assert calculate_marriage_scores(answers) == reference_marriage_scores(answers)
+
+        # 以前の実装は質問ごとに next(...) で最初の回答（無ければ 3）を使っていた
+        expected_inputs = [
+            MarriageAnswer(questionId=q, answer=next((a.answer for a in answers if a.questionId == q), 3))
+            for q in range(4)
+        ]
+        assert generate_personalized_advice(answers) == generate_personalized_advice(expected_inputs)
@@ -0,0 +1,130 @@
+import sys
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from auth.jwt import get_current_user
+from database import Base, get_async_db
+from models.deep_question import DeepQuestion, DeepQuestionProgress
+from services import question_catalog
+from services.question_scheduler import next_question_batch, review_interval, schedule_review
+
+NOW = datetime(2025, 7, 1, 12, 0, 0)
+
+
+def make_question(category: str) -> DeepQuestion:
+    return DeepQuestion(
+        category=category,
+        level=1,
+        situation_text="状況",
+        partner_info={"name": "みゆきさん"},
+        statement="最近ヨガを始めたんです",
+        options=[],
+        correct_answer="A"
+    )
+
+
+@pytest_asyncio.fixture
+async def scheduler_db(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    TestingSession = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async with TestingSession() as db:
+        db.add_all([make_question("趣味について") for _ in range(4)] + [make_question("仕事について")])
+        await db.commit()
+
+    async def override_get_async_db():
+        async with TestingSession() as db:
+            yield db
+
+    monkeypatch.setattr(question_catalog, "catalog_store", question_catalog.QuestionCatalogStore())
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+    yield TestingSession
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+def test_schedule_review_extends_interval_on_streak():
+    """正解が続くと間隔が延び、不正解で短い再出題間隔に戻ることを確認"""
+    progress = DeepQuestionProgress(streak=0)
+    schedule_review(progress, True, NOW)
+    assert progress.due_at == NOW + timedelta(days=1)
+    schedule_review(progress, True, NOW)
+    assert (progress.streak, progress.due_at) == (2, NOW + timedelta(days=3))
+    schedule_review(progress, False, NOW)
+    assert (progress.streak, progress.due_at) == (0, NOW + review_interval(0))
+    assert review_interval(100) == review_interval(6)
+
+
+@pytest.mark.asyncio
+async def test_next_batch_prefers_due_reviews_then_unseen(scheduler_db):
+    """期限切れの復習が期限順に先に並び、期限前・回答済みの問題は除かれることを確認"""
+    async with scheduler_db() as db:
+        db.add_all([
+            # 問題1: 期限前（出題しない）
+            DeepQuestionProgress(user_id=1, question_id=1, selected_answer="A", is_correct=True, streak=1,
+                                 due_at=NOW + timedelta(days=1)),
+            # 問題3・2: 期限切れ（期限の古い順に 3 → 2）
+            DeepQuestionProgress(user_id=1, question_id=2, selected_answer="B", is_correct=False, streak=0,
+                                 due_at=NOW - timedelta(minutes=5)),
+            DeepQuestionProgress(user_id=1, question_id=3, selected_answer="A", is_correct=True, streak=2,
+                                 due_at=NOW - timedelta(days=2)),
+        ])
+        await db.commit()
+
+        catalog = await question_catalog.catalog_store.get(db)
+        batch = await next_question_batch(db, catalog, user_id=1, limit=10, now=NOW)
+        limited = await next_question_batch(db, catalog, user_id=1, limit=1, now=NOW)
+        work = await next_question_batch(db, catalog, user_id=1, category="仕事について", now=NOW)
+        other_user = await next_question_batch(db, catalog, user_id=2, limit=2, now=NOW)
+
+    assert [q["id"] for q in batch] == [3, 2, 4, 5]
+    assert [q["id"] for q in limited] == [3]
+    assert [q["id"] for q in work] == [5]
+    assert [q["id"] for q in other_user] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_deactivated_due_questions_do_not_crowd_out_due_reviews(scheduler_db):
+    """期限切れの進捗の多くが無効化された問題でも、有効な復習が未回答の問題より先に出ることを確認"""
+    async with scheduler_db() as db:
+        db.add_all([
+            DeepQuestionProgress(user_id=1, question_id=question_id, selected_answer="A", is_correct=True,
+                                 streak=1, due_at=NOW - timedelta(days=5 - question_id))
+            for question_id in (1, 2, 3)
+        ])
+        await db.execute(update(DeepQuestion).where(DeepQuestion.id.in_([1, 2])).values(is_active=False))
+        await db.commit()
+
+        catalog = await question_catalog.catalog_store.get(db)
+        batch = await next_question_batch(db, catalog, user_id=1, limit=1, now=NOW)
+        filled = await next_question_batch(db, catalog, user_id=1, limit=10, now=NOW)
+
+    assert [q["id"] for q in batch] == [3]
+    assert [q["id"] for q in filled] == [3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_answer_schedules_next_review(scheduler_db):
+    """回答すると次の復習日時が記録され、出題対象から外れることを確認"""
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        answer = await client.post("/api/deep-questions/progress", json={"question_id": 1, "selected_answer": "A"})
+        batch = await client.get("/api/deep-questions/next", params={"limit": 2})
+
+    assert answer.json()["streak"] == 1
+    assert answer.json()["due_at"] is not None
+    assert [q["id"] for q in batch.json()] == [2, 3]
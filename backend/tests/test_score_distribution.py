@@ -0,0 +1,123 @@
+import sys
+import os
+import random
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from auth.jwt import get_optional_user
+from database import Base, get_async_db
+from models.personality import PersonalityResult
+from services import score_distribution
+from services.score_distribution import ScoreDistributionStore, ScoreSketch
+
+ANSWERS = {"answers": {i: 0 for i in range(1, 11)}}
+LOW_ANSWERS = {"answers": {i: 3 for i in range(1, 11)}}
+
+
+@pytest_asyncio.fixture
+async def distribution_db(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    TestingSession = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with TestingSession() as db:
+            yield db
+
+    monkeypatch.setattr(score_distribution, "distribution_store", ScoreDistributionStore())
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_optional_user] = lambda: SimpleNamespace(id=1)
+    yield TestingSession
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+def test_sketch_percentile_matches_exact_rank():
+    """ヒストグラムのパーセンタイル・分位点が全件から求めた値と一致し、合算しても変わらないことを確認"""
+    rng = random.Random(0)
+    values = [round(rng.uniform(0, 100), 1) for _ in range(5000)]
+    first, second = ScoreSketch(0.0, 100.0, 0.1), ScoreSketch(0.0, 100.0, 0.1)
+    for i, value in enumerate(values):
+        (first if i % 2 else second).add(value)
+    first.merge(second)
+
+    for value in (0.0, 12.3, 50.0, 99.9, 100.0):
+        below = sum(v < value for v in values)
+        equal = sum(v == value for v in values)
+        assert first.percentile(value) == round((below + equal / 2) / len(values) * 100, 1)
+    assert first.total == 5000
+    assert first.quantile(0.5) == sorted(values)[2499]
+    assert ScoreSketch(1.0, 5.0, 0.01).percentile(3.0) is None
+
+
+@pytest.mark.asyncio
+async def test_workers_merge_through_table(distribution_db):
+    """各ワーカーの未反映分がテーブルで合算され、同期後は他のワーカーの分も含めて計算されることを確認"""
+    worker_a, worker_b = ScoreDistributionStore(), ScoreDistributionStore()
+    metric = "personality.empathy"
+    for value in (10.0, 20.0, 30.0):
+        worker_a.record({metric: value})
+    worker_b.record({metric: 90.0})
+
+    async with distribution_db() as db:
+        await worker_a.sync(db)
+    async with distribution_db() as db:
+        await worker_b.sync(db)
+
+    # B は同期済みで A の3件を含み、A は次の同期まで自分の3件だけ
+    assert worker_b.percentiles({metric: 90.0})[metric] == 87.5
+    assert worker_a.percentiles({metric: 90.0})[metric] == 100.0
+    async with distribution_db() as db:
+        await worker_a.sync(db)
+    assert worker_a.sketch(metric).total == 4
+    assert worker_a.percentiles({metric: 25.0})[metric] == 50.0
+
+
+@pytest.mark.asyncio
+async def test_analyze_returns_percentiles_and_saves_result(distribution_db):
+    """診断結果に軸別のパーセンタイルが付き、ログインユーザーの結果が保存されることを確認"""
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        first = await client.post("/api/personality/analyze", json=ANSWERS)
+        app.dependency_overrides[get_optional_user] = lambda: SimpleNamespace(id=2)
+        second = await client.post("/api/personality/analyze", json=LOW_ANSWERS)
+        distribution = await client.get("/api/personality/distribution")
+
+    async with distribution_db() as db:
+        saved = (await db.execute(select(PersonalityResult))).scalars().all()
+
+    assert first.json()["percentiles"]["共感性"] == 50.0
+    # 2人目（全軸0点）は1人目（全軸100点）より下
+    assert second.json()["percentiles"]["共感性"] == 25.0
+    assert distribution.json()["distribution"]["共感性"]["count"] == 2
+    assert [r.empathy for r in saved] == [100.0, 0.0]
+
+
+@pytest.mark.asyncio
+async def test_only_first_result_of_logged_in_users_is_counted(distribution_db):
+    """匿名の診断・同じユーザーの再診断は分布に加えず、現在の分布での位置だけが返ることを確認"""
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        await client.post("/api/personality/analyze", json=ANSWERS)
+        repeated = await client.post("/api/personality/analyze", json=LOW_ANSWERS)
+        app.dependency_overrides[get_optional_user] = lambda: None
+        anonymous = [await client.post("/api/personality/analyze", json=LOW_ANSWERS) for _ in range(3)]
+        distribution = await client.get("/api/personality/distribution")
+
+    async with distribution_db() as db:
+        saved = (await db.execute(select(PersonalityResult))).scalars().all()
+
+    # 分布は1人目の初回（全軸100点）だけで、全軸0点はその下
+    assert repeated.json()["percentiles"]["共感性"] == 0.0
+    assert [r.json()["percentiles"]["共感性"] for r in anonymous] == [0.0] * 3
+    assert distribution.json()["distribution"]["共感性"]["count"] == 1
+    assert [r.empathy for r in saved] == [100.0, 0.0]
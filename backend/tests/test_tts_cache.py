@@ -0,0 +1,214 @@
+import sys
+import os
+import json
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+# プロジェクトルートを sys.path に追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from main import app
+from services.llm_gateway import get_llm_gateway
+from services.tts_cache import (
+    AudioFileCache,
+    audio_store_url,
+    get_audio_store,
+    get_tts_cache,
+    tts_cache_key,
+    tts_cache_url
+)
+
+
+def test_cache_key_is_canonical():
+    """同じパラメータ（speedの型違いを含む）で同じキーになることを確認"""
+    assert tts_cache_key("こんにちは", "alloy", "tts-1", 1, "mp3") == tts_cache_key("こんにちは", "alloy", "tts-1", 1.0, "mp3")
+    assert tts_cache_key("こんにちは", "alloy", "tts-1", 1.0, "mp3") != tts_cache_key("こんにちは", "nova", "tts-1", 1.0, "mp3")
+    assert tts_cache_key("こんにちは", "alloy", "tts-1", 1.0, "mp3") != tts_cache_key("こんにちは", "alloy", "tts-1", 1.0, "opus")
+
+
+def test_put_and_get(tmp_path):
+    """保存した音声が取得でき、ヒット・ミスが記録されることを確認"""
+    cache = AudioFileCache(str(tmp_path), max_bytes=1024)
+
+    assert cache.get("a", "mp3") is None
+    cache.put("a", "mp3", b"audio")
+    path = cache.get("a", "mp3")
+
+    assert path is not None
+    assert path.read_bytes() == b"audio"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["total_bytes"] == 5
+
+
+def test_lru_eviction(tmp_path):
+    """上限を超えると最も使われていないファイルから削除されることを確認"""
+    cache = AudioFileCache(str(tmp_path), max_bytes=20)
+    cache.put("a", "mp3", b"x" * 10)
+    cache.put("b", "mp3", b"x" * 10)
+
+    # a を参照して b を最も古い状態にする
+    assert cache.get("a", "mp3") is not None
+    cache.put("c", "mp3", b"x" * 10)
+
+    assert cache.get("b", "mp3") is None
+    assert cache.get("a", "mp3") is not None
+    assert cache.get("c", "mp3") is not None
+    assert cache.stats()["evictions"] == 1
+    assert not (tmp_path / "b.mp3").exists()
+
+
+def test_discarded_write_leaves_no_file(tmp_path):
+    """途中で破棄した書き込みはキャッシュに残らないことを確認"""
+    cache = AudioFileCache(str(tmp_path), max_bytes=1024)
+    writer = cache.open_writer("a", "mp3")
+    writer.write(b"partial")
+    writer.discard()
+
+    assert cache.get("a", "mp3") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_reload_restores_entries(tmp_path):
+    """再起動後も既存のキャッシュファイルが使われることを確認"""
+    AudioFileCache(str(tmp_path), max_bytes=1024).put("a", "mp3", b"audio")
+
+    reloaded = AudioFileCache(str(tmp_path), max_bytes=1024)
+    assert reloaded.get("a", "mp3") is not None
+    assert reloaded.stats()["total_bytes"] == 5
+
+
+
+def test_workers_sharing_a_directory_share_entries_and_limit(tmp_path):
+    """同じディレクトリを使う複数のワーカーで、キャッシュと上限（ディレクトリ全体）が共有されることを確認"""
+    worker_a = AudioFileCache(str(tmp_path), max_bytes=20)
+    worker_b = AudioFileCache(str(tmp_path), max_bytes=20)
+    in_progress = worker_b.open_writer("d", "mp3")
+
+    worker_a.put("a", "mp3", b"x" * 10)
+    worker_b.put("b", "mp3", b"x" * 10)
+    assert worker_a.get("b", "mp3") is not None
+    # 起動時に、他のワーカーが書き込み中の一時ファイルは削除しない
+    AudioFileCache(str(tmp_path), max_bytes=20)
+    worker_b.put("c", "mp3", b"x" * 10)
+
+    assert sorted(p.name for p in tmp_path.glob("*.mp3")) == ["b.mp3", "c.mp3"]
+    assert worker_a.get("a", "mp3") is None
+    assert worker_a.get("c", "mp3") is not None
+    in_progress.write(b"audio")
+    in_progress.commit()
+    assert sum(p.stat().st_size for p in tmp_path.glob("*.mp3")) <= 20
+
+def test_opened_file_survives_eviction(tmp_path):
+    """開いた音声ファイルは、その後キャッシュから削除されても最後まで読めることを確認"""
+    cache = AudioFileCache(str(tmp_path), max_bytes=10)
+    cache.put("a", "mp3", b"x" * 10)
+
+    file = cache.open("a", "mp3")
+    cache.put("b", "mp3", b"y" * 10)  # a が削除される
+
+    assert not (tmp_path / "a.mp3").exists()
+    with file:
+        assert file.read() == b"x" * 10
+    assert cache.open("a", "mp3") is None
+
+
+
+def test_file_written_by_another_instance_is_served(tmp_path):
+    """起動済みのストアが、別のインスタンス（事前生成スクリプトなど）が後から書き込んだ音声を配信することを確認"""
+    store = AudioFileCache(str(tmp_path))
+    app.dependency_overrides[get_audio_store] = lambda: store
+    client = TestClient(app)
+    key = tts_cache_key("深堀り質問", "alloy", "tts-1", 1.0, "mp3")
+
+    try:
+        assert client.get(audio_store_url(key, "mp3")).status_code == 404
+        AudioFileCache(str(tmp_path)).put(key, "mp3", b"audio")
+        response = client.get(audio_store_url(key, "mp3"))
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.content == b"audio"
+    assert store.stats()["entries"] == 1
+
+
+def test_cached_speech_is_served_over_get_with_etag(tmp_path):
+    """キャッシュ済みの音声は POST で返り、Content-Location の GET URL で ETag / 304 に対応することを確認"""
+    cache = AudioFileCache(str(tmp_path), max_bytes=1024)
+    key = tts_cache_key("こんにちは", "alloy", "tts-1", 1.0, "mp3")
+    cache.put(key, "mp3", b"audio")
+    app.dependency_overrides[get_tts_cache] = lambda: cache
+    client = TestClient(app)
+
+    try:
+        posted = client.post("/api/text-to-speech", json={"text": "こんにちは"})
+        fetched = client.get(posted.headers["content-location"])
+        revalidated = client.get(posted.headers["content-location"], headers={"If-None-Match": f'"{key}"'})
+        missing = client.get(tts_cache_url("0" * 64, "mp3"))
+    finally:
+        app.dependency_overrides.clear()
+
+    assert posted.content == b"audio"
+    assert "etag" not in posted.headers
+    assert posted.headers["content-location"] == tts_cache_url(key, "mp3")
+    assert fetched.content == b"audio"
+    assert fetched.headers["etag"] == f'"{key}"'
+    assert revalidated.status_code == 304
+    assert missing.status_code == 404
+
+
+class SpeechStream:
+    """stream_speech で決まったチャンクを返し、閉じられたかを記録するスタンドイン"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    async def stream_speech(self, text, **params):
+        try:
+            for chunk in self.chunks:
+                yield chunk
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_upstream_stream_is_closed_when_client_disconnects_before_body(tmp_path):
+    """レスポンス本文の送信前にクライアントが切断しても、上流のストリームが閉じられ一時ファイルが残らないことを確認"""
+    upstream = SpeechStream([b"aud", b"io"])
+    app.dependency_overrides[get_tts_cache] = lambda: AudioFileCache(str(tmp_path), max_bytes=1024)
+    app.dependency_overrides[get_llm_gateway] = lambda: SimpleNamespace(
+        available=True, stream_speech=upstream.stream_speech
+    )
+    messages = [
+        {"type": "http.request", "body": json.dumps({"text": "こんにちは"}).encode(), "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/text-to-speech", "raw_path": b"/api/text-to-speech",
+        "root_path": "", "query_string": b"", "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    try:
+        await app(scope, receive, send)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert upstream.closed
+    assert list(tmp_path.iterdir()) == []